@@ -0,0 +1,179 @@
+import os
+
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+# Columns of the archive. Kind is "viscosity" or "thixotropy"; Segment is the
+# sweep (FORWARD/REVERSE) or the peak-hold phase (PRESHEAR/HIGHSHEAR/RECOVERY).
+LABEL_COLUMNS = ["Sample", "Kind", "Segment"]
+VALUE_COLUMNS = ["Shear rate", "Viscosity", "Stress", "Step time", "Time"]
+ARCHIVE_COLUMNS = LABEL_COLUMNS + VALUE_COLUMNS
+
+# Archive formats by extension, in order of preference
+ARCHIVE_FORMATS = {".parquet": "pyarrow", ".h5": "tables", ".npz": None}
+
+# Longest label stored in an HDF5 archive
+_HDF_LABEL_SIZE = 128
+
+
+def _available(module):
+    """Returns True if the optional module can be imported."""
+    if module is None:
+        return True
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_archive_path(file_path):
+    """
+    Chooses the archive format from the file extension.
+
+    Parquet needs pyarrow and HDF5 needs PyTables. If the requested format is
+    not available (or the path has no known extension) the next available
+    format in ARCHIVE_FORMATS is used and the extension is changed to match.
+
+    Parameters:
+    file_path (str): Requested archive path (.parquet, .h5 or .npz).
+
+    Returns:
+    str: The path that will be written.
+    """
+    base, extension = os.path.splitext(file_path)
+    extension = extension.lower()
+    if extension == ".hdf5":
+        extension = ".h5"
+
+    if extension in ARCHIVE_FORMATS and _available(ARCHIVE_FORMATS[extension]):
+        return base + extension
+
+    for fallback, module in ARCHIVE_FORMATS.items():
+        if _available(module):
+            return base + fallback
+
+
+def sample_columns(sample, kind, df):
+    """
+    Converts a loaded sample to the archive columns.
+
+    Parameters:
+    sample (str): Sample name.
+    kind (str): "viscosity" or "thixotropy".
+    df (pd.DataFrame): Output of load_viscosity_stress_data or load_thixotropy_data.
+
+    Returns:
+    pd.DataFrame: The sample's points with ARCHIVE_COLUMNS; values the sample
+                  does not have (e.g. 'Time' of a flow sweep) are NaN.
+    """
+    segment = df["Sweep"] if "Sweep" in df else df["peak"]
+    columns = {"Sample": np.full(len(df), sample, dtype=object),
+               "Kind": np.full(len(df), kind, dtype=object),
+               "Segment": segment.to_numpy(dtype=object)}
+    for column in VALUE_COLUMNS:
+        if column in df:
+            columns[column] = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+        else:
+            columns[column] = np.full(len(df), np.nan)
+    return pd.DataFrame(columns, columns=ARCHIVE_COLUMNS)
+
+
+def _write_parquet(file_path, frames):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, pa.string()) for column in LABEL_COLUMNS] +
+                       [(column, pa.float64()) for column in VALUE_COLUMNS])
+    # One row group per sample; the label columns are dictionary encoded by the writer
+    with pq.ParquetWriter(file_path, schema) as writer:
+        for frame in frames:
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+
+
+def _write_hdf(file_path, frames):
+    with pd.HDFStore(file_path, mode="w", complevel=5, complib="blosc") as store:
+        for frame in frames:
+            store.append("points", frame, format="table", index=False, data_columns=LABEL_COLUMNS,
+                         min_itemsize={column: _HDF_LABEL_SIZE for column in LABEL_COLUMNS})
+
+
+def _write_npz(file_path, frames):
+    frames = list(frames)
+    arrays = {}
+    for column in LABEL_COLUMNS:
+        # Labels are stored as integer codes and the list of distinct labels
+        labels = pd.Categorical(np.concatenate([frame[column].to_numpy() for frame in frames])
+                                if frames else [])
+        arrays[column] = labels.codes
+        arrays[f"{column} labels"] = np.asarray(labels.categories, dtype=str)
+    for column in VALUE_COLUMNS:
+        arrays[column] = (np.concatenate([frame[column].to_numpy() for frame in frames])
+                          if frames else np.empty(0))
+    np.savez(file_path, **arrays)
+
+
+def write_archive(file_path, samples):
+    """
+    Writes processed samples to one columnar archive.
+
+    Parquet and HDF5 archives are written one sample at a time, so `samples`
+    can be a generator that loads each file only when it is written. NPZ
+    archives hold all points in memory before writing.
+
+    Parameters:
+    file_path (str): Archive path; the format follows the extension (see resolve_archive_path).
+    samples (iterable of tuple): (sample name, kind, DataFrame) for each sample.
+
+    Returns:
+    str: The path that was written.
+    """
+    file_path = resolve_archive_path(file_path)
+    frames = (sample_columns(sample, kind, df) for sample, kind, df in samples)
+
+    extension = os.path.splitext(file_path)[1]
+    if extension == ".parquet":
+        _write_parquet(file_path, frames)
+    elif extension == ".h5":
+        _write_hdf(file_path, frames)
+    else:
+        _write_npz(file_path, frames)
+
+    return file_path
+
+
+def read_archive(file_path, columns=None):
+    """
+    Reads an archive written by write_archive.
+
+    Parameters:
+    file_path (str): Path to a .parquet, .h5 or .npz archive.
+    columns (list of str): Columns to read. Default: all ARCHIVE_COLUMNS.
+
+    Returns:
+    pd.DataFrame: The archived points; label columns are categorical.
+    """
+    columns = list(columns or ARCHIVE_COLUMNS)
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension == ".parquet":
+        df = pd.read_parquet(file_path, columns=columns)
+    elif extension in (".h5", ".hdf5"):
+        df = pd.read_hdf(file_path, "points", columns=columns).reset_index(drop=True)
+    elif extension == ".npz":
+        with np.load(file_path) as arrays:
+            df = pd.DataFrame({
+                column: (pd.Categorical.from_codes(arrays[column], arrays[f"{column} labels"])
+                         if column in LABEL_COLUMNS else arrays[column])
+                for column in columns
+            })
+        return df
+    else:
+        raise ValueError(f"Error: Unsupported archive format '{extension}'")
+
+    for column in LABEL_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype("category")
+    return df
@@ -0,0 +1,272 @@
+"""
+Checkpointed, resumable batch jobs.
+
+A batch job keeps its state in a job directory: the result of every file is
+written to its own JSON file under results/, and a line is appended to
+journal.jsonl once that result is safely on disk. Running the same job again
+(e.g. after a crash) reads the journal and only processes the files that are
+not finished yet, or that changed since they were processed.
+
+Usage:
+    python batch_jobs.py thixotropy JOB_DIR FILE... [--output-directory DIR]
+                         [--export results.xlsx] [--retry-errors] [--profile]
+                         [--timeout SECONDS] [--memory-limit MB]
+    python batch_jobs.py viscosity JOB_DIR FILE... [--output-directory DIR] [--comparison]
+                         [--export yield_stress.xlsx]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+from processor import DataProcessor
+from isolation import DEFAULT_TIMEOUT
+
+JOURNAL_NAME = "journal.jsonl"
+RESULTS_DIRECTORY = "results"
+
+
+def _fingerprint(file_path):
+    """Size and modification time of a file, used to notice files that changed since they were processed."""
+    try:
+        stat = os.stat(file_path)
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+    except OSError:
+        return None
+
+
+def _write_json_atomic(file_path, payload):
+    """Writes JSON to a temporary file and renames it, so a crash never leaves a partial file."""
+    temporary_path = file_path + ".tmp"
+    with open(temporary_path, "w") as f:
+        json.dump(payload, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary_path, file_path)
+
+
+class BatchJob:
+    """
+    A batch of files processed with a checkpoint after every file.
+
+    Finished files are recorded in the journal with the fingerprint of the
+    input file; a file is processed again only if it is not in the journal,
+    if its fingerprint changed or, with retry_errors, if it failed.
+    """
+
+    def __init__(self, job_directory, processor=None, output_directory=None):
+        """
+        Open (or create) a job directory.
+
+        Parameters:
+        job_directory (str): Directory holding the journal and the per-file results.
+        processor (DataProcessor): Processor used for the files. Default: a new one
+                                   writing its plots to output_directory.
+        output_directory (str): Plot directory of the default processor. Default: job_directory.
+        """
+        self.job_directory = job_directory
+        self.results_directory = os.path.join(job_directory, RESULTS_DIRECTORY)
+        os.makedirs(self.results_directory, exist_ok=True)
+
+        self.journal_path = os.path.join(job_directory, JOURNAL_NAME)
+        self.processor = processor or DataProcessor(output_directory or job_directory)
+        self.entries = self._read_journal()
+
+    def _read_journal(self):
+        """Returns the last journal entry of every file."""
+        entries = {}
+        if not os.path.exists(self.journal_path):
+            return entries
+
+        with open(self.journal_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Line cut short by a crash while it was written
+                    continue
+                entries[(entry["task"], entry["file"])] = entry
+        return entries
+
+    def _result_path(self, task, file_path):
+        digest = hashlib.sha1(f"{task}:{os.path.abspath(file_path)}".encode()).hexdigest()[:16]
+        return os.path.join(self.results_directory, f"{task}-{digest}.json")
+
+    def is_done(self, task, file_path, retry_errors=False):
+        """
+        Returns True if a file was already processed for a task and has not changed since.
+
+        Parameters:
+        task (str): Task name, e.g. "thixotropy".
+        file_path (str): Path to the data file.
+        retry_errors (bool): Count files that failed as not done.
+        """
+        entry = self.entries.get((task, os.path.abspath(file_path)))
+        if entry is None or entry["fingerprint"] != _fingerprint(file_path):
+            return False
+        if retry_errors and entry["status"] == "error":
+            return False
+        return os.path.exists(entry["result"])
+
+    def _record(self, task, file_path, result):
+        """Saves the result of one file, then appends its journal entry."""
+        result_path = self._result_path(task, file_path)
+        _write_json_atomic(result_path, result)
+
+        entry = {
+            "task": task,
+            "file": os.path.abspath(file_path),
+            "sample": os.path.splitext(os.path.basename(file_path))[0],
+            "status": "error" if "Error" in result else "done",
+            "result": result_path,
+            "fingerprint": _fingerprint(file_path),
+        }
+        with open(self.journal_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries[(task, entry["file"])] = entry
+
+    def load_result(self, task, file_path):
+        """Returns the saved result of a finished file."""
+        with open(self.entries[(task, os.path.abspath(file_path))]["result"]) as f:
+            return json.load(f)
+
+    def run(self, task, file_paths, process_file, retry_errors=False, progress=None):
+        """
+        Process the files that are not finished yet, checkpointing after each one.
+
+        Parameters:
+        task (str): Task name; results of different tasks are kept apart.
+        file_paths (list of str): Paths to the data files.
+        process_file (callable): Takes a file path and returns a JSON-serializable
+                                 dict, with an "Error" key if the file failed.
+        retry_errors (bool): Process files that failed in an earlier run again.
+        progress (callable): Called as progress(done, total, file_path) after each file.
+
+        Returns:
+        dict: Sample names mapped to their results, for all files (finished earlier or now).
+        """
+        all_results = {}
+        for i, file_path in enumerate(file_paths, start=1):
+            sample_name = os.path.splitext(os.path.basename(file_path))[0]
+
+            if self.is_done(task, file_path, retry_errors):
+                all_results[sample_name] = self.load_result(task, file_path)
+            else:
+                try:
+                    result = process_file(file_path)
+                except Exception as e:
+                    result = {"Error": f"Failed to analyze file: {str(e)}"}
+                self._record(task, file_path, result)
+                all_results[sample_name] = result
+
+            if progress:
+                progress(i, len(file_paths), file_path)
+
+        return all_results
+
+    def analyze_thixotropy(self, file_paths, retry_errors=False, progress=None):
+        """
+        Resumable version of DataProcessor.analyze_thixotropy_multiple.
+
+        Returns:
+        dict: Dictionary mapping sample names to their results dictionaries.
+        """
+        def process_file(file_path):
+            _, results = self.processor.analyze_thixotropy_single(file_path)
+            return results
+
+        return self.run("thixotropy", file_paths, process_file, retry_errors, progress)
+
+    def process_viscosity(self, file_paths, sweep_type=("FORWARD", "REVERSE"), comparison=False,
+                          retry_errors=False, progress=None):
+        """
+        Resumable per-file viscosity plots and yield stresses, with an optional comparison plot of all files.
+
+        The per-file plots and yield stress estimates (see
+        DataProcessor.analyze_yield_stress_single) are checkpointed; the comparison plot (as made by
+        process_viscosity_multiple) is drawn at the end from the files that
+        loaded successfully.
+
+        Parameters:
+        file_paths (list of str): Paths to viscosity data files.
+        sweep_type (str or sequence): Sweep(s) to plot, e.g. "FORWARD" or ("FORWARD", "REVERSE").
+        comparison (bool): Also draw the comparison plot of all files.
+
+        Returns:
+        dict: Sample names mapped to {"plot": path, yield stress metrics...} or
+              {"Error": message}. With comparison, the key "comparison" holds the
+              comparison plot path.
+        """
+        sweep_type = list(sweep_type) if not isinstance(sweep_type, str) else sweep_type
+
+        def process_file(file_path):
+            df, _, plot_path = self.processor.process_viscosity_single(file_path, sweep_type)
+            return {"plot": plot_path, **self.processor.analyze_yield_stress_single(file_path, df)}
+
+        all_results = self.run("viscosity", file_paths, process_file, retry_errors, progress)
+
+        if comparison:
+            finished = [file_path for file_path in file_paths
+                        if "Error" not in all_results[os.path.splitext(os.path.basename(file_path))[0]]]
+            if finished:
+                _, _, _, plot_path = self.processor.process_viscosity_multiple(finished, sweep_type,
+                                                                            keep_dataframes=False)
+                all_results["comparison"] = {"plot": plot_path}
+
+        return all_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a resumable batch analysis.")
+    parser.add_argument("analysis", choices=["thixotropy", "viscosity"], help="Analysis to run")
+    parser.add_argument("job_directory", help="Directory holding the journal and per-file results")
+    parser.add_argument("files", nargs="+", help="TRIOS export files")
+    parser.add_argument("--output-directory", help="Directory for plots (default: the job directory)")
+    parser.add_argument("--export", help="Export the thixotropy metrics (or, for viscosity, the yield stresses "
+                                         "and plot paths) of all files to this .csv or .xlsx file")
+    parser.add_argument("--comparison", action="store_true", help="Also draw the viscosity comparison plot")
+    parser.add_argument("--retry-errors", action="store_true", help="Process files that failed before again")
+    parser.add_argument("--profile", action="store_true", help="Write stage timings to the job directory")
+    parser.add_argument("--timeout", type=float, help="Parse every file in a worker process and stop it after "
+                                                      "this many seconds (default with --memory-limit: "
+                                                      f"{DEFAULT_TIMEOUT})")
+    parser.add_argument("--memory-limit", type=float, help="Parse every file in a worker process limited to this "
+                                                           "many MB of memory")
+    args = parser.parse_args(argv)
+
+    isolate = args.timeout is not None or args.memory_limit is not None
+    processor = DataProcessor(args.output_directory or args.job_directory, profile=args.profile or None,
+                              isolate=isolate, timeout=args.timeout or DEFAULT_TIMEOUT,
+                              memory_limit=int(args.memory_limit * 1024 ** 2) if args.memory_limit else None)
+    job = BatchJob(args.job_directory, processor)
+
+    def progress(done, total, file_path):
+        print(f"[{done}/{total}] {file_path}", file=sys.stderr)
+
+    if args.analysis == "thixotropy":
+        all_results = job.analyze_thixotropy(args.files, args.retry_errors, progress)
+        metrics = all_results
+    else:
+        all_results = job.process_viscosity(args.files, comparison=args.comparison,
+                                            retry_errors=args.retry_errors, progress=progress)
+        # The yield stresses were journaled with the plots; the comparison plot is not a sample
+        metrics = {name: results for name, results in all_results.items() if name != "comparison"}
+
+    if args.export:
+        export_format = "excel" if args.export.lower().endswith((".xls", ".xlsx")) else "csv"
+        success, message = processor.export_thixotropy_results_multiple(metrics, args.export, export_format)
+        print(message if success else f"Export failed: {message}", file=sys.stderr)
+
+    if processor.timer.enabled:
+        processor.write_timing_report(os.path.join(args.job_directory, "stage_timings.json"))
+
+    failed = sum("Error" in result for result in all_results.values())
+    print(f"{len(all_results) - failed} succeeded, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
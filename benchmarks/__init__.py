@@ -0,0 +1 @@
+"""Benchmarks for the rheology data reader. Run the modules from the repository root, e.g. ``python -m benchmarks.startup``."""
@@ -0,0 +1,295 @@
+"""
+Performance regression gate.
+
+Runs fixed scenarios on synthetic TRIOS exports and compares the median time
+of every stage with a committed baseline (benchmarks/baseline.json):
+
+- parse: data_import loaders (flow sweeps and peak holds) for every file
+- analysis: data_analysis metrics, recovery times and viscosity at QC shear rates
+- plotting: comparison plots of all flow curves and viscosity-time curves
+- processor: DataProcessor.analyze_thixotropy_multiple and the CSV export, from the files
+
+Machines differ in speed, so every run also times a fixed NumPy/Python
+calibration workload and the baseline times are scaled by the ratio of the
+calibration times before comparing. A stage regresses when it is slower than
+its scaled baseline by more than the tolerance band (relative, plus an
+absolute allowance for very short stages); the gate then prints the per-stage
+diff and exits with status 1.
+
+The calibration does not cover a change of library: a baseline recorded with
+other Python, pandas, NumPy or matplotlib versions than the installed ones is
+refused (exit status 2) unless --ignore-versions is given.
+
+Usage:
+    python -m benchmarks.regression [--baseline benchmarks/baseline.json] [--repeats 3]
+                                    [--tolerance 0.3] [--absolute-tolerance 0.05]
+                                    [--scenario NAME ...] [--update] [--ignore-versions]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+
+# Plots are written to files only; never open a window
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.suite import _metadata, _time  # noqa: E402
+from benchmarks.synthetic import generate_dataset  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+
+STAGES = ["parse", "analysis", "plotting", "processor"]
+
+# Scenario name mapped to (files, size preset, export format); fixed so that baselines stay comparable
+SCENARIOS = {
+    "small-xlsx": (6, "small", "xlsx"),
+    "medium-txt": (6, "medium", "txt"),
+    "large-csv": (3, "large", "csv"),
+}
+
+# Default tolerance band: a stage may be this much slower (relative) plus this many seconds
+RELATIVE_TOLERANCE = 0.3
+ABSOLUTE_TOLERANCE = 0.05
+
+# Metadata entries that must match the baseline's for the times to be comparable
+VERSION_KEYS = ["python", "pandas", "numpy", "matplotlib"]
+
+
+def calibrate(repeats=5):
+    """
+    Times a fixed workload representative of the pipeline (NumPy sorting and a Python loop).
+
+    Returns:
+    float: Fastest of `repeats` runs in seconds.
+    """
+    import numpy as np
+
+    values = np.random.default_rng(0).random(1_000_000)
+
+    def workload():
+        np.sort(values)
+        np.interp(values, np.sort(values), values)
+        return sum(i * i for i in range(300_000))
+
+    return min(_time(workload, repeats)[0])
+
+
+def run_scenario(file_paths, output_directory, repeats=3):
+    """
+    Times every stage of STAGES on a batch of files.
+
+    Returns:
+    dict: Stage name mapped to {"median_s", "min_s", "runs"}.
+    """
+    from data_import import load_viscosity_stress_data, load_thixotropy_data
+    from data_analysis import calculate_viscosity_ratio, calculate_thixotropic_index, \
+        calculate_structural_recovery, calculate_recovery_times_batch, viscosity_at_shear_rates_table
+    from plotting import plot_viscosity_data, plot_thixotropy_data
+    from processor import DataProcessor
+
+    processor = DataProcessor(output_directory, profile=False)
+    names = [os.path.splitext(os.path.basename(path))[0] for path in file_paths]
+
+    def parse():
+        return ([load_viscosity_stress_data(path) for path in file_paths],
+                [load_thixotropy_data(path) for path in file_paths])
+
+    timings = {}
+    timings["parse"], (viscosity_dfs, thixotropy_dfs) = _time(parse, repeats)
+
+    def analysis():
+        for df in thixotropy_dfs:
+            calculate_viscosity_ratio(df)
+            calculate_thixotropic_index(df)
+            calculate_structural_recovery(df)
+        calculate_recovery_times_batch(thixotropy_dfs)
+        viscosity_at_shear_rates_table(dict(zip(names, viscosity_dfs)))
+
+    timings["analysis"], _ = _time(analysis, repeats)
+
+    def plotting():
+        plot_viscosity_data(viscosity_dfs, "comparison-BOTH.png", output_directory, ["FORWARD", "REVERSE"], names)
+        plot_thixotropy_data(thixotropy_dfs, "comparison", output_directory, names)
+
+    timings["plotting"], _ = _time(plotting, repeats)
+
+    def process():
+        results = processor.analyze_thixotropy_multiple(file_paths)
+        processor.export_thixotropy_results_multiple(results, os.path.join(output_directory, "results.csv"), "csv")
+
+    timings["processor"], _ = _time(process, repeats)
+
+    return {stage: {"median_s": statistics.median(runs), "min_s": min(runs), "runs": runs}
+            for stage, runs in timings.items()}
+
+
+def run_scenarios(names, repeats=3, work_directory=None):
+    """Generates the data of every named scenario and times it."""
+    scenarios = {}
+    with tempfile.TemporaryDirectory(dir=work_directory) as tmp:
+        for name in names:
+            n_files, size, file_format = SCENARIOS[name]
+            print(f"Running {name}...", file=sys.stderr)
+            paths = generate_dataset(os.path.join(tmp, name), n_files, size, file_format)
+            scenarios[name] = run_scenario(paths, os.path.join(tmp, f"out-{name}"), repeats)
+    return scenarios
+
+
+def version_mismatches(baseline_metadata, current_metadata):
+    """
+    Lists the library versions that differ between the baseline and this run.
+
+    Parameters:
+    baseline_metadata (dict): "metadata" of the baseline.
+    current_metadata (dict): "metadata" of this run.
+
+    Returns:
+    list of str: One "name: baseline version != installed version" entry per difference.
+    """
+    return [f"{key}: {baseline_metadata.get(key)} != {current_metadata[key]}"
+            for key in VERSION_KEYS if baseline_metadata.get(key) != current_metadata[key]]
+
+
+def check(current, baseline, relative=None, absolute=None):
+    """
+    Compares a run with the baseline, stage by stage.
+
+    Parameters:
+    current (dict): Results of this run ("calibration_s" and "scenarios").
+    baseline (dict): Baseline results with the same layout and optional "tolerance"
+                     ({"relative": ..., "absolute_s": ...}, overridable per stage).
+    relative (float): Relative tolerance overriding the baseline's.
+    absolute (float): Absolute tolerance in seconds overriding the baseline's.
+
+    Returns:
+    tuple: (list of row dicts, number of regressed stages). Every row has the scenario,
+           stage, baseline and expected (scaled) time, current time, limit, ratio and status
+           ("ok", "faster", "REGRESSED" or "new").
+    """
+    scale = current["calibration_s"] / baseline["calibration_s"]
+    defaults = baseline.get("tolerance", {})
+
+    rows = []
+    regressions = 0
+    for scenario, stages in current["scenarios"].items():
+        baseline_stages = baseline["scenarios"].get(scenario, {})
+        for stage, summary in stages.items():
+            now = summary["median_s"]
+            row = {"scenario": scenario, "stage": stage, "current_s": now, "baseline_s": None,
+                   "expected_s": None, "limit_s": None, "ratio": None, "status": "new"}
+            if stage in baseline_stages:
+                reference = baseline_stages[stage]
+                tolerance = reference.get("tolerance", {})
+                rel = relative if relative is not None else tolerance.get(
+                    "relative", defaults.get("relative", RELATIVE_TOLERANCE))
+                abs_s = absolute if absolute is not None else tolerance.get(
+                    "absolute_s", defaults.get("absolute_s", ABSOLUTE_TOLERANCE))
+
+                expected = reference["median_s"] * scale
+                limit = expected * (1 + rel) + abs_s
+                if now > limit:
+                    status = "REGRESSED"
+                    regressions += 1
+                elif now < expected * (1 - rel) - abs_s:
+                    status = "faster"
+                else:
+                    status = "ok"
+                row.update(baseline_s=reference["median_s"], expected_s=expected, limit_s=limit,
+                           ratio=now / expected if expected else float("inf"), status=status)
+            rows.append(row)
+
+    return rows, regressions
+
+
+def format_rows(rows, scale):
+    """Builds the per-stage diff table."""
+    def seconds(value):
+        return f"{value:>10.3f}" if value is not None else f"{'-':>10}"
+
+    lines = [f"Baseline times scaled by {scale:.2f} (calibration ratio of this machine to the baseline's)",
+             f"{'Scenario':<12} {'Stage':<10} {'Baseline':>10} {'Expected':>10} {'Current':>10} "
+             f"{'Limit':>10} {'Ratio':>6}  Status"]
+    for row in rows:
+        ratio = f"{row['ratio']:>6.2f}" if row["ratio"] is not None else f"{'-':>6}"
+        lines.append(f"{row['scenario']:<12} {row['stage']:<10} {seconds(row['baseline_s'])} "
+                     f"{seconds(row['expected_s'])} {seconds(row['current_s'])} {seconds(row['limit_s'])} "
+                     f"{ratio}  {row['status']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail if a pipeline stage got slower than the stored baseline.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--tolerance", type=float, help="Relative tolerance (default: from the baseline, "
+                                                        f"else {RELATIVE_TOLERANCE})")
+    parser.add_argument("--absolute-tolerance", type=float, help="Absolute tolerance in seconds (default: from "
+                                                                 f"the baseline, else {ABSOLUTE_TOLERANCE})")
+    parser.add_argument("--scenario", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS),
+                        help="Scenarios to run")
+    parser.add_argument("--update", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--output", help="Also write this run's results to this JSON file")
+    parser.add_argument("--ignore-versions", action="store_true",
+                        help="Compare even if the baseline was recorded with other library versions")
+    args = parser.parse_args(argv)
+
+    # Sizes and formats vary by scenario (see SCENARIOS)
+    args.size, args.format = "mixed", "mixed"
+    metadata = _metadata(args)
+
+    # Check the baseline before spending minutes on the scenarios
+    baseline = None
+    if not args.update:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --update to create one", file=sys.stderr)
+            return 2
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        mismatches = version_mismatches(baseline.get("metadata", {}), metadata)
+        if mismatches:
+            print(f"The baseline was recorded with other versions ({'; '.join(mismatches)}).", file=sys.stderr)
+            if not args.ignore_versions:
+                print("Install the versions of requirements.txt, or run with --update to record a new "
+                      "baseline (--ignore-versions compares anyway).", file=sys.stderr)
+                return 2
+            print("Comparing anyway; differences may come from the libraries.", file=sys.stderr)
+
+    current = {
+        "metadata": metadata,
+        "calibration_s": calibrate(),
+        "scenarios": run_scenarios(args.scenario, args.repeats),
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.update:
+        current["tolerance"] = {
+            "relative": args.tolerance if args.tolerance is not None else RELATIVE_TOLERANCE,
+            "absolute_s": args.absolute_tolerance if args.absolute_tolerance is not None else ABSOLUTE_TOLERANCE,
+        }
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    rows, regressions = check(current, baseline, args.tolerance, args.absolute_tolerance)
+    print(format_rows(rows, current["calibration_s"] / baseline["calibration_s"]))
+
+    if regressions:
+        print(f"{regressions} stage(s) regressed", file=sys.stderr)
+        return 1
+    print("No regression", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
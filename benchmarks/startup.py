@@ -0,0 +1,134 @@
+"""
+Start-up time benchmark.
+
+Every measurement runs in a fresh interpreter so that nothing is cached in
+sys.modules. The benchmark reports the import time of the GUI module, the time
+until the main window has been drawn (when a display is available) and which
+heavy modules were imported along the way.
+
+Usage:
+    python -m benchmarks.startup [--repeats 5] [--output startup.json]
+                                 [--max-import-seconds 0.5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported before the user processes a file
+HEAVY_MODULES = ["pandas", "numpy", "matplotlib", "scipy", "xlrd", "openpyxl"]
+
+_IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy_modules": heavy}}))
+"""
+
+_PAINT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import tkinter as tk
+from rheology_gui import RheologyGUI
+root = tk.Tk()
+app = RheologyGUI(root)
+root.update()
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+root.destroy()
+print(json.dumps({{"seconds": elapsed, "heavy_modules": heavy}}))
+"""
+
+
+def _run_snippet(snippet):
+    """Runs a snippet in a fresh interpreter from the repository root and returns its JSON output."""
+    completed = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _summarise(samples):
+    """Reduces repeated measurements to min/median/max seconds."""
+    seconds = [s["seconds"] for s in samples]
+    return {
+        "min_s": min(seconds),
+        "median_s": statistics.median(seconds),
+        "max_s": max(seconds),
+        "heavy_modules": sorted({name for s in samples for name in s["heavy_modules"]})
+    }
+
+
+def has_display():
+    """Returns True if a Tk window can be created in this session."""
+    if sys.platform in ("win32", "darwin"):
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def measure_startup(repeats=5, modules=("main", "rheology_gui", "processor")):
+    """
+    Measures import times and, if possible, the time to the first painted window.
+
+    Parameters:
+    repeats (int): Number of fresh interpreters per measurement.
+    modules (iterable of str): Modules whose import time is measured.
+
+    Returns:
+    dict: Results keyed by measurement name.
+    """
+    results = {}
+
+    for module in modules:
+        snippet = _IMPORT_SNIPPET.format(module=module, heavy=HEAVY_MODULES)
+        results[f"import {module}"] = _summarise([_run_snippet(snippet) for _ in range(repeats)])
+
+    if has_display():
+        snippet = _PAINT_SNIPPET.format(heavy=HEAVY_MODULES)
+        results["first paint"] = _summarise([_run_snippet(snippet) for _ in range(repeats)])
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure application start-up time.")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--max-import-seconds", type=float,
+                        help="Fail if the median import time of any module exceeds this value")
+    args = parser.parse_args(argv)
+
+    results = measure_startup(repeats=args.repeats)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    # Importing the GUI or the processor must not pull in the heavy modules
+    failures = [f"{name} imported {', '.join(r['heavy_modules'])}"
+                for name, r in results.items() if name.startswith("import") and r["heavy_modules"]]
+
+    if args.max_import_seconds is not None:
+        failures += [f"{name} took {r['median_s']:.3f} s (limit {args.max_import_seconds:.3f} s)"
+                     for name, r in results.items()
+                     if name.startswith("import") and r["median_s"] > args.max_import_seconds]
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
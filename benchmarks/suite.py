@@ -0,0 +1,216 @@
+"""
+Benchmark suite for the data pipeline.
+
+Times the main stages of a batch on synthetic TRIOS exports:
+
+- load: load_viscosity_stress_data and load_thixotropy_data for every file
+- metrics: DataProcessor.calculate_thixotropy_metrics for every file
+- derivative: plot_diff_viscosity_data for every file (derivative and its plot)
+- plot export: comparison plots of all viscosity and thixotropy data
+- results export: export_thixotropy_results_multiple to CSV and Excel
+
+Results are written as JSON so that two versions can be compared with
+``--compare``.
+
+Usage:
+    python -m benchmarks.suite [--batch-sizes 5 50] [--size small] [--format xls xlsx]
+                               [--repeats 3] [--output results.json]
+                               [--compare previous.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Plots are written to files only; never open a window
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import SIZES, FORMATS, generate_dataset  # noqa: E402
+
+STAGES = ["load", "metrics", "derivative", "plot export", "results export"]
+
+
+def _time(function, repeats):
+    """Runs function `repeats` times and returns the timings in seconds and the last result."""
+    timings = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def run_scenario(file_paths, output_directory, repeats=3):
+    """
+    Times every stage on a batch of files.
+
+    Parameters:
+    file_paths (list of str): Synthetic exports to process.
+    output_directory (str): Directory for plots and exported results.
+    repeats (int): Number of timed runs per stage.
+
+    Returns:
+    dict: Stage name mapped to its timing summary.
+    """
+    from data_import import load_viscosity_stress_data, load_thixotropy_data
+    from plotting import plot_viscosity_data, plot_diff_viscosity_data, plot_thixotropy_data
+    from processor import DataProcessor
+
+    processor = DataProcessor(output_directory)
+    names = [os.path.splitext(os.path.basename(path))[0] for path in file_paths]
+
+    def load():
+        return ([load_viscosity_stress_data(path) for path in file_paths],
+                [load_thixotropy_data(path) for path in file_paths])
+
+    timings = {}
+    timings["load"], (viscosity_dfs, thixotropy_dfs) = _time(load, repeats)
+
+    timings["metrics"], results = _time(
+        lambda: {name: processor.calculate_thixotropy_metrics(df) for name, df in zip(names, thixotropy_dfs)},
+        repeats
+    )
+
+    timings["derivative"], _ = _time(
+        lambda: [plot_diff_viscosity_data(df, f"{name}-diff.png", output_directory, ["FORWARD", "REVERSE"], [name])
+                 for name, df in zip(names, viscosity_dfs)],
+        repeats
+    )
+
+    def plot_export():
+        plot_viscosity_data(viscosity_dfs, "comparison-BOTH.png", output_directory,
+                            ["FORWARD", "REVERSE"], names)
+        plot_thixotropy_data(thixotropy_dfs, "comparison", output_directory, names)
+
+    timings["plot export"], _ = _time(plot_export, repeats)
+
+    def results_export():
+        processor.export_thixotropy_results_multiple(results, os.path.join(output_directory, "results.csv"), "csv")
+        processor.export_thixotropy_results_multiple(results, os.path.join(output_directory, "results.xlsx"), "excel")
+
+    timings["results export"], _ = _time(results_export, repeats)
+
+    return {
+        stage: {
+            "median_s": statistics.median(values),
+            "min_s": min(values),
+            "max_s": max(values),
+            "per_file_s": statistics.median(values) / len(file_paths),
+            "runs": values
+        }
+        for stage, values in timings.items()
+    }
+
+
+def _git_commit():
+    """Returns the current git commit of the repository, or None outside a checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metadata(args):
+    """Describes the environment so that results from different machines are not mixed up."""
+    import matplotlib
+    import numpy
+    import pandas
+
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "matplotlib": matplotlib.__version__,
+        "size": args.size,
+        "format": args.format,
+        "repeats": args.repeats,
+    }
+
+
+def run_suite(batch_sizes, size="small", file_formats=("xls", "xlsx"), repeats=3, work_directory=None):
+    """
+    Runs every scenario and returns the results keyed by scenario name.
+
+    The synthetic files are generated once per format for the largest batch;
+    smaller batches use the first files of the same set.
+    """
+    if isinstance(file_formats, str):
+        file_formats = [file_formats]
+
+    with tempfile.TemporaryDirectory(dir=work_directory) as tmp:
+        scenarios = {}
+        for file_format in file_formats:
+            paths = generate_dataset(os.path.join(tmp, f"data-{file_format}"), max(batch_sizes), size, file_format)
+            for n_files in sorted(batch_sizes):
+                name = f"{n_files} files ({size}, {file_format})"
+                print(f"Running {name}...", file=sys.stderr)
+                scenarios[name] = run_scenario(paths[:n_files],
+                                               os.path.join(tmp, f"out-{file_format}-{n_files}"), repeats)
+
+    return scenarios
+
+
+def compare(current, previous):
+    """
+    Builds a text table comparing the median stage times of two result files.
+
+    Returns:
+    str: One line per scenario and stage with both medians and their ratio.
+    """
+    lines = [f"{'Scenario':<32} {'Stage':<16} {'Previous (s)':>12} {'Current (s)':>12} {'Ratio':>7}"]
+    for scenario, stages in current["scenarios"].items():
+        old_stages = previous["scenarios"].get(scenario, {})
+        for stage, summary in stages.items():
+            if stage not in old_stages:
+                continue
+            old, new = old_stages[stage]["median_s"], summary["median_s"]
+            ratio = new / old if old else float("inf")
+            lines.append(f"{scenario:<32} {stage:<16} {old:>12.4f} {new:>12.4f} {ratio:>7.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rheology data pipeline.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[5, 50], help="Files per batch")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small", help="Points per step preset")
+    parser.add_argument("--format", choices=FORMATS, nargs="+", default=["xls", "xlsx"],
+                        help="Export formats of the synthetic files (.xls is read by xlrd, .xlsx by openpyxl)")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    results = {
+        "metadata": _metadata(args),
+        "scenarios": run_suite(args.batch_sizes, args.size, args.format, args.repeats)
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(results, json.load(f)))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Synthetic TRIOS workbook generator.
+
+Writes exports with the same layout as the TRIOS software: one sheet (or text
+section) per step named "Flow sweep - 1/2" and "Peak hold - 1/2/3", with the
+step name in the first row, the column names in the second row and the units
+in the third row. The flow curves follow a Herschel-Bulkley law with a small
+hysteresis between the sweeps, and the peak holds follow a structural
+breakdown/recovery profile sampled every 0.1 s.
+
+Usage:
+    python -m benchmarks.synthetic OUTPUT_DIR [--files 10] [--size small|large]
+                                              [--format xlsx|txt|csv|xls]
+"""
+import argparse
+import os
+
+import numpy as np
+
+# Points per step for each preset size
+SIZES = {
+    "small": {"sweep_points": 30, "hold_points": (300, 300, 600)},
+    "medium": {"sweep_points": 100, "hold_points": (1200, 1200, 3000)},
+    "large": {"sweep_points": 300, "hold_points": (3000, 3000, 12000)},
+}
+
+FORMATS = ("xlsx", "txt", "csv", "xls")
+
+FLOW_SWEEP_COLUMNS = ["Stress", "Shear rate", "Viscosity", "Step time", "Temperature", "Normal stress"]
+FLOW_SWEEP_UNITS = ["Pa", "1/s", "Pa.s", "s", "°C", "Pa"]
+
+PEAK_HOLD_COLUMNS = ["Step time", "Stress", "Shear rate", "Viscosity", "Temperature"]
+PEAK_HOLD_UNITS = ["s", "Pa", "1/s", "Pa.s", "°C"]
+
+# Sampling interval of the peak holds, matching the Time column of load_thixotropy_data
+HOLD_INTERVAL = 0.1
+
+
+def _flow_sweep(rng, n_points, yield_stress, consistency, flow_index, reverse=False):
+    """Returns the rows of a flow sweep following a Herschel-Bulkley law."""
+    shear_rate = np.logspace(-2, 3, n_points)
+    if reverse:
+        shear_rate = shear_rate[::-1]
+        # The structure broken down by the forward sweep lowers the stress
+        yield_stress = yield_stress * 0.8
+
+    stress = yield_stress + consistency * shear_rate ** flow_index
+    stress *= 1 + rng.normal(0, 0.02, n_points)
+    viscosity = stress / shear_rate
+    step_time = np.cumsum(np.full(n_points, 5.0))
+    temperature = 25 + rng.normal(0, 0.05, n_points)
+    normal_stress = rng.normal(0, 1.0, n_points)
+
+    return np.column_stack([stress, shear_rate, viscosity, step_time, temperature, normal_stress])
+
+
+def _peak_hold(rng, n_points, shear_rate, start_viscosity, end_viscosity, time_constant):
+    """Returns the rows of a peak hold relaxing exponentially between two viscosities."""
+    step_time = np.arange(1, n_points + 1) * HOLD_INTERVAL
+    viscosity = end_viscosity + (start_viscosity - end_viscosity) * np.exp(-step_time / time_constant)
+    viscosity *= 1 + rng.normal(0, 0.01, n_points)
+    rate = np.full(n_points, shear_rate)
+    stress = viscosity * rate
+    temperature = 25 + rng.normal(0, 0.05, n_points)
+
+    return np.column_stack([step_time, stress, rate, viscosity, temperature])
+
+
+def make_steps(size="small", seed=None):
+    """
+    Builds the step tables of one synthetic sample.
+
+    Parameters:
+    size (str or dict): Preset name from SIZES or a dict with "sweep_points"
+                        and "hold_points" (three values).
+    seed (int): Seed of the random generator, for reproducible samples.
+
+    Returns:
+    dict: Step name mapped to (column names, units, 2D array of rows).
+    """
+    spec = SIZES[size] if isinstance(size, str) else size
+    rng = np.random.default_rng(seed)
+
+    # Sample-to-sample variation of the material parameters
+    yield_stress = rng.uniform(5, 50)
+    consistency = rng.uniform(0.5, 5)
+    flow_index = rng.uniform(0.3, 0.7)
+    rest_viscosity = rng.uniform(20, 200)
+    sheared_viscosity = rest_viscosity * rng.uniform(0.02, 0.1)
+    recovered_viscosity = rest_viscosity * rng.uniform(0.7, 0.95)
+
+    sweep_points = spec["sweep_points"]
+    preshear_points, highshear_points, recovery_points = spec["hold_points"]
+
+    return {
+        "Flow sweep - 1": (FLOW_SWEEP_COLUMNS, FLOW_SWEEP_UNITS,
+                           _flow_sweep(rng, sweep_points, yield_stress, consistency, flow_index)),
+        "Flow sweep - 2": (FLOW_SWEEP_COLUMNS, FLOW_SWEEP_UNITS,
+                           _flow_sweep(rng, sweep_points, yield_stress, consistency, flow_index, reverse=True)),
+        "Peak hold - 1": (PEAK_HOLD_COLUMNS, PEAK_HOLD_UNITS,
+                          _peak_hold(rng, preshear_points, 0.1, rest_viscosity * 1.1, rest_viscosity, 5.0)),
+        "Peak hold - 2": (PEAK_HOLD_COLUMNS, PEAK_HOLD_UNITS,
+                          _peak_hold(rng, highshear_points, 500.0, rest_viscosity, sheared_viscosity, 2.0)),
+        "Peak hold - 3": (PEAK_HOLD_COLUMNS, PEAK_HOLD_UNITS,
+                          _peak_hold(rng, recovery_points, 0.1, sheared_viscosity, recovered_viscosity,
+                                     rng.uniform(10, 60))),
+    }
+
+
+def _write_xlsx(path, steps):
+    """Writes the steps as an .xlsx workbook using openpyxl's write-only mode."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for name, (columns, units, rows) in steps.items():
+        sheet = workbook.create_sheet(title=name)
+        sheet.append([name])
+        sheet.append(columns)
+        sheet.append(units)
+        for row in rows.tolist():
+            sheet.append(row)
+    workbook.save(path)
+
+
+def _write_xls(path, steps):
+    """Writes the steps as a legacy .xls workbook with xlwt, so that the xlrd load path can be benchmarked."""
+    import xlwt
+
+    workbook = xlwt.Workbook()
+    for name, (columns, units, rows) in steps.items():
+        sheet = workbook.add_sheet(name)
+        sheet.write(0, 0, name)
+        for j, (column, unit) in enumerate(zip(columns, units)):
+            sheet.write(1, j, column)
+            sheet.write(2, j, unit)
+        for i, row in enumerate(rows.tolist(), start=3):
+            for j, value in enumerate(row):
+                sheet.write(i, j, value)
+    workbook.save(path)
+
+
+def _write_text(path, steps, separator):
+    """Writes the steps as a TRIOS text export with one [step] section per step."""
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(f"Filename{separator}{os.path.basename(path)}\n\n")
+        for name, (columns, units, rows) in steps.items():
+            f.write("[step]\n")
+            f.write(f"{name}\n")
+            f.write(separator.join(columns) + "\n")
+            f.write(separator.join(units) + "\n")
+            np.savetxt(f, rows, delimiter=separator, fmt="%.10g")
+            f.write("\n")
+
+
+def write_trios_workbook(path, size="small", seed=None):
+    """
+    Writes one synthetic TRIOS export. The format follows the file extension.
+
+    Parameters:
+    path (str): Output path ending in .xlsx, .xls, .txt or .csv.
+    size (str or dict): Preset name from SIZES or a custom size dict.
+    seed (int): Seed of the random generator.
+
+    Returns:
+    str: The path that was written.
+    """
+    steps = make_steps(size, seed)
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".xlsx":
+        _write_xlsx(path, steps)
+    elif extension == ".xls":
+        _write_xls(path, steps)
+    elif extension == ".txt":
+        _write_text(path, steps, "\t")
+    elif extension == ".csv":
+        _write_text(path, steps, ",")
+    else:
+        raise ValueError(f"Unsupported synthetic export format: '{extension}'")
+
+    return path
+
+
+def generate_dataset(directory, n_files, size="small", file_format="xlsx", seed=0, prefix="Sample"):
+    """
+    Writes a batch of synthetic exports named like the operators' files.
+
+    Files are named "<prefix><group>_<replicate>" so that the sample name
+    derived by the processor (text before the first '-' or '_') groups them
+    in sets of three replicates.
+
+    Parameters:
+    directory (str): Output directory, created if needed.
+    n_files (int): Number of files to write.
+    size (str or dict): Preset name from SIZES or a custom size dict.
+    file_format (str): One of FORMATS.
+    seed (int): Base seed; file i uses seed + i.
+    prefix (str): Sample name prefix.
+
+    Returns:
+    list of str: Paths of the written files.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported synthetic export format: '{file_format}'")
+
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(n_files):
+        name = f"{prefix}{i // 3 + 1:04d}_{i % 3 + 1}.{file_format}"
+        paths.append(write_trios_workbook(os.path.join(directory, name), size, seed + i))
+
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic TRIOS exports.")
+    parser.add_argument("directory", help="Output directory")
+    parser.add_argument("--files", type=int, default=10, help="Number of files to write")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small", help="Points per step preset")
+    parser.add_argument("--format", choices=FORMATS, default="xlsx", help="Export format")
+    parser.add_argument("--seed", type=int, default=0, help="Base random seed")
+    args = parser.parse_args(argv)
+
+    paths = generate_dataset(args.directory, args.files, args.size, args.format, args.seed)
+    print(f"Wrote {len(paths)} files to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
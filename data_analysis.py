@@ -1,6 +1,15 @@
-import pandas as pd
+from lazy_imports import lazy_import
 from data_import import load_thixotropy_data
 
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+# Recovery levels reported by default, in percent of the preshear viscosity
+RECOVERY_THRESHOLDS = (50, 63, 80, 90, 95)
+
+# Shear rates (1/s) of the usual "viscosity at 1, 10 and 100 1/s" QC specs
+QC_SHEAR_RATES = (1, 10, 100)
+
 
 def calculate_viscosity_ratio(df):
     """Computes the viscosity recovery ratio (percentage)."""
@@ -29,30 +38,353 @@ def calculate_thixotropic_index(df):
 
     return thixotropic_index
 
+def stack_curves(curves):
+    """
+    Stacks curves of different lengths into one NaN-padded 2D float array.
+
+    Parameters:
+    curves (list of array-like): One 1D array per sample.
+
+    Returns:
+    np.ndarray: Array of shape (samples, longest curve), padded with NaN.
+    """
+    arrays = [np.asarray(curve, dtype=float) for curve in curves]
+    stacked = np.full((len(arrays), max((len(a) for a in arrays), default=0)), np.nan)
+    for i, array in enumerate(arrays):
+        stacked[i, :len(array)] = array
+    return stacked
+
+
+def recovery_crossing_times(step_time, viscosity, targets):
+    """
+    Finds when recovering viscosity curves first reach a set of target viscosities.
+
+    All samples and targets are handled in one vectorized pass. For each target
+    the first point at or above it is located and the crossing time is linearly
+    interpolated between that point and the one before it.
+
+    Parameters:
+    step_time (array-like): Times of the curve, 1D for one sample or 2D
+                            (samples x points, NaN-padded) for a batch.
+    viscosity (array-like): Viscosities, same shape as step_time.
+    targets (array-like): Target viscosities, 1D (targets) for one sample or
+                          2D (samples x targets) for a batch.
+
+    Returns:
+    np.ndarray: Crossing times, 1D (targets) or 2D (samples x targets). NaN
+                where a target is never reached.
+    """
+    single = np.ndim(viscosity) == 1
+    time = np.atleast_2d(np.asarray(step_time, dtype=float))
+    visc = np.atleast_2d(np.asarray(viscosity, dtype=float))
+    targets = np.atleast_2d(np.asarray(targets, dtype=float))
+
+    # reached[s, k, i]: point i of sample s is at or above target k (NaN never is)
+    reached = visc[:, None, :] >= targets[:, :, None]
+    found = reached.any(axis=2)
+    upper = reached.argmax(axis=2)
+    lower = np.maximum(upper - 1, 0)
+
+    rows = np.arange(visc.shape[0])[:, None]
+    t0, t1 = time[rows, lower], time[rows, upper]
+    v0, v1 = visc[rows, lower], visc[rows, upper]
+
+    # Linear interpolation between the last point below and the first point above
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = (targets - v0) / (v1 - v0)
+    fraction = np.where((upper > 0) & np.isfinite(fraction), np.clip(fraction, 0, 1), 1.0)
+
+    times = np.where(found, t0 + fraction * (t1 - t0), np.nan)
+
+    return times[0] if single else times
+
+
+def interpolate_curves(x, y, grid):
+    """
+    Linearly interpolates many curves onto a common grid in one vectorized pass.
+
+    The points of every curve are sorted by x, and the grid positions are found
+    for all curves at once by a stable sort of the curve and grid values along
+    each row. Grid values outside the range of a curve give NaN.
+
+    Parameters:
+    x (array-like): x values, 1D for one curve or 2D (curves x points, NaN-padded).
+                    Curves may be in any order (e.g. a decreasing REVERSE sweep).
+    y (array-like): y values, same shape as x.
+    grid (array-like): 1D grid to interpolate onto.
+
+    Returns:
+    np.ndarray: Interpolated values, 1D (grid) or 2D (curves x grid).
+    """
+    single = np.ndim(x) == 1
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    grid = np.asarray(grid, dtype=float)
+    n_curves, n_points = x.shape
+
+    # Missing points sort to the end of their row
+    valid = np.isfinite(x) & np.isfinite(y)
+    x = np.where(valid, x, np.inf)
+    order = np.argsort(x, axis=1, kind="stable")
+    x = np.take_along_axis(x, order, axis=1)
+    y = np.take_along_axis(y, order, axis=1)
+    n_valid = valid.sum(axis=1)
+
+    # Position of each grid value among the curve's points: after a stable sort
+    # of [curve, grid], a grid value is preceded by the points <= it
+    merged = np.concatenate([x, np.broadcast_to(grid, (n_curves, len(grid)))], axis=1)
+    rank = np.argsort(np.argsort(merged, axis=1, kind="stable"), axis=1, kind="stable")
+    upper = rank[:, n_points:] - np.arange(len(grid))
+
+    lower = np.clip(upper - 1, 0, np.maximum(n_valid - 2, 0)[:, None])
+    upper = lower + 1 if n_points > 1 else lower
+    rows = np.arange(n_curves)[:, None]
+    x0, x1 = x[rows, lower], x[rows, upper]
+    y0, y1 = y[rows, lower], y[rows, upper]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(x1 > x0, (grid - x0) / (x1 - x0), 0.0)
+    values = y0 + fraction * (y1 - y0)
+
+    # Only inside the range covered by the curve
+    last = x[np.arange(n_curves), np.maximum(n_valid - 1, 0)][:, None]
+    inside = (n_valid[:, None] > 0) & (grid >= x[:, :1]) & (grid <= last)
+    values = np.where(inside, values, np.nan)
+
+    return values[0] if single else values
+
+
+def viscosity_at_shear_rates(shear_rate, viscosity, targets):
+    """
+    Interpolates flow curves at given shear rates, in log-log space.
+
+    Flow curves are close to straight lines in log-log coordinates, so the
+    logarithm of the viscosity is interpolated linearly in the logarithm of
+    the shear rate. All curves are handled in one vectorized pass (see
+    interpolate_curves); there is no extrapolation.
+
+    Parameters:
+    shear_rate (array-like): Shear rates, 1D for one curve or 2D (curves x points, NaN-padded).
+    viscosity (array-like): Viscosities, same shape as shear_rate.
+    targets (array-like): Shear rates to evaluate.
+
+    Returns:
+    np.ndarray: Viscosities, 1D (targets) or 2D (curves x targets). NaN for shear rates
+                outside the measured range and for non-positive points.
+    """
+    shear_rate = np.asarray(shear_rate, dtype=float)
+    viscosity = np.asarray(viscosity, dtype=float)
+    targets = np.asarray(targets, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_rate = np.log(np.where(shear_rate > 0, shear_rate, np.nan))
+        log_viscosity = np.log(np.where(viscosity > 0, viscosity, np.nan))
+        log_targets = np.log(np.where(targets > 0, targets, np.nan))
+        return np.exp(interpolate_curves(log_rate, log_viscosity, log_targets))
+
+
+def viscosity_at_shear_rates_batch(curves, targets):
+    """
+    Interpolates many flow curves of different lengths at given shear rates.
+
+    Parameters:
+    curves (list of tuple): (shear rate, viscosity) arrays of every curve.
+    targets (array-like): Shear rates to evaluate.
+
+    Returns:
+    np.ndarray: Viscosities of shape (curves, targets), see viscosity_at_shear_rates.
+    """
+    if not curves:
+        return np.empty((0, len(targets)))
+    shear_rate = stack_curves([curve[0] for curve in curves])
+    viscosity = stack_curves([curve[1] for curve in curves])
+    return np.atleast_2d(viscosity_at_shear_rates(shear_rate, viscosity, targets))
+
+
+def flow_curve(sample, sweep, column="Viscosity"):
+    """
+    Returns the numeric shear rate and viscosity (or stress) arrays of one sweep.
+
+    Parameters:
+    sample (pd.DataFrame or RheologySample): Viscosity data with a 'Sweep' column,
+                                             or a compact sample (see sample.py).
+    sweep (str): "FORWARD" or "REVERSE".
+    column (str): Column returned with the shear rate, e.g. "Stress".
+
+    Returns:
+    tuple: (shear rate, values) arrays, empty if the sweep is missing.
+    """
+    if hasattr(sample, "segment"):
+        if sweep not in sample.labels:
+            return np.empty(0), np.empty(0)
+        points = sample.segment(sweep)
+        return points["Shear rate"], points[column]
+
+    selected = sample[sample["Sweep"] == sweep]
+    return (pd.to_numeric(selected["Shear rate"], errors='coerce').to_numpy(dtype=float),
+            pd.to_numeric(selected[column], errors='coerce').to_numpy(dtype=float))
+
+
+def viscosity_at_shear_rates_table(samples, shear_rates=QC_SHEAR_RATES, sweeps=("FORWARD", "REVERSE")):
+    """
+    Builds the sample x shear rate viscosity table of many samples.
+
+    Parameters:
+    samples (dict): Sample names mapped to viscosity DataFrames or RheologySample objects.
+    shear_rates (iterable of float): Shear rates to evaluate, in 1/s.
+    sweeps (iterable of str): Sweeps to evaluate separately.
+
+    Returns:
+    pd.DataFrame: Indexed by sample, with one "<sweep> Viscosity at <rate> 1/s (Pa.s)"
+                  column per sweep and shear rate.
+    """
+    shear_rates = np.asarray(shear_rates, dtype=float)
+    columns = {}
+    for sweep in sweeps:
+        values = viscosity_at_shear_rates_batch([flow_curve(sample, sweep) for sample in samples.values()],
+                                                shear_rates)
+        for rate, column in zip(shear_rates, values.T):
+            columns[f"{sweep} Viscosity at {rate:g} 1/s (Pa.s)"] = column
+
+    return pd.DataFrame(columns, index=pd.Index(list(samples), name="Sample"))
+
+
+def extract_recovery_curve(df):
+    """Returns the last preshear viscosity and the numeric recovery time and viscosity arrays."""
+    eta_preshear = float(df[df["peak"] == "PRESHEAR"]["Viscosity"].iloc[-1])
+
+    recovery_df = df[df["peak"] == "RECOVERY"]
+    step_time = pd.to_numeric(recovery_df["Step time"], errors='coerce').to_numpy(dtype=float)
+    viscosity = pd.to_numeric(recovery_df["Viscosity"], errors='coerce').to_numpy(dtype=float)
+
+    return eta_preshear, step_time, viscosity
+
+
+def calculate_recovery_times(df, thresholds=RECOVERY_THRESHOLDS):
+    """
+    Computes the recovery times for several recovery levels.
+
+    Parameters:
+    df (pd.DataFrame): Thixotropy data with labeled peaks.
+    thresholds (iterable of float): Recovery levels in percent of the preshear viscosity.
+
+    Returns:
+    dict: Threshold mapped to the first time (interpolated "Step time") at which
+          the recovery viscosity reaches it, NaN if it is never reached.
+    """
+    thresholds = np.asarray(thresholds, dtype=float)
+    eta_preshear, step_time, viscosity = extract_recovery_curve(df)
+
+    times = recovery_crossing_times(step_time, viscosity, eta_preshear * thresholds / 100)
+
+    return dict(zip(thresholds.tolist(), times.tolist()))
+
+
+def calculate_recovery_times_batch(dfs, thresholds=RECOVERY_THRESHOLDS):
+    """
+    Computes the recovery times of many samples in one vectorized pass.
+
+    Parameters:
+    dfs (list of pd.DataFrame): Thixotropy data of each sample.
+    thresholds (iterable of float): Recovery levels in percent of the preshear viscosity.
+
+    Returns:
+    np.ndarray: Recovery times of shape (samples, thresholds), NaN where not reached.
+    """
+    thresholds = np.asarray(thresholds, dtype=float)
+    curves = [extract_recovery_curve(df) for df in dfs]
+
+    eta_preshear = np.array([curve[0] for curve in curves])
+    step_time = stack_curves([curve[1] for curve in curves])
+    viscosity = stack_curves([curve[2] for curve in curves])
+
+    return recovery_crossing_times(step_time, viscosity, eta_preshear[:, None] * thresholds / 100)
+
+
+def recovery_time_column(threshold):
+    """Name of the exported first crossing time of a recovery level, e.g. "80% Recovery Crossing Time (s)"."""
+    return f"{threshold:g}% Recovery Crossing Time (s)"
+
+
 def calculate_80_percent_viscosity_recovery(df):
+    """
+    Computes the time of the recovery point closest to 80% of the preshear viscosity.
+
+    This is the exported "80% Recovery Time (s)" metric. It is kept as it
+    always was, so the closest point may come before the recovery really
+    reaches 80%, and a time is returned even if it never does. The
+    interpolated first crossing is calculate_recovery_times, exported as
+    "80% Recovery Crossing Time (s)".
+    """
+    eta_preshear, step_time, viscosity = extract_recovery_curve(df)
+    valid = np.isfinite(viscosity)
+    distance = np.abs(viscosity[valid] - eta_preshear * 0.8)
+    return step_time[valid][np.argmin(distance)]
+
+
+def calculate_cycle_metrics(df, thresholds=RECOVERY_THRESHOLDS):
+    """
+    Computes the thixotropy metrics of every cycle of a multi-step peak-hold protocol.
+
+    Each cycle (a HIGHSHEAR step and the RECOVERY step after it) is compared
+    with the PRESHEAR step. The metrics are computed for all cycles at once
+    from the last viscosity of every step and, for the recovery times, from
+    the stacked recovery curves.
+
+    Parameters:
+    df (pd.DataFrame): Output of load_peak_hold_steps ('Step', 'Cycle' and 'peak' columns).
+    thresholds (iterable of float): Recovery levels in percent of the preshear viscosity.
+
+    Returns:
+    pd.DataFrame: One row per complete cycle (indexed by 'Cycle') with the viscosity
+                  ratio, thixotropic index, structural recovery and recovery times.
 
-    preshear_df = df[df["peak"] == "PRESHEAR"]
-    recovery_df = df[df["peak"] == "RECOVERY"].copy()  # Create an explicit copy
+    Raises:
+    ValueError: If the protocol has no PRESHEAR step or no complete cycle
+                (e.g. fewer than three peak-hold steps).
+    """
+    viscosity = pd.to_numeric(df["Viscosity"], errors='coerce')
+    step_time = pd.to_numeric(df["Step time"], errors='coerce')
 
-    eta_preshear = preshear_df["Viscosity"].iloc[-1]
-    eta_recovery_80_percent = eta_preshear * 0.8
+    # Last viscosity, phase and cycle of every step
+    steps = pd.DataFrame({
+        "eta": viscosity.groupby(df["Step"]).last(),
+        "peak": df.groupby("Step")["peak"].first(),
+        "Cycle": df.groupby("Step")["Cycle"].first()
+    })
 
-    # Ensure Viscosity column is numeric
-    recovery_df["Viscosity"] = pd.to_numeric(recovery_df["Viscosity"], errors='coerce')
+    eta_highshear = steps[steps["peak"] == "HIGHSHEAR"].set_index("Cycle")["eta"]
+    recovery_steps = steps[steps["peak"] == "RECOVERY"].reset_index().set_index("Cycle")
+    eta_recovery = recovery_steps["eta"]
 
-    # Filter out any NaN values that might have been created
-    recovery_df = recovery_df.dropna(subset=["Viscosity"])
+    # Only cycles with both a high shear and a recovery step
+    cycles = eta_recovery.index.intersection(eta_highshear.index)
+    if not (steps["peak"] == "PRESHEAR").any() or len(cycles) == 0:
+        raise ValueError(f"Error: The peak-hold protocol has no complete cycle (a PRESHEAR step, then a "
+                         f"HIGHSHEAR and a RECOVERY step); found {len(steps)} step(s)")
+    eta_preshear = steps.loc[steps["peak"] == "PRESHEAR", "eta"].iloc[0]
+    eta_h = eta_highshear.loc[cycles].to_numpy(dtype=float)
+    eta_r = eta_recovery.loc[cycles].to_numpy(dtype=float)
 
-    # Find the closest viscosity value to 80% recovery
-    recovery_df["viscosity_diff"] = abs(recovery_df["Viscosity"] - eta_recovery_80_percent)
+    metrics = pd.DataFrame({
+        "Viscosity Ratio (%)": eta_r / eta_preshear * 100,
+        "Thixotropic Index": eta_preshear / eta_h,
+        "Structural Recovery (%)": (eta_r - eta_h) / (eta_preshear - eta_h) * 100
+    }, index=pd.Index(cycles, name="Cycle"))
 
-    # Find the index of the minimum difference
-    closest_match_idx = recovery_df["viscosity_diff"].idxmin()
+    # Recovery times of all cycles in one pass
+    thresholds = np.asarray(thresholds, dtype=float)
+    recovery_step_numbers = recovery_steps.loc[cycles, "Step"]
+    times = recovery_crossing_times(
+        stack_curves([step_time[df["Step"] == step] for step in recovery_step_numbers]),
+        stack_curves([viscosity[df["Step"] == step] for step in recovery_step_numbers]),
+        np.tile(eta_preshear * thresholds / 100, (len(cycles), 1))
+    )
+    for threshold, column in zip(thresholds, np.atleast_2d(times).T):
+        metrics[recovery_time_column(threshold)] = column
 
-    # Get the time corresponding to the closest viscosity value
-    recovery_time_80_percent = recovery_df.loc[closest_match_idx, "Step time"]
+    return metrics
 
-    return recovery_time_80_percent
 
 def analyze_thixotropy(filepath):
     """Loads data and computes all thixotropy metrics."""
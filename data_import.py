@@ -1,17 +1,215 @@
-import pandas as pd
-import numpy as np
+import os
+import io
+import re
+import hashlib
+
+from lazy_imports import lazy_import
+
+# pandas/numpy are only imported when a file is actually loaded
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+# Export formats understood by the loaders. TRIOS writes legacy Excel (.xls),
+# Excel 2007+ (.xlsx) and tab or comma separated text (.txt/.csv).
+SUPPORTED_EXTENSIONS = (".xls", ".xlsx", ".txt", ".csv")
+
+# pandas engine used for each Excel flavour. openpyxl opens .xlsx workbooks in
+# read-only (streaming) mode when used through pandas.
+_EXCEL_ENGINES = {"xls": "xlrd", "xlsx": "openpyxl"}
+
+# Marker line that starts every step section in a TRIOS text export
+_TEXT_STEP_MARKER = "[step]"
+
+# Steps holding the forward and reverse flow sweeps
+VISCOSITY_SHEETS = ["Flow sweep - 1", "Flow sweep - 2"]
+
+# Steps holding the preshear, high shear and recovery peak holds
+THIXOTROPY_SHEETS = ["Peak hold - 1", "Peak hold - 2", "Peak hold - 3"]
+
+# Any peak hold step of a multi-cycle protocol, e.g. "Peak hold - 7"
+_PEAK_HOLD_PATTERN = re.compile(r"^Peak hold - (\d+)$")
+
+
+def is_supported_file(filename):
+    """Returns True if the file name has one of the supported export extensions."""
+    return filename.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+def file_digest(filepath, chunk_size=1 << 20):
+    """
+    Returns the SHA-1 hex digest of a file's bytes.
+
+    The digest identifies the content of an export whatever its name or
+    location, e.g. as the key of cached previews.
+
+    Parameters:
+    filepath (str): Path to the file.
+    chunk_size (int): Bytes read at a time.
+
+    Returns:
+    str: The hex digest.
+    """
+    digest = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def detect_file_format(filepath):
+    """
+    Detects the export format of a TRIOS file.
+
+    The file signature is checked first so that a workbook saved with the wrong
+    extension is still read with the right parser. The extension is only used
+    when the signature is not recognised.
+
+    Parameters:
+    filepath (str): Path to the exported file.
+
+    Returns:
+    str: "xls", "xlsx" or "text".
+    """
+    with open(filepath, "rb") as f:
+        signature = f.read(8)
+
+    if signature.startswith(b"\xd0\xcf\x11\xe0"):  # OLE2 compound document
+        return "xls"
+    if signature.startswith(b"PK\x03\x04"):  # Zip container
+        return "xlsx"
+
+    extension = os.path.splitext(filepath)[1].lower()
+    if extension in (".xls", ".xlsx"):
+        return extension[1:]
+    return "text"
+
+
+def _decode_text_export(raw):
+    """Decodes the bytes of a text export, honouring UTF-16 and UTF-8 byte order marks."""
+    if raw.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return raw.decode("utf-16")
+    try:
+        return raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return raw.decode("latin-1")
+
+
+def _split_text_sections(filepath):
+    """
+    Splits a TRIOS text export into its step sections.
+
+    Each section starts with a "[step]" line followed by the step name (e.g.
+    "Flow sweep - 1"), a header row, a units row and the data rows. Sections
+    end at a blank line or at the next "[step]" marker.
+
+    Returns:
+    dict: Step name mapped to the section text (header, units and data rows).
+    """
+    with open(filepath, "rb") as f:
+        lines = _decode_text_export(f.read()).splitlines()
+
+    sections = {}
+    i = 0
+    while i < len(lines):
+        if lines[i].strip().lower() != _TEXT_STEP_MARKER:
+            i += 1
+            continue
+
+        name = lines[i + 1].strip().strip('"') if i + 1 < len(lines) else ""
+        start = i + 2
+        end = start
+        while end < len(lines) and lines[end].strip() and lines[end].strip().lower() != _TEXT_STEP_MARKER:
+            end += 1
+
+        sections[name] = "\n".join(lines[start:end])
+        i = end
+
+    return sections
+
+
+def _read_text_section(section):
+    """Parses one text section with the pandas C parser, skipping the units row."""
+    header = section.split("\n", 1)[0]
+    separator = "\t" if "\t" in header else ","
+    return pd.read_csv(io.StringIO(section), sep=separator, skiprows=[1], engine="c")
+
+
+def _open_export(filepath):
+    """
+    Opens a TRIOS export of any supported format.
+
+    Returns:
+    tuple: (list of sheet names, function that reads one sheet by name into a
+           DataFrame with the units row removed)
+    """
+    file_format = detect_file_format(filepath)
+
+    if file_format == "text":
+        sections = _split_text_sections(filepath)
+
+        def read_sheet(sheet_name):
+            return _read_text_section(sections[sheet_name])
+
+        return list(sections), read_sheet
+
+    xls = pd.ExcelFile(filepath, engine=_EXCEL_ENGINES[file_format])
+
+    def read_sheet(sheet_name):
+        df = pd.read_excel(xls, sheet_name=sheet_name, header=1)
+        # Remove units row; the remaining cells are numeric, as in the text exports
+        return df[1:].reset_index(drop=True).infer_objects()
+
+    return xls.sheet_names, read_sheet
+
+
+def _open_export_checked(filepath):
+    """Opens an export like _open_export, reporting any failure as a ValueError."""
+    try:
+        return _open_export(filepath)
+    except Exception as e:
+        raise ValueError(f"Error: Unable to read the file '{filepath}'. Ensure it is a valid TRIOS export "
+                         f"({', '.join(SUPPORTED_EXTENSIONS)}).\n{e}")
+
+
+def read_trios_sheets(filepath, required_sheets):
+    """
+    Reads the given step sheets from a TRIOS export (.xls, .xlsx, .txt or .csv).
+
+    The format is detected automatically. Every returned DataFrame has the
+    header row as column names and the units row removed, whatever the format.
+
+    Parameters:
+    filepath (str): Path to the exported file.
+    required_sheets (list of str): Names of the sheets (steps) to read.
+
+    Returns:
+    dict: Sheet name mapped to its DataFrame.
+
+    Raises:
+    ValueError: If the file cannot be read or if required sheets are missing.
+    """
+    sheet_names, read_sheet = _open_export_checked(filepath)
+
+    # Check if the required sheets exist
+    missing_sheets = [sheet for sheet in required_sheets if sheet not in sheet_names]
+
+    if missing_sheets:
+        raise ValueError(f"Error: The file '{filepath}' is missing required sheets: {missing_sheets}")
+
+    return {sheet: read_sheet(sheet) for sheet in required_sheets}
+
 
 # Load viscosity data
 def load_viscosity_stress_data(filepath):
     """
-    Reads shear viscosity data from an Excel file.
+    Reads shear viscosity data from a TRIOS export (.xls, .xlsx, .txt or .csv).
 
     This function reads two sheets, 'Flow sweep - 1' and 'Flow sweep - 2',
     verifies their existence, removes the unit row, adds a 'Sweep' column to
     indicate direction, and merges both into a single DataFrame.
 
     Parameters:
-    filepath (str): Path to the Excel file.
+    filepath (str): Path to the exported file.
 
     Returns:
     pd.DataFrame: Merged DataFrame containing both forward and reverse sweeps.
@@ -21,27 +219,28 @@ def load_viscosity_stress_data(filepath):
     ValueError: If the required sheets are missing or if the data format is incorrect.
     """
 
-    # Check if the file is the correct type of file (*.xls)
-    try:
-        xls = pd.ExcelFile(filepath, engine="xlrd")
-    except Exception as e:
-        raise ValueError(f"Error: Unable to read the file '{filepath}'. Ensure it is a valid Excel (.xls) file.\n{e}")
+    # Read the sweeps; the format (.xls, .xlsx or text) is detected from the file
+    sheets = read_trios_sheets(filepath, VISCOSITY_SHEETS)
 
-    # Check if the required sheets exist
-    required_sheets = ["Flow sweep - 1", "Flow sweep - 2"]
-    missing_sheets = [sheet for sheet in required_sheets if sheet not in xls.sheet_names]
+    return merge_viscosity_sheets(sheets)
 
-    if missing_sheets:
-        raise ValueError(f"Error: The file '{filepath}' is missing required sheets: {missing_sheets}")
 
-    # Read and process forward sweep data
-    forward_df = pd.read_excel(xls, sheet_name="Flow sweep - 1", header=1)
-    forward_df = forward_df[1:].reset_index(drop=True)  # Remove units row
+def merge_viscosity_sheets(sheets):
+    """
+    Labels the forward and reverse sweeps and merges them into a single DataFrame.
+
+    Parameters:
+    sheets (dict): Sheets returned by read_trios_sheets for VISCOSITY_SHEETS.
+
+    Returns:
+    pd.DataFrame: Merged DataFrame with a 'Sweep' column.
+    """
+    # Process forward sweep data
+    forward_df = sheets["Flow sweep - 1"]
     forward_df["Sweep"] = "FORWARD"
 
-    # Read and process reverse sweep data
-    reverse_df = pd.read_excel(xls, sheet_name="Flow sweep - 2", header=1)
-    reverse_df = reverse_df[1:].reset_index(drop=True)  # Remove units row
+    # Process reverse sweep data
+    reverse_df = sheets["Flow sweep - 2"]
     reverse_df["Sweep"] = "REVERSE"
 
     # Merge both DataFrames
@@ -53,59 +252,122 @@ def load_viscosity_stress_data(filepath):
 # Load thixotropy data
 def load_thixotropy_data(filepath):
     """
-       Load and process thixotropy data from an Excel (.xls) file.
+       Load and process thixotropy data from a TRIOS export (.xls, .xlsx, .txt or .csv).
 
-       This function reads data from an Excel file containing three required sheets:
+       This function reads data from an export containing three required sheets:
        "Peak hold - 1", "Peak hold - 2", and "Peak hold - 3". It checks for the
        presence of these sheets, extracts the data while removing unit rows,
        labels each dataset accordingly, and merges them into a single DataFrame.
        A total time column is also added.
 
        Parameters:
-       filepath (str): Path to the Excel (.xls) file.
+       filepath (str): Path to the exported file.
 
        Returns:
        pandas.DataFrame: A merged DataFrame containing thixotropy data with
                          labeled peak phases and a calculated time column.
 
        Raises:
-       ValueError: If the file is not a valid Excel (.xls) file or if required
+       ValueError: If the file is not a valid TRIOS export or if required
                    sheets are missing.
        """
 
-    # Check if the file selected is the correct type of file (*.xls)
-    try:
-        xls = pd.ExcelFile(filepath, engine="xlrd")
-    except Exception as e:
-        raise ValueError(f"Error: Unable to read the file '{filepath}'. Ensure it is a valid Excel (.xls) file.\n{e}")
+    # Read the peak holds; the format (.xls, .xlsx or text) is detected from the file
+    sheets = read_trios_sheets(filepath, THIXOTROPY_SHEETS)
 
-    # Check if the required sheets exist
-    required_sheets = ["Peak hold - 1", "Peak hold - 2", "Peak hold - 3"]
-    missing_sheets = [sheet for sheet in required_sheets if sheet not in xls.sheet_names]
+    return merge_thixotropy_sheets(sheets)
 
-    if missing_sheets:
-        raise ValueError(f"Error: The file '{filepath}' is missing required sheets: {missing_sheets}")
 
-    # Read and process Peak hold - 1  data
-    preshear_df = pd.read_excel(xls, sheet_name="Peak hold - 1", header=1)
-    preshear_df = preshear_df[1:].reset_index(drop=True)  # Remove units row
+def merge_thixotropy_sheets(sheets):
+    """
+    Labels the three peak holds, merges them and adds a total time column.
+
+    Parameters:
+    sheets (dict): Sheets returned by read_trios_sheets for THIXOTROPY_SHEETS.
+
+    Returns:
+    pd.DataFrame: Merged DataFrame with a 'peak' and a 'Time' column.
+    """
+    # Process Peak hold - 1  data
+    preshear_df = sheets["Peak hold - 1"]
     preshear_df["peak"] = "PRESHEAR"
 
-    # Read and process Peak hold - 2  data
-    highshear_df = pd.read_excel(xls, sheet_name="Peak hold - 2", header=1)
-    highshear_df = highshear_df[1:].reset_index(drop=True)  # Remove units row
+    # Process Peak hold - 2  data
+    highshear_df = sheets["Peak hold - 2"]
     highshear_df["peak"] = "HIGHSHEAR"
 
-    # Read and process Peak hold - 3  data
-    recovery_df = pd.read_excel(xls, sheet_name="Peak hold - 3", header=1)
-    recovery_df = recovery_df[1:].reset_index(drop=True)  # Remove units row
+    # Process Peak hold - 3  data
+    recovery_df = sheets["Peak hold - 3"]
     recovery_df["peak"] = "RECOVERY"
 
     # Merge both DataFrames
     merged_df = pd.concat([preshear_df, highshear_df, recovery_df], ignore_index=True)
 
     # Add a total time column
-    merged_df['Time'] = np.arange(0, len(merged_df) * 0.1, 0.1)
+    merged_df['Time'] = np.arange(len(merged_df)) * 0.1
+
+    return merged_df
+
+
+def peak_hold_phases(n_steps):
+    """
+    Maps the steps of a peak-hold protocol to phases and cycles.
+
+    Step 1 is the preshear (cycle 0). Every following pair of steps is one
+    cycle: a high shear step and the recovery step after it. The three-step
+    protocol is therefore PRESHEAR, HIGHSHEAR, RECOVERY with one cycle.
+
+    Parameters:
+    n_steps (int): Number of peak-hold steps.
+
+    Returns:
+    tuple: (list of phase labels, list of cycle numbers), one entry per step.
+    """
+    phases = ["PRESHEAR"] + ["HIGHSHEAR" if step % 2 == 0 else "RECOVERY" for step in range(2, n_steps + 1)]
+    cycles = [0] + [step // 2 for step in range(2, n_steps + 1)]
+    return phases, cycles
+
+
+def load_peak_hold_steps(filepath):
+    """
+    Loads every "Peak hold - N" step of a multi-cycle thixotropy protocol.
+
+    The steps are discovered in the export, read in one pass and stacked into
+    one table. Besides the original columns the table has an integer 'Step'
+    column (the N of the sheet), an integer 'Cycle' column, the 'peak' phase
+    label (see peak_hold_phases) and the total 'Time' column used by
+    load_thixotropy_data. For a three-step export the rows, 'peak' labels and
+    'Time' match load_thixotropy_data.
+
+    Parameters:
+    filepath (str): Path to the exported file.
+
+    Returns:
+    pd.DataFrame: All peak-hold steps, ordered by step number.
+
+    Raises:
+    ValueError: If the file cannot be read or has no peak-hold step.
+    """
+    sheet_names, read_sheet = _open_export_checked(filepath)
+
+    # Discover the peak hold steps, ordered by their number
+    steps = sorted((int(match.group(1)), name) for name in sheet_names
+                   for match in [_PEAK_HOLD_PATTERN.match(name)] if match)
+
+    if not steps:
+        raise ValueError(f"Error: The file '{filepath}' has no 'Peak hold - N' sheets")
+
+    frames = [read_sheet(name) for _, name in steps]
+    lengths = [len(frame) for frame in frames]
+    phases, cycles = peak_hold_phases(len(steps))
+
+    merged_df = pd.concat(frames, ignore_index=True)
+    merged_df["peak"] = np.repeat(phases, lengths)
+    merged_df["Step"] = np.repeat([number for number, _ in steps], lengths)
+    merged_df["Cycle"] = np.repeat(cycles, lengths)
+
+    # Add a total time column
+    merged_df['Time'] = np.arange(len(merged_df)) * 0.1
 
     return merged_df
 
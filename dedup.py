@@ -0,0 +1,199 @@
+"""
+Detection of repeated exports of the same run.
+
+Duplicates are found at two levels:
+- raw bytes: copies of the same file under different names. Files are first
+  grouped by size and only files sharing a size are hashed, so these are
+  found without parsing anything.
+- parsed payload: files whose bytes differ but whose loaded data is the same
+  numbers (e.g. the same run exported as .xls and .xlsx, or a re-saved
+  workbook). These are found as the files are loaded, before any metric or
+  plot is computed from them. Formats may round the last bits of a value
+  differently, so values are compared to about nine significant digits.
+"""
+import hashlib
+import os
+
+from lazy_imports import lazy_import
+from data_import import file_digest
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+# Columns of a duplicate report
+REPORT_COLUMNS = ["File", "Duplicate of", "Match"]
+
+# Significant bits of every value kept by payload_digest (about nine decimal digits);
+# .xls and .xlsx exports of one run differ in the last bits of some values
+DIGEST_BITS = 32
+
+# Relative tolerance of two payloads that are the same run (see DuplicateFilter.is_duplicate)
+PAYLOAD_TOLERANCE = 1e-9
+
+# Rows of every numeric column compared by payload_sketch
+SKETCH_POINTS = 64
+
+
+def _quantize(values, bits=DIGEST_BITS):
+    """Rounds float64 values to `bits` significant bits."""
+    mantissa, exponent = np.frexp(values)
+    return np.ldexp(np.round(mantissa * 2.0 ** bits), exponent - bits)
+
+
+def payload_digest(df):
+    """
+    Returns the SHA-1 hex digest of a loaded DataFrame's contents.
+
+    Numeric columns are hashed as float64 rounded to DIGEST_BITS significant
+    bits, so a column read as integers from one format and as floats from
+    another, or with its last bits rounded differently, gives the same digest;
+    NaN and negative zero are normalised. Text columns (e.g. 'Sweep') are
+    hashed by their values. A value right at a rounding step can still round
+    differently in two exports; DuplicateFilter also compares payload_sketch
+    for these.
+
+    Parameters:
+    df (pd.DataFrame): Output of a loader such as load_viscosity_stress_data.
+
+    Returns:
+    str: The hex digest.
+    """
+    digest = hashlib.sha1()
+    digest.update(str(len(df)).encode())
+    for column in df.columns:
+        digest.update(str(column).encode() + b"\0")
+        if pd.api.types.is_numeric_dtype(df[column]):
+            values = _quantize(df[column].to_numpy(dtype=np.float64)) + 0.0
+            values[np.isnan(values)] = np.nan
+            digest.update(np.ascontiguousarray(values).tobytes())
+        else:
+            digest.update("\x1f".join(map(str, df[column])).encode())
+    return digest.hexdigest()
+
+
+def payload_layout(df):
+    """
+    Returns what two exports of the same run must share exactly: the number of
+    rows, the column names and the text columns.
+    """
+    text = hashlib.sha1()
+    for column in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[column]):
+            text.update(str(column).encode() + b"\0" + "\x1f".join(map(str, df[column])).encode())
+    return len(df), tuple(map(str, df.columns)), text.hexdigest()
+
+
+def payload_sketch(df, points=SKETCH_POINTS):
+    """
+    Summarises the numeric columns of a loaded DataFrame in a few values.
+
+    Parameters:
+    df (pd.DataFrame): Output of a loader.
+    points (int): Rows sampled from every numeric column.
+
+    Returns:
+    np.ndarray: The sampled values and the sum of every numeric column.
+    """
+    numeric = [column for column in df.columns if pd.api.types.is_numeric_dtype(df[column])]
+    values = df[numeric].to_numpy(dtype=np.float64)
+    rows = np.unique(np.linspace(0, len(values) - 1, min(points, len(values))).astype(int))
+    return np.concatenate([values[rows].ravel(), np.nansum(values, axis=0)])
+
+
+class DuplicateFilter:
+    """
+    Drops repeated exports from a batch and records what was dropped.
+
+    Call unique_files() on the file list before loading anything, then
+    is_duplicate() on every loaded DataFrame before analyzing it. The first
+    file of a run is kept; later copies are reported with the file they
+    duplicate.
+    """
+
+    def __init__(self):
+        self.duplicates = []
+        self._payloads = {}
+        # Layout -> [(sketch, file path)] of the loaded files, for digests that missed
+        self._sketches = {}
+
+    def _record(self, file_path, original, match):
+        self.duplicates.append({"File": file_path, "Duplicate of": original, "Match": match})
+
+    def unique_files(self, file_paths):
+        """
+        Removes byte-identical copies from a list of files, without parsing them.
+
+        Parameters:
+        file_paths (list of str): Paths to the data files.
+
+        Returns:
+        list of str: The files to process, in their original order. Files that
+                     cannot be read are kept, so that loading reports their error.
+        """
+        sizes = {}
+        for file_path in file_paths:
+            try:
+                sizes.setdefault(os.path.getsize(file_path), []).append(file_path)
+            except OSError:
+                pass
+
+        # Only files sharing their size with another file can be copies
+        digests = {}
+        for same_size in sizes.values():
+            if len(same_size) < 2:
+                continue
+            for file_path in same_size:
+                try:
+                    digests[file_path] = file_digest(file_path)
+                except OSError:
+                    pass
+
+        unique = []
+        originals = {}
+        for file_path in file_paths:
+            digest = digests.get(file_path)
+            if digest is not None and digest in originals:
+                self._record(file_path, originals[digest], "bytes")
+                continue
+            if digest is not None:
+                originals[digest] = file_path
+            unique.append(file_path)
+        return unique
+
+    def is_duplicate(self, file_path, df):
+        """
+        Returns True if a loaded file holds the same data as a file loaded before.
+
+        Files match if their digests are equal or, failing that (a value rounded
+        across a step of the digest), if they have the same layout and their
+        sketches agree within PAYLOAD_TOLERANCE.
+
+        Parameters:
+        file_path (str): Path of the loaded file.
+        df (pd.DataFrame): Its loaded data.
+        """
+        digest = payload_digest(df)
+        if digest in self._payloads:
+            self._record(file_path, self._payloads[digest], "payload")
+            return True
+
+        sketch = payload_sketch(df)
+        candidates = self._sketches.setdefault(payload_layout(df), [])
+        for other, original in candidates:
+            if np.allclose(sketch, other, rtol=PAYLOAD_TOLERANCE, atol=0, equal_nan=True):
+                self._record(file_path, original, "payload")
+                return True
+
+        self._payloads[digest] = file_path
+        candidates.append((sketch, file_path))
+        return False
+
+    def report(self):
+        """
+        Returns the files that were dropped.
+
+        Returns:
+        pd.DataFrame: One row per dropped file with the columns File, Duplicate of (the
+                      file that was kept) and Match ("bytes" or "payload").
+        """
+        return pd.DataFrame(self.duplicates, columns=REPORT_COLUMNS)
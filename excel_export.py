@@ -0,0 +1,111 @@
+import itertools
+import re
+
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+# Excel limits sheet names to 31 characters without []:*?/\
+_SHEET_NAME_LENGTH = 31
+_INVALID_SHEET_CHARACTERS = re.compile(r"[\[\]:*?/\\]")
+
+
+def results_to_long(all_results):
+    """
+    Builds the long (Sample, Metric, Value) table of a batch of results.
+
+    Parameters:
+    all_results (dict): Dictionary mapping sample names to result dictionaries.
+
+    Returns:
+    pd.DataFrame: One row per sample and metric, in the order of the results.
+    """
+    lengths = [len(results) for results in all_results.values()]
+    return pd.DataFrame({
+        "Sample": pd.Series(list(all_results)).repeat(lengths).to_numpy(),
+        "Metric": list(itertools.chain.from_iterable(all_results.values())),
+        "Value": list(itertools.chain.from_iterable(results.values() for results in all_results.values()))
+    })
+
+
+def long_to_wide(long_df, samples=None):
+    """
+    Pivots the long results table to one row per sample and one column per metric.
+
+    Samples and metrics keep the order in which they first appear; metrics a
+    sample does not have are left empty.
+
+    Parameters:
+    long_df (pd.DataFrame): Output of results_to_long.
+    samples (iterable of str): All sample names, in order (e.g. the keys of the results).
+                               Samples without any metric keep an empty row.
+                               Default: the samples of long_df.
+
+    Returns:
+    pd.DataFrame: Wide table with a 'Sample' column followed by the metrics.
+    """
+    samples = pd.unique(long_df["Sample"]) if samples is None else list(samples)
+    wide_df = long_df.pivot(index="Sample", columns="Metric", values="Value")
+    wide_df = wide_df.reindex(index=samples, columns=pd.unique(long_df["Metric"]))
+    wide_df.columns.name = None
+    return wide_df.rename_axis("Sample").reset_index()
+
+
+def _sheet_name(name, used):
+    """Returns a valid sheet name for `name` that is not in `used`, and adds it to `used`."""
+    base = _INVALID_SHEET_CHARACTERS.sub("_", str(name))[:_SHEET_NAME_LENGTH] or "Sheet"
+    candidate = base
+    counter = 1
+    while candidate.lower() in used:
+        counter += 1
+        suffix = f" ({counter})"
+        candidate = base[:_SHEET_NAME_LENGTH - len(suffix)] + suffix
+    used.add(candidate.lower())
+    return candidate
+
+
+def _rows(df, index):
+    """Yields the header and the rows of a DataFrame, with missing values as empty cells."""
+    if index:
+        df = df.reset_index()
+    yield [str(column) for column in df.columns]
+
+    # Convert in blocks so that large raw-data tables are never copied whole
+    for start in range(0, len(df), 10000):
+        block = df.iloc[start:start + 10000]
+        block = block.astype(object).where(block.notna(), None)
+        yield from block.itertuples(index=False, name=None)
+
+
+def write_excel_streaming(file_path, sheets, index=False):
+    """
+    Writes DataFrames to an .xlsx workbook with openpyxl's write-only mode.
+
+    Rows are streamed to the file as they are appended, so memory use does not
+    depend on the number of sheets or rows. `sheets` may be a generator that
+    loads each DataFrame only when its sheet is written.
+
+    Parameters:
+    file_path (str): Path of the workbook.
+    sheets (iterable of tuple): (sheet name, DataFrame) pairs, in order. Names are
+                                shortened and made unique to satisfy Excel.
+    index (bool): Whether to write the DataFrame index as the first columns.
+
+    Returns:
+    str: The path that was written.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    used = set()
+    for name, df in sheets:
+        sheet = workbook.create_sheet(title=_sheet_name(name, used))
+        for row in _rows(df, index):
+            sheet.append(row)
+
+    # A workbook needs at least one sheet
+    if not used:
+        workbook.create_sheet(title="Sheet")
+
+    workbook.save(file_path)
+    return file_path
@@ -1,21 +1,109 @@
 import tkinter as tk
 from tkinter import ttk, filedialog
+import queue
 import os
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
+
+from data_import import is_supported_file
+from thumbnails import ThumbnailCache
+
+
+class ThumbnailTooltip:
+    """
+    Shows the thumbnail of the file under the mouse in a files Listbox.
+
+    Thumbnails come from a ThumbnailCache and are only rendered for files
+    that are hovered; files not rendered yet show a placeholder until the
+    cache's worker has drawn them.
+    """
+
+    # Milliseconds between checks for thumbnails finished in the background
+    POLL_INTERVAL = 100
+
+    def __init__(self, listbox, directory_var, cache):
+        """
+        Attach the tooltip to a Listbox.
+
+        Args:
+            listbox (tk.Listbox): Listbox of file names.
+            directory_var (tk.StringVar): Directory holding the listed files.
+            cache (ThumbnailCache): Cache providing the thumbnails.
+        """
+        self.listbox = listbox
+        self.directory_var = directory_var
+        self.cache = cache
+        self.window = None
+        self.image = None
+        self.file_path = None
+        self.position = (0, 0)
+
+        listbox.bind("<Motion>", self._on_motion, add="+")
+        listbox.bind("<Leave>", lambda event: self.hide(), add="+")
+        listbox.after(self.POLL_INTERVAL, self._poll)
+
+    def _on_motion(self, event):
+        index = self.listbox.nearest(event.y)
+        bbox = self.listbox.bbox(index) if index >= 0 else None
+        if bbox is None or not bbox[1] <= event.y < bbox[1] + bbox[3]:
+            self.hide()
+            return
+
+        self.position = (event.x_root + 20, event.y_root + 10)
+        file_path = os.path.join(self.directory_var.get(), self.listbox.get(index))
+        if file_path != self.file_path or self.window is None:
+            self.file_path = file_path
+            self._show(self.cache.request(file_path))
+        else:
+            self.window.geometry(f"+{self.position[0]}+{self.position[1]}")
+
+    def _show(self, thumbnail):
+        """Shows the thumbnail, or a placeholder while it is rendered."""
+        if self.window is None:
+            self.window = tk.Toplevel(self.listbox)
+            self.window.overrideredirect(True)
+            self.label = tk.Label(self.window, relief=tk.SOLID, borderwidth=1, background="white")
+            self.label.pack()
+
+        if thumbnail:
+            self.image = tk.PhotoImage(file=thumbnail)
+            self.label.config(image=self.image, text="")
+        else:
+            self.image = None
+            self.label.config(image="", text="Loading preview...")
+        self.window.geometry(f"+{self.position[0]}+{self.position[1]}")
+
+    def hide(self):
+        if self.window is not None:
+            self.window.destroy()
+            self.window = None
+        self.file_path = None
+
+    def _poll(self):
+        """Shows the thumbnail of the hovered file once the background thread has drawn it."""
+        try:
+            while True:
+                file_path, thumbnail = self.cache.results.get_nowait()
+                if self.window is not None and file_path == self.file_path:
+                    if thumbnail:
+                        self._show(thumbnail)
+                    else:
+                        self.label.config(image="", text="No preview")
+        except queue.Empty:
+            pass
+        self.listbox.after(self.POLL_INTERVAL, self._poll)
 
 
 class FileSelector(ttk.Frame):
     """A component that combines file selection and plot display."""
 
-    def __init__(self, parent, initial_dir=None):
+    def __init__(self, parent, initial_dir=None, thumbnail_cache=None):
         """
         Initialize the viscosity analyzer component.
 
         Args:
             parent: The parent widget
             initial_dir (str, optional): Initial directory to browse
+            thumbnail_cache (ThumbnailCache, optional): Cache of the file previews
+                shown when hovering the available files
         """
         super().__init__(parent)
 
@@ -23,6 +111,7 @@ class FileSelector(ttk.Frame):
         self.current_dir = tk.StringVar(value=self.initial_dir)
         self.selected_files = []  # Full paths of selected files
         self.status_var = tk.StringVar(value="No files selected")
+        self.thumbnail_cache = thumbnail_cache or ThumbnailCache()
 
         self._create_widgets()
         self._update_file_list()
@@ -53,7 +142,7 @@ class FileSelector(ttk.Frame):
         file_frame.columnconfigure(2, weight=1)
 
         # Available files list (left)
-        avail_frame = ttk.LabelFrame(file_frame, text="Available XLS Files")
+        avail_frame = ttk.LabelFrame(file_frame, text="Available TRIOS Files")
         avail_frame.grid(row=0, column=0, sticky="ew")
 
         avail_scrollbar = ttk.Scrollbar(avail_frame)
@@ -65,6 +154,9 @@ class FileSelector(ttk.Frame):
         self.available_listbox.pack(fill=tk.BOTH, expand=True)
         avail_scrollbar.config(command=self.available_listbox.yview)
 
+        # Thumbnail of the flow curve when hovering a file
+        self.thumbnail_tooltip = ThumbnailTooltip(self.available_listbox, self.current_dir, self.thumbnail_cache)
+
         # Add/Remove buttons (middle)
         button_frame = ttk.Frame(file_frame)
         button_frame.grid(row=0, column=1, sticky="ns", padx=5)
@@ -107,6 +199,10 @@ class FileSelector(ttk.Frame):
 
     def _create_plot_area(self):
         """Create the three plot areas."""
+        # matplotlib is imported here so that importing this module stays cheap
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
         # Configure the plot frame for two plots
         self.plot_frame.columnconfigure(0, weight=1)
         self.plot_frame.columnconfigure(1, weight=1)
@@ -152,13 +248,13 @@ class FileSelector(ttk.Frame):
             self._update_file_list()
 
     def _update_file_list(self):
-        """Update the available files listbox with XLS files from the current directory."""
+        """Update the available files listbox with TRIOS export files from the current directory."""
         self.available_listbox.delete(0, tk.END)
         try:
-            xls_files = [f for f in os.listdir(self.current_dir.get())
-                         if f.lower().endswith('.xls')]
-            xls_files.sort()
-            for file in xls_files:
+            export_files = [f for f in os.listdir(self.current_dir.get())
+                            if is_supported_file(f)]
+            export_files.sort()
+            for file in export_files:
                 self.available_listbox.insert(tk.END, file)
         except Exception as e:
             print(f"Error listing directory: {e}")
@@ -0,0 +1,293 @@
+"""
+Append-only archive of many samples, queried without parsing any export.
+
+An archive is a directory holding:
+- one raw float64 file per value column (archive.VALUE_COLUMNS), e.g.
+  viscosity.f64. All columns have the same length; the points of every
+  sample are appended at the end.
+- samples.jsonl: one line per sample with its metadata (name, kind, source
+  path and content digest, date) and the row range of each of its segments
+  (sweep or peak-hold phase).
+
+The column files are read as memory maps, so a query only touches the rows
+of the samples it returns: "all RECOVERY curves of product X" reads the
+index and slices the maps, whatever the size of the archive.
+
+Samples are written column data first and index line last, with an fsync
+in between; a crash while appending leaves unindexed rows at the end of the
+columns, which are ignored and overwritten by the next append. One process
+should write to an archive at a time.
+"""
+import datetime
+import json
+import os
+import re
+
+from lazy_imports import lazy_import
+from archive import VALUE_COLUMNS, sample_columns
+from data_import import file_digest, load_viscosity_stress_data, load_thixotropy_data
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+INDEX_NAME = "samples.jsonl"
+
+# Metadata columns of FleetArchive.metadata(), before any user-defined fields
+METADATA_COLUMNS = ["id", "name", "kind", "date", "path", "digest", "added", "start", "stop"]
+
+
+def _column_file(column):
+    """File name of a value column, e.g. "Shear rate" -> "shear_rate.f64"."""
+    return column.lower().replace(" ", "_") + ".f64"
+
+
+def _segment_runs(labels):
+    """
+    Splits the segment label of every point into contiguous runs.
+
+    Returns:
+    list: [label, start, stop] for every run, with start/stop relative to the sample.
+    """
+    labels = np.asarray(labels, dtype=object)
+    if len(labels) == 0:
+        return []
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    stops = np.r_[starts[1:], len(labels)]
+    return [[str(labels[start]), int(start), int(stop)] for start, stop in zip(starts, stops)]
+
+
+class FleetArchive:
+    """
+    A directory of memory-mapped columns with an index of samples and segments.
+
+    Add samples with add_file() (or append() for data that is already loaded)
+    and query them with find(), curves() and frame().
+    """
+
+    def __init__(self, directory):
+        """
+        Open an archive, creating it if the directory does not exist.
+
+        Parameters:
+        directory (str): Archive directory.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        self.samples = self._read_index()
+        self.length = self.samples[-1]["stop"] if self.samples else 0
+        # A file holding flow sweeps and peak holds is archived once per kind
+        self._archived = {(sample["digest"], sample["kind"]) for sample in self.samples if sample.get("digest")}
+        self._maps = {}
+
+    def _read_index(self):
+        """Returns the index entries, removing a last line cut short by a crash."""
+        if not os.path.exists(self.index_path):
+            return []
+
+        with open(self.index_path, "rb+") as f:
+            data = f.read()
+            complete = data.rfind(b"\n") + 1
+            if complete != len(data):
+                f.truncate(complete)
+
+        return [json.loads(line) for line in data[:complete].decode("utf-8").splitlines()]
+
+    def __len__(self):
+        return len(self.samples)
+
+    def column(self, column):
+        """
+        Returns a value column of the whole archive as a read-only memory map.
+
+        Parameters:
+        column (str): One of archive.VALUE_COLUMNS.
+
+        Returns:
+        np.ndarray: float64 array with one value per archived point.
+        """
+        if column not in VALUE_COLUMNS:
+            raise ValueError(f"Error: Unknown column '{column}'. Available columns: {VALUE_COLUMNS}")
+
+        cached = self._maps.get(column)
+        if cached is None or len(cached) != self.length:
+            if self.length == 0:
+                cached = np.empty(0)
+            else:
+                cached = np.memmap(os.path.join(self.directory, _column_file(column)), dtype=np.float64,
+                                   mode="r", shape=(self.length,))
+            self._maps[column] = cached
+        return cached
+
+    def append(self, name, kind, df, path=None, digest=None, date=None, **metadata):
+        """
+        Append one loaded sample.
+
+        Parameters:
+        name (str): Sample name.
+        kind (str): "viscosity" or "thixotropy".
+        df (pd.DataFrame): Output of load_viscosity_stress_data or load_thixotropy_data.
+        path (str): Source file.
+        digest (str): Content digest of the source file (see data_import.file_digest),
+                      used to skip files that are already archived.
+        date (str): Measurement date as an ISO string, e.g. "2024-03-18". Default: today.
+        **metadata: Additional JSON-serializable fields, e.g. product="X", operator="AB".
+
+        Returns:
+        dict: The index entry of the sample.
+        """
+        points = sample_columns(name, kind, df)
+        start, stop = self.length, self.length + len(points)
+
+        # Column data first, durably, so that an indexed sample is always complete
+        for column in VALUE_COLUMNS:
+            column_path = os.path.join(self.directory, _column_file(column))
+            with open(column_path, "ab") as f:
+                # Drop rows left by an append that crashed before writing its index line
+                if os.path.getsize(column_path) != start * 8:
+                    f.truncate(start * 8)
+                f.write(np.ascontiguousarray(points[column].to_numpy(dtype=np.float64)).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        entry = {
+            "id": len(self.samples),
+            "name": name,
+            "kind": kind,
+            "date": date or datetime.date.today().isoformat(),
+            "path": os.path.abspath(path) if path else None,
+            "digest": digest,
+            "added": datetime.datetime.now().isoformat(timespec="seconds"),
+            "start": start,
+            "stop": stop,
+            "segments": [[label, start + first, start + last] for label, first, last in
+                         _segment_runs(points["Segment"])],
+            **metadata,
+        }
+        with open(self.index_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.samples.append(entry)
+        self.length = stop
+        if digest:
+            self._archived.add((digest, kind))
+        return entry
+
+    def add_file(self, file_path, kind, name=None, date=None, load=None, **metadata):
+        """
+        Load an export and append it, unless a file with the same content is archived as this kind.
+
+        Parameters:
+        file_path (str): Path to the TRIOS export.
+        kind (str): "viscosity" or "thixotropy".
+        name (str): Sample name. Default: the file name without extension.
+        date (str): Measurement date as an ISO string. Default: the file's modification date.
+        load (callable): Loader taking the file path. Default: load_viscosity_stress_data
+                         or load_thixotropy_data.
+        **metadata: Additional fields, see append.
+
+        Returns:
+        dict: The index entry, or None if the file was already archived.
+        """
+        digest = file_digest(file_path)
+        if (digest, kind) in self._archived:
+            return None
+
+        if load is None:
+            load = load_viscosity_stress_data if kind == "viscosity" else load_thixotropy_data
+        if date is None:
+            date = datetime.date.fromtimestamp(os.path.getmtime(file_path)).isoformat()
+        name = name or os.path.splitext(os.path.basename(file_path))[0]
+
+        return self.append(name, kind, load(file_path), path=file_path, digest=digest, date=date, **metadata)
+
+    def find(self, name=None, pattern=None, kind=None, since=None, until=None, **metadata):
+        """
+        Select samples from the index.
+
+        Parameters:
+        name (str): Exact sample name.
+        pattern (str): Regular expression searched in the sample name, e.g. "^ProductX".
+        kind (str): "viscosity" or "thixotropy".
+        since (str): First measurement date (ISO, inclusive).
+        until (str): Last measurement date (ISO, inclusive).
+        **metadata: Fields that must be equal, e.g. product="X".
+
+        Returns:
+        list of dict: Index entries of the matching samples, in the order they were added.
+        """
+        regex = re.compile(pattern) if pattern else None
+
+        return [
+            sample for sample in self.samples
+            if (name is None or sample["name"] == name)
+            and (regex is None or regex.search(sample["name"]))
+            and (kind is None or sample["kind"] == kind)
+            and (since is None or sample["date"] >= since)
+            # Compared on the length of `until`, so "2024-03" includes the whole month
+            and (until is None or sample["date"][:len(until)] <= until)
+            and all(sample.get(field) == value for field, value in metadata.items())
+        ]
+
+    def curves(self, segment=None, columns=("Step time", "Viscosity"), **query):
+        """
+        Return the curves of the matching samples as views of the memory-mapped columns.
+
+        Parameters:
+        segment (str): Only this sweep or phase, e.g. "RECOVERY" or "FORWARD". Default: whole samples.
+        columns (sequence of str): Value columns to return.
+        **query: Sample selection, see find.
+
+        Returns:
+        list of tuple: (index entry, dict of column name to array) for every matching
+                       sample and segment run. The arrays are read-only views; copy them
+                       to keep them after the archive grows.
+        """
+        maps = {column: self.column(column) for column in columns}
+        curves = []
+        for sample in self.find(**query):
+            if segment is None:
+                ranges = [(sample["start"], sample["stop"])]
+            else:
+                ranges = [(start, stop) for label, start, stop in sample["segments"] if label == segment]
+            for start, stop in ranges:
+                curves.append((sample, {column: values[start:stop] for column, values in maps.items()}))
+        return curves
+
+    def frame(self, segment=None, columns=VALUE_COLUMNS, **query):
+        """
+        Return the matching points as one long DataFrame.
+
+        Parameters:
+        segment (str): Only this sweep or phase. Default: all.
+        columns (sequence of str): Value columns to include.
+        **query: Sample selection, see find.
+
+        Returns:
+        pd.DataFrame: Columns Sample, Date, Kind, Segment and the value columns.
+        """
+        parts = []
+        for sample in self.find(**query):
+            for label, start, stop in sample["segments"]:
+                if segment is not None and label != segment:
+                    continue
+                part = {"Sample": sample["name"], "Date": sample["date"], "Kind": sample["kind"], "Segment": label}
+                part.update({column: np.array(self.column(column)[start:stop]) for column in columns})
+                parts.append(pd.DataFrame(part))
+
+        if not parts:
+            return pd.DataFrame(columns=["Sample", "Date", "Kind", "Segment", *columns])
+        return pd.concat(parts, ignore_index=True)
+
+    def metadata(self):
+        """
+        Return the index as a table, one row per sample (without the segment ranges).
+
+        Returns:
+        pd.DataFrame: Indexed by sample id.
+        """
+        rows = [{key: value for key, value in sample.items() if key != "segments"} for sample in self.samples]
+        table = pd.DataFrame(rows, columns=None if rows else METADATA_COLUMNS)
+        return table.set_index("id")
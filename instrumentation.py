@@ -0,0 +1,290 @@
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# Pipeline stages timed by the DataProcessor
+STAGES = ["load", "transform", "analyze", "render", "export"]
+
+# Shared no-op context returned while instrumentation is disabled
+_NULL_SPAN = contextlib.nullcontext()
+
+# Number of allocation sites kept per span in memory mode
+TOP_ALLOCATORS = 5
+
+# Stack depth recorded by tracemalloc in memory mode
+_TRACEMALLOC_FRAMES = 1
+
+# Allocations made by the profiling itself are left out of the allocator lists
+_IGNORED_TRACES = [tracemalloc.Filter(False, tracemalloc.__file__),
+                   tracemalloc.Filter(False, __file__)]
+
+
+def _current_rss_mb():
+    """Returns the resident set size of this process in MB, or None if it cannot be read."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        pass
+
+    try:
+        # Linux without psutil: second field of statm is the resident size in pages
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_rss_mb():
+    """Returns the peak resident set size of this process in MB, or None if it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        # Windows: the peak working set is only available through psutil
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 2 ** 20
+        except (ImportError, AttributeError):
+            return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def _percentile(values, q):
+    """Returns the q-th percentile (0-100) of a list of numbers with linear interpolation."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _summarise(durations):
+    """Summarises a list of span durations in seconds."""
+    return {
+        "count": len(durations),
+        "total_s": sum(durations),
+        "p50_s": _percentile(durations, 50),
+        "p95_s": _percentile(durations, 95),
+        "max_s": max(durations)
+    }
+
+
+def _summarise_memory(samples):
+    """
+    Summarises the memory samples of several spans.
+
+    Sizes are maxima over the spans; the allocators are those of the span with
+    the highest tracemalloc peak.
+    """
+    def maximum(key):
+        values = [sample[key] for sample in samples if sample[key] is not None]
+        return max(values) if values else None
+
+    largest = max(samples, key=lambda sample: sample["traced_peak_mb"] or 0)
+    return {
+        "traced_peak_mb": maximum("traced_peak_mb"),
+        "rss_mb": maximum("rss_mb"),
+        "peak_rss_mb": maximum("peak_rss_mb"),
+        "top_allocators": largest["top_allocators"]
+    }
+
+
+class StageTimer:
+    """
+    Records how long each pipeline stage takes for each file.
+
+    Spans are opened with ``with timer.span("load", file_path): ...``. While the
+    timer is disabled ``span`` returns a shared no-op context, so leaving the
+    calls in place costs a single attribute check per span.
+
+    In memory mode every span also records the tracemalloc peak reached inside
+    the span, the current and peak resident set size of the process and the
+    source lines holding the most memory allocated in the span. Tracing slows
+    processing down and is meant for diagnosing large batches only.
+    """
+
+    def __init__(self, enabled=False, memory=False):
+        """
+        Initialize the timer.
+
+        Parameters:
+        enabled (bool): Whether spans are recorded.
+        memory (bool): Whether spans also record memory usage (implies enabled).
+        """
+        self.enabled = enabled or memory
+        self.memory = memory
+        self.records = []  # (file, stage, seconds, memory sample or None)
+        self._memory_depth = 0
+
+    def span(self, stage, file=None):
+        """
+        Returns a context manager timing one stage for one file.
+
+        Parameters:
+        stage (str): Stage name, one of STAGES.
+        file (str): File path (or plot name) the work belongs to.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        if self.memory:
+            return self._record_memory(stage, file)
+        return self._record(stage, file)
+
+    @contextlib.contextmanager
+    def _record(self, stage, file):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.records.append((file, stage, time.perf_counter() - start, None))
+
+    @contextlib.contextmanager
+    def _record_memory(self, stage, file):
+        # Only the outermost span traces allocations. If the caller is not tracing
+        # already, tracing starts empty for the span and stops after it, so
+        # snapshots hold the span's own allocations only and stay cheap. If it
+        # is, its tracing and its peak are left untouched: the span's allocations
+        # are the difference to a snapshot taken at the start, and its peak is
+        # measured from the traced memory at the start. When the caller's earlier
+        # peak was higher, the span's own peak cannot be told apart and the memory
+        # still held at the end is recorded instead (a lower bound).
+        # Nested spans (e.g. loads inside a streamed plot) record RSS only.
+        outermost = self._memory_depth == 0
+        self._memory_depth += 1
+        already_tracing = outermost and tracemalloc.is_tracing()
+        if already_tracing:
+            start_snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_TRACES)
+            start_traced, start_peak = tracemalloc.get_traced_memory()
+        elif outermost:
+            start_traced = start_peak = 0
+            tracemalloc.start(_TRACEMALLOC_FRAMES)
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._memory_depth -= 1
+
+            traced_peak_mb = None
+            allocators = []
+            if outermost:
+                traced, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_TRACES)
+                if already_tracing:
+                    statistics = [stat for stat in snapshot.compare_to(start_snapshot, "lineno") if stat.size_diff > 0]
+                    sizes = [(stat, stat.size_diff, stat.count_diff) for stat in statistics]
+                else:
+                    tracemalloc.stop()
+                    sizes = [(stat, stat.size, stat.count) for stat in snapshot.statistics("lineno")]
+
+                if peak <= start_peak:
+                    # The caller's peak was not exceeded inside the span
+                    peak = max(traced, start_traced)
+                traced_peak_mb = (peak - start_traced) / 2 ** 20
+                # Allocations made inside the span that are still alive, by source line
+                allocators = [
+                    {"location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                     "size_kb": size / 1024,
+                     "count": count}
+                    for stat, size, count in sizes[:TOP_ALLOCATORS]
+                ]
+
+            self.records.append((file, stage, seconds, {
+                "traced_peak_mb": traced_peak_mb,
+                "rss_mb": _current_rss_mb(),
+                "peak_rss_mb": _peak_rss_mb(),
+                "top_allocators": allocators
+            }))
+
+    def reset(self):
+        """Discard all recorded spans."""
+        self.records = []
+
+    def report(self):
+        """
+        Builds a structured report of the recorded spans.
+
+        Returns:
+        dict: {"files": {file: {stage: summary}}, "stages": {stage: summary}}
+              where each summary holds count, total_s, p50_s, p95_s and max_s.
+              In memory mode the summaries also hold traced_peak_mb, rss_mb,
+              peak_rss_mb and top_allocators, and the report holds the
+              overall peak_rss_mb.
+        """
+        by_file = {}
+        by_stage = {}
+        for file, stage, seconds, memory in self.records:
+            by_file.setdefault(file, {}).setdefault(stage, []).append((seconds, memory))
+            by_stage.setdefault(stage, []).append((seconds, memory))
+
+        def summarise(samples):
+            summary = _summarise([seconds for seconds, _ in samples])
+            memory_samples = [memory for _, memory in samples if memory is not None]
+            if memory_samples:
+                summary.update(_summarise_memory(memory_samples))
+            return summary
+
+        report = {
+            "files": {file: {stage: summarise(samples) for stage, samples in stages.items()}
+                      for file, stages in by_file.items()},
+            "stages": {stage: summarise(samples) for stage, samples in by_stage.items()}
+        }
+
+        if self.memory:
+            report["peak_rss_mb"] = _peak_rss_mb()
+
+        return report
+
+    def write_report(self, file_path):
+        """
+        Writes the report to a JSON or CSV file, chosen by the file extension.
+
+        In CSV format every (file, stage) pair is one row, followed by one row
+        per stage with the file column set to "ALL" for the aggregate.
+
+        Parameters:
+        file_path (str): Path of the report (.json or .csv).
+
+        Returns:
+        str: The path that was written.
+        """
+        report = self.report()
+
+        if os.path.splitext(file_path)[1].lower() == ".csv":
+            columns = ["count", "total_s", "p50_s", "p95_s", "max_s"]
+            if self.memory:
+                # Allocators do not fit a flat table; they are in the JSON report
+                columns += ["traced_peak_mb", "rss_mb", "peak_rss_mb"]
+            with open(file_path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["File", "Stage"] + columns)
+                for file, stages in report["files"].items():
+                    for stage, summary in stages.items():
+                        writer.writerow([file, stage] + [summary.get(c) for c in columns])
+                for stage, summary in report["stages"].items():
+                    writer.writerow(["ALL", stage] + [summary.get(c) for c in columns])
+        else:
+            with open(file_path, "w") as f:
+                json.dump(report, f, indent=2)
+
+        return file_path
+
+
+def profiling_requested():
+    """Returns True if the RHEOLOGY_PROFILE environment variable switches instrumentation on."""
+    return os.environ.get("RHEOLOGY_PROFILE", "").strip().lower() in ("1", "true", "yes", "on", "memory")
+
+
+def memory_profiling_requested():
+    """Returns True if RHEOLOGY_PROFILE is set to "memory" to also record memory usage."""
+    return os.environ.get("RHEOLOGY_PROFILE", "").strip().lower() == "memory"
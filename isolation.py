@@ -0,0 +1,148 @@
+"""
+Parsing of export files in a separate worker process.
+
+A corrupted or huge workbook can make a parser hang, exhaust memory or crash
+the interpreter. IsolatedWorker runs the parsing in a child process with a
+timeout and a memory ceiling: a file that takes too long is killed, a file
+that needs too much memory fails with MemoryError (or kills the worker), and
+both are reported as ordinary errors while the next file gets a fresh worker.
+The worker is kept between files that parse or fail with an ordinary error,
+so healthy files only pay for sending the parsed sheets back.
+"""
+import multiprocessing
+
+# Seconds a file may take to parse before its worker is killed
+DEFAULT_TIMEOUT = 120
+
+# Address space of the worker process in bytes (not enforced on Windows)
+DEFAULT_MEMORY_LIMIT = 2 * 1024 ** 3
+
+
+def _limit_memory(memory_limit):
+    """Caps the address space of this process."""
+    try:
+        import resource
+    except ImportError:
+        # Windows has no rlimits: no ceiling
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        memory_limit = min(memory_limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit, hard))
+
+
+def _serve(connection, memory_limit):
+    """Worker process: runs (function, args) requests until the connection is closed."""
+    if memory_limit:
+        _limit_memory(memory_limit)
+
+    while True:
+        try:
+            function, args = connection.recv()
+        except EOFError:
+            return
+        # The third item asks the parent to replace this worker (its heap may be fragmented
+        # or half-freed after running out of memory)
+        try:
+            reply = ("result", function(*args), False)
+        except MemoryError:
+            limit = f" (limit {memory_limit / 1024 ** 2:.0f} MB)" if memory_limit else ""
+            reply = ("error", f"Error: Out of memory{limit}", True)
+        except Exception as e:
+            reply = ("error", str(e), False)
+
+        try:
+            connection.send(reply)
+        except Exception as e:
+            connection.send(("error", f"Error: Could not return the parsed data: {str(e)}",
+                             isinstance(e, MemoryError)))
+
+
+class IsolatedWorker:
+    """
+    A worker process that parses one file at a time, with a timeout and a memory ceiling.
+
+    The worker is started on first use and replaced after a timeout, a crash
+    or running out of memory. One worker serves one thread at a time.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, memory_limit=DEFAULT_MEMORY_LIMIT):
+        """
+        Parameters:
+        timeout (float): Seconds a file may take. The first file also waits for the
+                         worker to start (importing pandas takes a second or two).
+        memory_limit (int): Address space of the worker in bytes, or None for no ceiling.
+        """
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        # Spawned rather than forked: the GUI runs threads that a fork could catch holding a lock
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._connection = None
+
+    def _start(self):
+        parent_connection, child_connection = self._context.Pipe()
+        self._process = self._context.Process(target=_serve, args=(child_connection, self.memory_limit),
+                                              name="isolated-parser", daemon=True)
+        self._process.start()
+        child_connection.close()
+        self._connection = parent_connection
+
+    def stop(self):
+        """Kills the worker; the next read starts a new one."""
+        if self._process is None:
+            return
+        self._process.kill()
+        self._process.join()
+        self._connection.close()
+        self._process = None
+        self._connection = None
+
+    def read(self, function, file_path, *args):
+        """
+        Runs function(file_path, *args) in the worker and returns its result.
+
+        Parameters:
+        function (callable): A module-level function, e.g. data_import.read_trios_sheets.
+        file_path (str): The file to read.
+        *args: Further arguments of the function.
+
+        Returns:
+        The function's result, sent back from the worker.
+
+        Raises:
+        ValueError: If the function raised, the file timed out or the worker crashed.
+        """
+        if self._process is None or not self._process.is_alive():
+            self.stop()
+            self._start()
+
+        try:
+            self._connection.send((function, (file_path, *args)))
+        except (BrokenPipeError, OSError):
+            # The worker died since the last file: retry once with a new one
+            self.stop()
+            self._start()
+            try:
+                self._connection.send((function, (file_path, *args)))
+            except (BrokenPipeError, OSError) as e:
+                self.stop()
+                raise ValueError(f"Error: Could not send '{file_path}' to the worker: {str(e)}")
+
+        if not self._connection.poll(self.timeout):
+            self.stop()
+            raise ValueError(f"Error: Reading '{file_path}' took longer than {self.timeout:g} s and was stopped")
+
+        try:
+            status, value, replace = self._connection.recv()
+        except (EOFError, OSError):
+            self._process.join(1)
+            exit_code = self._process.exitcode
+            self.stop()
+            raise ValueError(f"Error: The worker reading '{file_path}' crashed (exit code {exit_code})")
+
+        if replace:
+            self.stop()
+        if status == "error":
+            raise ValueError(value)
+        return value
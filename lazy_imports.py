@@ -0,0 +1,44 @@
+import importlib
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access.
+
+    Heavy dependencies (pandas, numpy, matplotlib, scipy) take most of the
+    application start-up time. Binding them through this class keeps the usual
+    ``pd.DataFrame`` / ``plt.figure`` spelling while deferring the import until
+    the module is actually used.
+    """
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        if self._module is None:
+            self.__dict__["_module"] = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """
+    Returns a module placeholder that imports `name` on first use.
+
+    Parameters:
+    name (str): Dotted module name, e.g. "pandas" or "matplotlib.pyplot".
+
+    Returns:
+    LazyModule: Object forwarding attribute access to the imported module.
+    """
+    return LazyModule(name)
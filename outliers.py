@@ -0,0 +1,161 @@
+import warnings
+
+from lazy_imports import lazy_import
+from data_analysis import stack_curves, interpolate_curves
+from replicates import DEFAULT_GROUP_PATTERN, group_name
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+# Curves whose score is above this are outliers (robust z-score, like 3.5 for
+# the modified z-score of single values)
+OUTLIER_THRESHOLD = 3.5
+
+# Curves closer than this to their group median are never outliers, so that
+# very consistent groups are not flagged for tiny differences (log units: 0.1
+# is about 10% in viscosity)
+MIN_DEVIATION = 0.1
+
+# Points of the shared grid the curves are compared on
+SCREENING_POINTS = 200
+
+# Groups with fewer curves are not screened: the median needs a majority
+MIN_GROUP_SIZE = 3
+
+
+def shared_grid(x, n_points=SCREENING_POINTS, log=False):
+    """
+    Builds one grid for all curves, spanning the typical range of the curves.
+
+    The grid runs from the median start to the median end of the curves, so a
+    few short or shifted curves do not shrink it; curves not covering part of
+    it have NaN there, which the screening ignores.
+    """
+    if log:
+        x = np.where(x > 0, x, np.nan)
+    start = np.nanmedian(np.nanmin(x, axis=1))
+    stop = np.nanmedian(np.nanmax(x, axis=1))
+    return np.geomspace(start, stop, n_points) if log else np.linspace(start, stop, n_points)
+
+
+def curve_distances(values, groups):
+    """
+    Computes the robust distance of every curve to the median curve of its group.
+
+    Parameters:
+    values (np.ndarray): log viscosity of all curves on a shared grid (curves x grid).
+    groups (np.ndarray): Group label of every curve.
+
+    Returns:
+    tuple: (distance, score) arrays with one value per curve. The distance is the
+           median absolute log deviation from the group median curve; the score
+           is that distance in units of the group's typical distance (the scaled
+           median absolute deviation of the distances, at least their median).
+           The score is NaN for groups too small to screen.
+    """
+    groups = np.asarray(groups)
+    labels, inverse = np.unique(groups, return_inverse=True)
+    screened = np.bincount(inverse, minlength=len(labels)) >= MIN_GROUP_SIZE
+    median_curves = np.full((len(labels), values.shape[1]), np.nan)
+    scale = np.full(len(labels), np.nan)
+
+    # Curves or grid points without data give all-NaN slices; they stay NaN
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+
+        # Median curve of every group
+        for k in np.flatnonzero(screened):
+            median_curves[k] = np.nanmedian(values[inverse == k], axis=0)
+
+        # Distances of all curves at once against their group's median curve
+        distance = np.nanmedian(np.abs(values - median_curves[inverse]), axis=1)
+
+        # Typical distance of each group: the scaled median absolute deviation of
+        # the distances, but at least their median
+        for k in np.flatnonzero(screened):
+            group_distance = distance[inverse == k]
+            typical = np.nanmedian(group_distance)
+            mad = 1.4826 * np.nanmedian(np.abs(group_distance - typical))
+            scale[k] = max(mad, typical, 1e-12)
+
+        score = distance / scale[inverse]
+
+    return distance, score
+
+
+def screen_curves(names, x_curves, y_curves, pattern=DEFAULT_GROUP_PATTERN, log_x=False,
+                  threshold=OUTLIER_THRESHOLD, min_deviation=MIN_DEVIATION, n_points=SCREENING_POINTS):
+    """
+    Flags replicate curves that deviate from their group.
+
+    All curves are interpolated onto one shared grid in a single vectorized
+    pass and compared in log viscosity with the median curve of their group.
+
+    Parameters:
+    names (list of str): Sample name of every curve; groups follow from `pattern`.
+    x_curves (list of array-like): x values (shear rate or time) of every curve.
+    y_curves (list of array-like): Viscosity of every curve.
+    pattern (str): Group pattern, see replicates.group_name.
+    log_x (bool): Use a logarithmic grid and log x interpolation (for shear rates).
+    threshold (float): Score above which a curve is an outlier.
+    min_deviation (float): Distance (in log units) below which a curve is never an outlier.
+    n_points (int): Points of the shared grid.
+
+    Returns:
+    pd.DataFrame: Indexed by sample name, with the columns Group, Distance, Score
+                  and Outlier (bool).
+    """
+    groups = [group_name(name, pattern) for name in names]
+    if not names:
+        return pd.DataFrame(columns=["Group", "Distance", "Score", "Outlier"])
+
+    x = stack_curves(x_curves)
+    y = stack_curves(y_curves)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        y = np.log(np.where(y > 0, y, np.nan))
+        grid = shared_grid(x, n_points, log_x)
+        if log_x:
+            values = interpolate_curves(np.log(np.where(x > 0, x, np.nan)), y, np.log(grid))
+        else:
+            values = interpolate_curves(x, y, grid)
+
+    distance, score = curve_distances(values, groups)
+    outlier = (score > threshold) & (distance > min_deviation)
+
+    return pd.DataFrame({"Group": groups, "Distance": distance, "Score": score, "Outlier": outlier},
+                        index=pd.Index(names, name="Sample"))
+
+
+def screen_viscosity(dataframes, sweep="FORWARD", pattern=DEFAULT_GROUP_PATTERN, **kwargs):
+    """
+    Screens flow curves (load_viscosity_stress_data output) for outliers.
+
+    Parameters:
+    dataframes (dict): Sample names mapped to DataFrames.
+    sweep (str): "FORWARD" or "REVERSE".
+    pattern (str): Group pattern, see replicates.group_name.
+    **kwargs: Passed to screen_curves (threshold, min_deviation, n_points).
+
+    Returns:
+    pd.DataFrame: See screen_curves.
+    """
+    sweeps = [df[df["Sweep"] == sweep] for df in dataframes.values()]
+    return screen_curves(list(dataframes), [df["Shear rate"] for df in sweeps], [df["Viscosity"] for df in sweeps],
+                         pattern, log_x=True, **kwargs)
+
+
+def screen_thixotropy(dataframes, pattern=DEFAULT_GROUP_PATTERN, **kwargs):
+    """
+    Screens viscosity-time curves (load_thixotropy_data output) for outliers.
+
+    Parameters:
+    dataframes (dict): Sample names mapped to DataFrames, or to (time, viscosity) arrays.
+    pattern (str): Group pattern, see replicates.group_name.
+    **kwargs: Passed to screen_curves (threshold, min_deviation, n_points).
+
+    Returns:
+    pd.DataFrame: See screen_curves.
+    """
+    curves = [(df["Time"], df["Viscosity"]) if hasattr(df, "columns") else df for df in dataframes.values()]
+    return screen_curves(list(dataframes), [curve[0] for curve in curves], [curve[1] for curve in curves],
+                         pattern, **kwargs)
@@ -1,26 +1,150 @@
-import matplotlib.pyplot as plt
 import os
-import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 
+from lazy_imports import lazy_import
 
-def plot_viscosity_data(df, fig_name, export_path, sweep_types=None, datasets=None, colors=None, markers=None):
+# matplotlib is only imported when the first plot is drawn
+plt = lazy_import("matplotlib.pyplot")
+np = lazy_import("numpy")
+
+
+def _as_datasets(df, datasets):
+    """
+    Normalises the data argument of the plot functions.
+
+    A single DataFrame becomes a one-element list. Any other iterable (e.g. a
+    generator loading one file at a time) is left as is when the dataset names
+    are given as a list, so that the plot only holds one dataset at a time;
+    otherwise it is materialised to count the datasets.
+    """
+    if hasattr(df, "columns"):
+        return [df]
+    if isinstance(df, list) or (datasets is not None and not isinstance(datasets, str)):
+        return df
+    return list(df)
+
+
+# Axis labels and scales of the reusable per-file figures
+FIGURE_TEMPLATES = {
+    "viscosity": {"x_label": "Shear rate (1/s)", "y_label": "Viscosity (Pa.s)", "log_x": True, "log_y": True},
+    "thixotropy": {"x_label": "Time (s)", "y_label": "Viscosity (Pa.s)", "log_x": False, "log_y": True},
+}
+
+# Templates built so far in this process, see figure_template
+_templates = {}
+
+
+class FigureTemplate:
+    """
+    A styled figure that is built once and reused for many exports.
+
+    Creating the figure, the axes, the log scales and the grid is the same for
+    every file of a batch; a template does it once and, for each export, only
+    swaps the data artists and the legend. The figure uses matplotlib's object
+    API (no pyplot), so it is independent of any figure shown in the GUI.
+
+    A template draws one figure at a time: use one per process or thread.
+    """
+
+    def __init__(self, x_label, y_label, log_x=True, log_y=True, figsize=(10, 8)):
+        """
+        Build the figure and style its axes.
+
+        Parameters:
+        x_label (str): Label of the x axis.
+        y_label (str): Label of the y axis.
+        log_x (bool): Logarithmic x axis.
+        log_y (bool): Logarithmic y axis.
+        figsize (tuple): Figure size in inches.
+        """
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=figsize)
+        self.axes = self.figure.add_subplot()
+        self.axes.set_xlabel(x_label)
+        self.axes.set_ylabel(y_label)
+        if log_x:
+            self.axes.set_xscale("log")
+        if log_y:
+            self.axes.set_yscale("log")
+        self.axes.grid(True, which="both", linestyle="--", linewidth=0.5)
+        self._artists = []
+
+    def scatter(self, x, y, **kwargs):
+        """Adds a scatter series to the current export and returns its artist."""
+        artist = self.axes.scatter(x, y, **kwargs)
+        self._artists.append(artist)
+        return artist
+
+    def clear(self):
+        """Removes the data artists and the legend, keeping the styled axes."""
+        for artist in self._artists:
+            artist.remove()
+        self._artists = []
+        if self.axes.legend_ is not None:
+            self.axes.legend_.remove()
+
+        # The next data sets the limits again instead of extending the old ones
+        self.axes.ignore_existing_data_limits = True
+        self.axes.autoscale(True)
+
+    def save(self, file_path, handles=None, labels=None, dpi=300):
+        """
+        Adds the legend, saves the figure and clears it for the next export.
+
+        Parameters:
+        file_path (str): Path of the exported image.
+        handles, labels (list): Legend entries. Default: the labels of the data artists.
+        dpi (int): Resolution of the exported image.
+        """
+        if handles is None:
+            handles, labels = self.axes.get_legend_handles_labels()
+        if labels:
+            self.axes.legend(handles, labels, loc='best', framealpha=0.7)
+
+        self.axes.autoscale_view()
+        try:
+            self.figure.savefig(file_path, dpi=dpi, bbox_inches="tight")
+        finally:
+            self.clear()
+
+
+def figure_template(kind):
+    """
+    Returns this process's reusable figure for per-file exports of a kind of data.
+
+    Parameters:
+    kind (str): "viscosity" or "thixotropy", see FIGURE_TEMPLATES.
+
+    Returns:
+    FigureTemplate: The template, built on first use.
+    """
+    if kind not in _templates:
+        _templates[kind] = FigureTemplate(**FIGURE_TEMPLATES[kind])
+    return _templates[kind]
+
+
+def plot_viscosity_data(df, fig_name, export_path, sweep_types=None, datasets=None, colors=None, markers=None,
+                        template=None):
     """
     Plots viscosity data for one or multiple datasets and sweep types.
 
     Parameters:
-    df (pd.DataFrame or list): DataFrame(s) containing sweep data.
+    df (pd.DataFrame or iterable): DataFrame(s) containing sweep data. A generator is consumed lazily.
     fig_name (str): Filename for the exported plot.
     export_path (str): Directory where the plot will be saved.
     sweep_types (str or list): "FORWARD", "REVERSE", or a list of both. Default: all available.
     datasets (list): Names for each dataset. Default: "Dataset" or "Dataset 1", "Dataset 2", etc.
     colors (list): Colors for plots. Default: matplotlib default colors.
     markers (list): Markers for plots. Default: matplotlib default markers.
+    template (FigureTemplate): Reusable figure to draw into, e.g. figure_template("viscosity")
+                               for per-file exports. Default: a new figure.
     """
     x_col, y_col = "Shear rate", "Viscosity"
 
     # Convert single DataFrame to list
-    if not isinstance(df, list):
-        df = [df]
+    df = _as_datasets(df, datasets)
+    n_datasets = len(df) if isinstance(df, list) else len(datasets)
 
     # Set default dataset names
     if datasets is None:
@@ -31,7 +155,9 @@ def plot_viscosity_data(df, fig_name, export_path, sweep_types=None, datasets=No
     markers = ['o', 's', '^', 'D', 'v', '<', '>', 'p', '*', 'h'] if markers is None else markers
 
     # Create plot
-    plt.figure(figsize=(10, 8))
+    # Reused templates may hold the artists of an export that failed
+    template = template or FigureTemplate(f"{x_col} (1/s)", f"{y_col} (Pa.s)")
+    template.clear()
     all_labels = []
     all_handles = []
 
@@ -60,7 +186,7 @@ def plot_viscosity_data(df, fig_name, export_path, sweep_types=None, datasets=No
             marker_idx = (i * len(sweep_list) + j) % len(markers)
 
             # Create label based on context
-            if len(df) == 1:
+            if n_datasets == 1:
                 if len(sweep_list) == 1:
                     label = dataset_name  # For single dataset, just the dataset name
                 else:
@@ -69,7 +195,7 @@ def plot_viscosity_data(df, fig_name, export_path, sweep_types=None, datasets=No
                 label = f"{dataset_name} - {sweep} Sweep"  # Multiple datasets with sweep types
 
             # Plot data
-            scatter = plt.scatter(
+            scatter = template.scatter(
                 selected_data[x_col],
                 selected_data[y_col],
                 label=label,
@@ -82,21 +208,9 @@ def plot_viscosity_data(df, fig_name, export_path, sweep_types=None, datasets=No
             all_handles.append(scatter)
             all_labels.append(label)
 
-    # Set plot attributes
-    plt.xlabel(f"{x_col} (1/s)")
-    plt.ylabel(f"{y_col} (Pa.s)")
-    plt.xscale("log")
-    plt.yscale("log")
-    plt.grid(True, which="both", linestyle="--", linewidth=0.5)
-
-    # Add legend
-    if all_labels:
-        plt.legend(all_handles, all_labels, loc='best', framealpha=0.7)
-
-    # Save the figure
+    # Save the figure with its legend
     os.makedirs(export_path, exist_ok=True)
-    plt.savefig(os.path.join(export_path, fig_name), dpi=300, bbox_inches="tight")
-    plt.close()
+    template.save(os.path.join(export_path, fig_name), all_handles, all_labels)
 
 
 def plot_diff_viscosity_data(df, fig_name, export_path, sweep_types=None, datasets=None, colors=None, markers=None):
@@ -183,20 +297,21 @@ def plot_diff_viscosity_data(df, fig_name, export_path, sweep_types=None, datase
     plt.close()
 
 
-def plot_thixotropy_data(df_list, fig_name, export_path, datasets=None, colors=None, markers=None):
+def plot_thixotropy_data(df_list, fig_name, export_path, datasets=None, colors=None, markers=None, template=None):
     """
     Plots viscosity vs time for one or multiple thixotropy datasets.
 
     Parameters:
-    df_list (list of pd.DataFrame): A single or a list of DataFrames containing thixotropy data.
+    df_list (list of pd.DataFrame): A single or a list (or generator) of DataFrames containing thixotropy data.
     fig_name (str): Filename for the exported plot.
     export_path (str): Directory where the plot will be saved.
     datasets (list): Names for each dataset. Default: "Dataset 1", "Dataset 2", etc.
     colors (list): Colors for plots. Default: matplotlib default colors.
     markers (list): Markers for plots. Default: predefined markers.
+    template (FigureTemplate): Reusable figure to draw into, e.g. figure_template("thixotropy")
+                               for per-file exports. Default: a new figure.
     """
-    if not isinstance(df_list, list):
-        df_list = [df_list]
+    df_list = _as_datasets(df_list, datasets)
 
     if datasets is None:
         datasets = [f"Dataset {i + 1}" for i in range(len(df_list))]
@@ -204,7 +319,9 @@ def plot_thixotropy_data(df_list, fig_name, export_path, datasets=None, colors=N
     colors = plt.cm.tab10.colors if colors is None else colors
     markers = ['o', 's', '^', 'D', 'v', '<', '>', 'p', '*', 'h'] if markers is None else markers
 
-    plt.figure(figsize=(10, 8))
+    # Reused templates may hold the artists of an export that failed
+    template = template or FigureTemplate("Time (s)", "Viscosity (Pa.s)", log_x=False)
+    template.clear()
 
     # Added this to pass the dataset as an entire string and not a character
     if isinstance(datasets, str):
@@ -216,7 +333,7 @@ def plot_thixotropy_data(df_list, fig_name, export_path, datasets=None, colors=N
         if "Time" not in df.columns or "Viscosity" not in df.columns:
             raise ValueError(f"Dataset {dataset_name} is missing required columns: 'Time' and 'Viscosity'")
 
-        plt.scatter(
+        template.scatter(
             df["Time"], df["Viscosity"],
             label=dataset_name,
             color=colors[i % len(colors)],
@@ -225,13 +342,273 @@ def plot_thixotropy_data(df_list, fig_name, export_path, datasets=None, colors=N
             s=5
         )
 
-    plt.xlabel("Time (s)")
+    os.makedirs(export_path, exist_ok=True)
+    template.save(os.path.join(export_path, fig_name))
+
+
+def plot_replicate_bands(groups, fig_name, export_path, x_label="Shear rate (1/s)", log_x=True,
+                         band="CI", colors=None):
+    """
+    Plots the mean curve of every replicate group with a shaded band.
+
+    Parameters:
+    groups (dict): Group name mapped to an aggregate_curves DataFrame
+                   (columns "x", "Mean", "Std", "CI low", "CI high").
+    fig_name (str): Filename for the exported plot.
+    export_path (str): Directory where the plot will be saved.
+    x_label (str): Label of the x axis, e.g. "Time (s)".
+    log_x (bool): Logarithmic x axis (for flow curves).
+    band (str): "CI" for the confidence interval of the mean or "Std" for mean +/- one
+                standard deviation.
+    colors (list): Colors for plots. Default: matplotlib default colors.
+    """
+    colors = plt.cm.tab10.colors if colors is None else colors
+
+    plt.figure(figsize=(10, 8))
+
+    for i, (group, stats) in enumerate(groups.items()):
+        color = colors[i % len(colors)]
+        if band == "Std":
+            low, high = stats["Mean"] - stats["Std"], stats["Mean"] + stats["Std"]
+        else:
+            low, high = stats["CI low"], stats["CI high"]
+
+        n_max = int(stats["N"].max()) if len(stats) else 0
+        plt.plot(stats["x"], stats["Mean"], color=color, label=f"{group} (n={n_max})")
+        plt.fill_between(stats["x"], low, high, color=color, alpha=0.25, linewidth=0)
+
+    plt.xlabel(x_label)
     plt.ylabel("Viscosity (Pa.s)")
+    if log_x:
+        plt.xscale("log")
     plt.yscale("log")
     plt.grid(True, which="both", linestyle="--", linewidth=0.5)
-    plt.grid(True, linestyle="--", linewidth=0.5)
     plt.legend(loc='best', framealpha=0.7)
 
     os.makedirs(export_path, exist_ok=True)
     plt.savefig(os.path.join(export_path, fig_name), dpi=300, bbox_inches="tight")
-    plt.close()
\ No newline at end of file
+    plt.close()
+
+
+# Rows and columns of subplots on each page of a small-multiples plot
+SMALL_MULTIPLES_LAYOUT = (4, 4)
+
+
+def _sample_series(df, kind, sweep_types=None):
+    """Returns the (label, x, y) arrays plotted for one sample in a small-multiples plot."""
+    if kind == "thixotropy":
+        return [("", df["Time"].to_numpy(dtype=float), df["Viscosity"].to_numpy(dtype=float))]
+
+    available_sweeps = list(df["Sweep"].unique())
+    sweep_list = available_sweeps if sweep_types is None else \
+        [sweep_types] if isinstance(sweep_types, str) else sweep_types
+    return [(sweep, df.loc[df["Sweep"] == sweep, "Shear rate"].to_numpy(dtype=float),
+             df.loc[df["Sweep"] == sweep, "Viscosity"].to_numpy(dtype=float))
+            for sweep in sweep_list if sweep in available_sweeps]
+
+
+def _axis_limits(values, log):
+    """Returns (low, high) limits covering all finite (and, on a log axis, positive) values."""
+    values = values[np.isfinite(values) & (values > 0)] if log else values[np.isfinite(values)]
+    if len(values) == 0:
+        return None
+    low, high = values.min(), values.max()
+    if log:
+        return low / 1.2, high * 1.2
+    margin = (high - low) * 0.05 or 1.0
+    return low - margin, high + margin
+
+
+def _build_page(layout, spec):
+    """
+    Builds the figure and the styled subplot grid of a small-multiples page.
+
+    The grid is built once per worker and reused for every page it renders,
+    see _fill_page.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import NullLocator
+
+    rows, cols = layout
+    fig = Figure(figsize=(cols * 3, rows * 2.5))
+    axes = fig.subplots(rows, cols, sharex=True, sharey=True, squeeze=False)
+
+    ax = axes[0, 0]
+    if spec["log_x"]:
+        ax.set_xscale("log")
+    if spec["log_y"]:
+        ax.set_yscale("log")
+    if spec["xlim"]:
+        ax.set_xlim(*spec["xlim"])
+    if spec["ylim"]:
+        ax.set_ylim(*spec["ylim"])
+    # Major ticks only: hundreds of subplots with minor log ticks are slow to draw
+    for ax in axes.flat:
+        ax.xaxis.set_minor_locator(NullLocator())
+        ax.yaxis.set_minor_locator(NullLocator())
+        ax.grid(True, which="major", linestyle="--", linewidth=0.3)
+        ax.tick_params(labelsize=6)
+
+    fig.supxlabel(spec["x_label"])
+    fig.supylabel(spec["y_label"])
+    fig.subplots_adjust(left=0.07, right=0.98, bottom=0.07, top=0.92, wspace=0.08, hspace=0.3)
+    return fig, axes
+
+
+def _fill_page(fig, axes, samples, spec):
+    """Replaces the data of a page built by _build_page with the next samples, one per subplot."""
+    colors = spec["colors"]
+    cols = axes.shape[1]
+
+    for legend in fig.legends:
+        legend.remove()
+
+    for i, ax in enumerate(axes.flat):
+        for line in list(ax.lines):
+            line.remove()
+
+        # Unused cells of the last page are hidden; the cells above them show the x ticks
+        ax.set_visible(i < len(samples))
+        ax.xaxis.set_tick_params(labelbottom=i + cols >= len(samples))
+
+    for ax, (name, series) in zip(axes.flat, samples):
+        for j, (label, x, y) in enumerate(series):
+            ax.plot(x, y, linestyle="", marker="o", markersize=2, alpha=0.7, color=colors[j % len(colors)],
+                    label=label or None)
+        ax.set_title(name, fontsize=8)
+
+    if not samples:
+        fig.text(0.5, 0.5, "No samples", ha="center", va="center", fontsize=14)
+
+    # One legend for the page (the sweeps are the same in every subplot)
+    handles, labels = axes[0, 0].get_legend_handles_labels()
+    if len(handles) > 1:
+        fig.legend(handles, labels, loc="upper right", fontsize=8, markerscale=2)
+
+
+def _render_pages(job):
+    """
+    Worker entry point: renders a chunk of small-multiples pages.
+
+    Uses matplotlib's object API without pyplot, so it works whatever backend
+    the parent process (e.g. the GUI) has selected.
+    """
+    pages, layout, spec, output_path, page_paths = job
+    fig, axes = _build_page(layout, spec)
+
+    if output_path is not None:
+        # One PDF holding all pages of the chunk
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        with PdfPages(output_path) as pdf:
+            for page in pages:
+                _fill_page(fig, axes, page, spec)
+                pdf.savefig(fig)
+        return [output_path]
+
+    for page, page_path in zip(pages, page_paths):
+        _fill_page(fig, axes, page, spec)
+        fig.savefig(page_path, dpi=150)
+    return page_paths
+
+
+def _can_merge_pdfs():
+    """True if pypdf is installed, so that PDF parts written by several workers can be merged."""
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _merge_pdfs(part_paths, output_path):
+    """Merges PDF files into one and removes the parts."""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for part_path in part_paths:
+        writer.append(part_path)
+    with open(output_path, "wb") as f:
+        writer.write(f)
+    for part_path in part_paths:
+        os.remove(part_path)
+
+
+def plot_small_multiples(samples, fig_name, export_path, kind="viscosity", sweep_types=None,
+                         layout=SMALL_MULTIPLES_LAYOUT, page_format="pdf", max_workers=None, colors=None):
+    """
+    Plots one subplot per sample on paged grids, rendering the pages in parallel.
+
+    All subplots of all pages share the same axis limits so that samples can
+    be compared across pages.
+
+    Parameters:
+    samples (iterable): (name, DataFrame) pairs, e.g. from DataProcessor.iter_viscosity_multiple.
+                        Only the plotted columns of each sample are kept.
+    fig_name (str): Base filename of the output, without extension.
+    export_path (str): Directory where the pages will be saved.
+    kind (str): "viscosity" (viscosity vs shear rate) or "thixotropy" (viscosity vs time).
+    sweep_types (str or list): Sweeps plotted for viscosity data. Default: all available.
+    layout (tuple): (rows, columns) of subplots per page.
+    page_format (str): "pdf" for a multi-page PDF or "png" for one PNG per page.
+    max_workers (int): Worker processes rendering pages. Default: number of CPUs.
+                       With 1 the pages are rendered in this process.
+    colors (list): Colors of the sweeps. Default: matplotlib default colors.
+
+    Returns:
+    list of str: Paths of the written files: one multi-page PDF, or one PNG per page
+                 (one "No samples" page if there are no samples).
+                 Several workers each write part of the PDF and the parts are merged
+                 with pypdf; without pypdf all pages are rendered in this process.
+    """
+    samples = [(name, _sample_series(df, kind, sweep_types)) for name, df in samples]
+
+    # Shared axis limits over all samples
+    log_x = kind != "thixotropy"
+    all_x = np.concatenate([x for _, series in samples for _, x, _ in series] or [np.empty(0)])
+    all_y = np.concatenate([y for _, series in samples for _, _, y in series] or [np.empty(0)])
+    spec = {
+        "x_label": "Shear rate (1/s)" if log_x else "Time (s)",
+        "y_label": "Viscosity (Pa.s)",
+        "log_x": log_x,
+        "log_y": True,
+        "xlim": _axis_limits(all_x, log_x),
+        "ylim": _axis_limits(all_y, True),
+        "colors": list(plt.cm.tab10.colors if colors is None else colors),
+    }
+
+    per_page = layout[0] * layout[1]
+    # Without samples a single page says so, so there is always an output to open
+    pages = [samples[i:i + per_page] for i in range(0, len(samples), per_page)] or [[]]
+    os.makedirs(export_path, exist_ok=True)
+
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(pages)))
+    if page_format == "pdf" and not _can_merge_pdfs():
+        # Parts could not be merged: write the single PDF from one process
+        max_workers = 1
+    chunk_size = -(-len(pages) // max_workers) if pages else 1
+    chunks = [pages[i:i + chunk_size] for i in range(0, len(pages), chunk_size)]
+
+    if page_format == "pdf":
+        if len(chunks) <= 1:
+            output_paths = [os.path.join(export_path, f"{fig_name}.pdf")]
+        else:
+            output_paths = [os.path.join(export_path, f"{fig_name}.part{k + 1}.pdf") for k in range(len(chunks))]
+        jobs = [(chunk, layout, spec, path, None) for chunk, path in zip(chunks, output_paths)]
+    else:
+        page_paths = [os.path.join(export_path, f"{fig_name}-page{i + 1:03d}.png") for i in range(len(pages))]
+        jobs = [(chunk, layout, spec, None, page_paths[k * chunk_size:(k + 1) * chunk_size])
+                for k, chunk in enumerate(chunks)]
+
+    if max_workers == 1 or len(jobs) < 2:
+        written = [path for job in jobs for path in _render_pages(job)]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            written = [path for paths in executor.map(_render_pages, jobs) for path in paths]
+
+    if page_format == "pdf" and len(written) > 1:
+        merged_path = os.path.join(export_path, f"{fig_name}.pdf")
+        _merge_pdfs(written, merged_path)
+        return [merged_path]
+
+    return written
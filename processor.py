@@ -1,37 +1,166 @@
 from data_import import *
 from plotting import *
 from data_analysis import calculate_viscosity_ratio, calculate_thixotropic_index, \
-    calculate_80_percent_viscosity_recovery, calculate_structural_recovery
-import pandas as pd
+    calculate_80_percent_viscosity_recovery, calculate_structural_recovery, calculate_recovery_times, \
+    calculate_recovery_times_batch, calculate_cycle_metrics, extract_recovery_curve, RECOVERY_THRESHOLDS, \
+    viscosity_at_shear_rates_table, QC_SHEAR_RATES, flow_curve, recovery_time_column
+from recovery_kinetics import fit_recovery_curves, kinetics_metrics
+from yield_stress import estimate_yield_stress, yield_stress_metrics
+from lazy_imports import lazy_import
+from instrumentation import StageTimer, profiling_requested, memory_profiling_requested
+from excel_export import results_to_long, long_to_wide, write_excel_streaming
+from archive import write_archive
+from fleet_archive import FleetArchive
+from shared_arrays import load_shared_multiple
+from sample import RheologySample
+from replicates import DEFAULT_GROUP_PATTERN, aggregate_viscosity_groups, \
+    aggregate_thixotropy_groups, aggregate_metrics
+from outliers import screen_viscosity, screen_thixotropy
+from dedup import DuplicateFilter, REPORT_COLUMNS
+from isolation import IsolatedWorker, DEFAULT_TIMEOUT, DEFAULT_MEMORY_LIMIT
+import itertools
 import re
 import os
 
+pd = lazy_import("pandas")
+
 
 class DataProcessor:
-    def __init__(self, output_directory):
+    def __init__(self, output_directory, profile=None, profile_memory=None, isolate=False,
+                 timeout=DEFAULT_TIMEOUT, memory_limit=DEFAULT_MEMORY_LIMIT):
         """
         Initialize the DataProcessor class.
 
         Parameters:
         output_directory (str): Directory where processed data and plots will be saved.
+        profile (bool): Record per-stage timings (load, transform, analyze, render, export)
+                        in self.timer. Default: on if the RHEOLOGY_PROFILE environment
+                        variable is set to 1/true/yes/on/memory.
+        profile_memory (bool): Also record peak RSS and the top tracemalloc allocators of
+                               every stage. Default: on if RHEOLOGY_PROFILE is set to memory.
+        isolate (bool): Parse every file in a separate worker process, so that a file that
+                        hangs or crashes the parser fails alone (see isolation.py).
+        timeout (float): With isolate, seconds a file may take to parse.
+        memory_limit (int): With isolate, memory ceiling of the worker in bytes (None: no ceiling).
         """
 
         self.output_directory = output_directory
         os.makedirs(self.output_directory, exist_ok=True)
 
-    def process_viscosity_single(self, file_path, sweep_type):
+        self.timer = StageTimer(
+            enabled=profiling_requested() if profile is None else profile,
+            memory=memory_profiling_requested() if profile_memory is None else profile_memory
+        )
+
+        # Duplicate filter of the last batch run with deduplicate=True
+        self._duplicates = None
+
+        self._parser = IsolatedWorker(timeout, memory_limit) if isolate else None
+
+    def _parse(self, function, file_path, *args):
+        """Run a parsing function on a file, in the isolated worker if isolation is on."""
+        if self._parser is None:
+            return function(file_path, *args)
+        return self._parser.read(function, file_path, *args)
+
+    def _load_viscosity(self, file_path):
+        """Load a viscosity file, timing the parsing and the merging of the sweeps separately."""
+        with self.timer.span("load", file_path):
+            sheets = self._parse(read_trios_sheets, file_path, VISCOSITY_SHEETS)
+        with self.timer.span("transform", file_path):
+            return merge_viscosity_sheets(sheets)
+
+    def _load_thixotropy(self, file_path):
+        """Load a thixotropy file, timing the parsing and the merging of the peak holds separately."""
+        with self.timer.span("load", file_path):
+            sheets = self._parse(read_trios_sheets, file_path, THIXOTROPY_SHEETS)
+        with self.timer.span("transform", file_path):
+            return merge_thixotropy_sheets(sheets)
+
+    def _load_peak_hold_steps(self, file_path):
+        """Load every peak-hold step of a multi-cycle thixotropy file."""
+        with self.timer.span("load", file_path):
+            return self._parse(load_peak_hold_steps, file_path)
+
+    def _unique_files(self, file_paths, deduplicate):
+        """
+        Start duplicate detection for a batch if requested.
+
+        Returns:
+        tuple: (files left after dropping byte-identical copies, DuplicateFilter to check
+               the loaded data with), or (file_paths, None) without deduplication.
+        """
+        if not deduplicate:
+            return file_paths, None
+
+        self._duplicates = DuplicateFilter()
+        with self.timer.span("load", "duplicate check"):
+            return self._duplicates.unique_files(file_paths), self._duplicates
+
+    def duplicate_report(self):
+        """
+        List the files dropped as duplicates by the last batch run with deduplicate=True.
+
+        Returns:
+        pd.DataFrame: One row per dropped file with the columns File, Duplicate of (the file
+                      that was processed instead) and Match ("bytes" for identical files,
+                      "payload" for different files holding the same data).
+        """
+        if self._duplicates is None:
+            return pd.DataFrame(columns=REPORT_COLUMNS)
+        return self._duplicates.report()
+
+    def find_duplicates(self, file_paths, kind="thixotropy"):
+        """
+        Find repeated exports of the same run without analyzing them.
+
+        Byte-identical copies are found without parsing; the remaining files are
+        loaded and compared by their data.
+
+        Parameters:
+        file_paths (list of str): Paths to the data files.
+        kind (str): "viscosity" or "thixotropy".
+
+        Returns:
+        pd.DataFrame: See duplicate_report.
+        """
+        load = self._load_viscosity if kind == "viscosity" else self._load_thixotropy
+        file_paths, duplicates = self._unique_files(file_paths, True)
+        for file_path in file_paths:
+            try:
+                duplicates.is_duplicate(file_path, load(file_path))
+            except Exception:
+                # Files that cannot be loaded are not duplicates of anything
+                continue
+        return duplicates.report()
+
+    def write_timing_report(self, file_path):
+        """
+        Write the recorded stage timings to a JSON or CSV report.
+
+        Parameters:
+        file_path (str): Path of the report; the format follows the extension (.json or .csv).
+
+        Returns:
+        str: The path that was written.
+        """
+        return self.timer.write_report(file_path)
+
+    def process_viscosity_single(self, file_path, sweep_type, df=None):
         """
         Process a single viscosity data file and generate a plot.
 
         Parameters:
         file_path (str): Path to the viscosity data file.
         sweep_type (str or list): Type of sweep (e.g., 'up', 'down', or ['up', 'down']).
+        df (pd.DataFrame): The file's data if it is already loaded.
 
         Returns:
         tuple: DataFrame containing processed data, filename of the generated plot, full path of the output file.
         """
         # Load data
-        df = load_viscosity_stress_data(file_path)
+        if df is None:
+            df = self._load_viscosity(file_path)
 
         # Generate filename
         fig_name = os.path.splitext(os.path.basename(file_path))[0]
@@ -47,38 +176,72 @@ class DataProcessor:
         name = re.split('[-_]', fig_name)[0]
 
         # Plot data
-        plot_viscosity_data(
-            df=df,
-            fig_name=fig_name,
-            export_path=self.output_directory,
-            sweep_types=sweep_type,
-            datasets=name
-        )
+        with self.timer.span("render", file_path):
+            plot_viscosity_data(
+                df=df,
+                fig_name=fig_name,
+                export_path=self.output_directory,
+                sweep_types=sweep_type,
+                datasets=name,
+                template=figure_template("viscosity")
+            )
 
         return df, fig_name, full_output_path
 
-    def process_viscosity_multiple(self, file_paths, sweep_type):
+    def iter_viscosity_multiple(self, file_paths):
+        """
+        Load viscosity data files one at a time.
+
+        Only the DataFrame of the current file is referenced by the generator, so
+        memory use does not grow with the number of files.
+
+        Parameters:
+        file_paths (list of str): List of paths to viscosity data files.
+
+        Yields:
+        tuple: (dataset name, DataFrame) for each file, in order.
+        """
+        for file_path in file_paths:
+            # Use filename as dataset name
+            name = os.path.splitext(os.path.basename(file_path))[0].split('_')[0]
+            yield name, self._load_viscosity(file_path)
+
+    @staticmethod
+    def _drop_duplicate_frames(file_paths, dataframes, dataset_names, duplicates):
+        """Drop the loaded files whose data duplicates an earlier file, with their names."""
+        kept = [i for i, (file_path, df) in enumerate(zip(file_paths, dataframes))
+                if not duplicates.is_duplicate(file_path, df)]
+        return [dataframes[i] for i in kept], [dataset_names[i] for i in kept]
+
+    def process_viscosity_multiple(self, file_paths, sweep_type, keep_dataframes=True, deduplicate=False):
         """
         Process multiple viscosity data files and generate a comparative plot.
 
         Parameters:
         file_paths (list of str): List of paths to viscosity data files.
         sweep_type (str or list): Type of sweep (e.g., 'up', 'down', or ['up', 'down']).
+        keep_dataframes (bool): If False, the files are streamed into the plot one at a
+                                time and no DataFrame is kept or returned (streaming mode).
+                                The render timing then includes loading.
+        deduplicate (bool): Skip repeated exports of the same run, see duplicate_report.
+                            In streaming mode only byte-identical copies are skipped.
 
         Returns:
-        tuple: List of DataFrames, list of dataset names, filename of the generated plot, full path of the output file.
+        tuple: List of DataFrames (None in streaming mode), list of dataset names, filename of the generated plot,
+               full path of the output file.
         """
-        # Load all datasets
-        dataframes = []
-        dataset_names = []
+        file_paths, duplicates = self._unique_files(file_paths, deduplicate)
 
-        for file_path in file_paths:
-            df = load_viscosity_stress_data(file_path)
-            dataframes.append(df)
+        # Use filename as dataset name
+        dataset_names = [os.path.splitext(os.path.basename(file_path))[0].split('_')[0]
+                         for file_path in file_paths]
 
-            # Use filename as dataset name
-            name = os.path.splitext(os.path.basename(file_path))[0].split('_')[0]
-            dataset_names.append(name)
+        # Load all datasets, or stream them into the plot
+        datasets = (df for _, df in self.iter_viscosity_multiple(file_paths))
+        dataframes = list(datasets) if keep_dataframes else None
+        if keep_dataframes and duplicates is not None:
+            dataframes, dataset_names = self._drop_duplicate_frames(file_paths, dataframes, dataset_names,
+                                                                    duplicates)
 
         # Generate filename
         fig_name = "comparison"
@@ -91,13 +254,14 @@ class DataProcessor:
         full_output_path = os.path.join(self.output_directory, fig_name)
 
         # Plot data
-        plot_viscosity_data(
-            df=dataframes,
-            fig_name=fig_name,
-            export_path=self.output_directory,
-            sweep_types=sweep_type,
-            datasets=dataset_names
-        )
+        with self.timer.span("render", fig_name):
+            plot_viscosity_data(
+                df=dataframes if keep_dataframes else datasets,
+                fig_name=fig_name,
+                export_path=self.output_directory,
+                sweep_types=sweep_type,
+                datasets=dataset_names
+            )
 
         return dataframes, dataset_names, fig_name, full_output_path
 
@@ -113,7 +277,7 @@ class DataProcessor:
         tuple: DataFrame containing processed data, filename of the generated plot, full path of the output file.
         """
         # Load data
-        df = load_viscosity_stress_data(file_path)
+        df = self._load_viscosity(file_path)
 
         # Generate filename
         fig_name = os.path.splitext(os.path.basename(file_path))[0]
@@ -126,27 +290,31 @@ class DataProcessor:
         full_output_path = os.path.join(self.output_directory, fig_name)
 
         # Plot data
-        plot_diff_viscosity_data(
-            df=df,
-            fig_name=fig_name,
-            export_path=self.output_directory,
-            sweep_types=sweep_type
-        )
+        with self.timer.span("render", file_path):
+            plot_diff_viscosity_data(
+                df=df,
+                fig_name=fig_name,
+                export_path=self.output_directory,
+                sweep_types=sweep_type
+            )
 
         return df, fig_name, full_output_path
 
-    def process_thixotropy_single(self, file_path):
+    def process_thixotropy_single(self, file_path, df=None):
         """
         Process a single thixotropy data file and generate a plot.
 
         Parameters:
         file_path (str): Path to the thixotropy data file.
+        df (pd.DataFrame): The file's data if it is already loaded (e.g. by
+                           analyze_thixotropy_single), so it is not parsed again.
 
         Returns:
         tuple: DataFrame containing processed data, filename of the generated plot, full path of the output file.
         """
         # Load data
-        df = load_thixotropy_data(file_path)
+        if df is None:
+            df = self._load_thixotropy(file_path)
 
         # Generate filename
         fig_name = os.path.splitext(os.path.basename(file_path))[0]
@@ -158,36 +326,115 @@ class DataProcessor:
         name = re.split('[-_]', fig_name)[0]
 
         # Plot data
-        plot_thixotropy_data(
-            df_list=df,
-            fig_name=fig_name,
-            export_path=self.output_directory,
-            datasets=name
-        )
+        with self.timer.span("render", file_path):
+            plot_thixotropy_data(
+                df_list=df,
+                fig_name=fig_name,
+                export_path=self.output_directory,
+                datasets=name,
+                template=figure_template("thixotropy")
+            )
 
         return df, fig_name, full_output_path
 
-    def process_thixotropy_multiple(self, file_paths):
+    def iter_thixotropy_multiple(self, file_paths):
         """
-        Process multiple thixotropy data files and generate a comparative plot.
+        Load thixotropy data files one at a time.
+
+        Only the DataFrame of the current file is referenced by the generator, so
+        memory use does not grow with the number of files.
 
         Parameters:
         file_paths (list of str): List of paths to thixotropy data files.
 
+        Yields:
+        tuple: (dataset name, DataFrame) for each file, in order.
+        """
+        for file_path in file_paths:
+            # Use filename as dataset name
+            name = os.path.splitext(os.path.basename(file_path))[0]
+            yield name, self._load_thixotropy(file_path)
+
+    def load_samples(self, file_paths, kind="thixotropy", by_path=False):
+        """
+        Load many files as compact RheologySample objects.
+
+        Only one DataFrame exists at a time; each file is kept as float64 arrays
+        with int8 sweep/phase codes. Use sample.to_frame() where a DataFrame is needed.
+
+        Parameters:
+        file_paths (list of str): Paths to the data files.
+        kind (str): "viscosity" or "thixotropy".
+        by_path (bool): Key the samples by file path instead of by sample name, so that
+                        files with the same name in different folders are all kept.
+
         Returns:
-        tuple: List of DataFrames, list of dataset names, filename of the generated plot, full path of the output file.
+        dict: Sample names (or file paths) mapped to a RheologySample, or to
+              {"Error": message} for files that could not be loaded.
         """
-        # Load all datasets
-        dataframes = []
-        dataset_names = []
+        load = self._load_viscosity if kind == "viscosity" else self._load_thixotropy
+        samples = {}
 
         for file_path in file_paths:
-            df = load_thixotropy_data(file_path)
-            dataframes.append(df)
-
-            # Use filename as dataset name
             name = os.path.splitext(os.path.basename(file_path))[0]
-            dataset_names.append(name)
+            key = file_path if by_path else name
+            try:
+                samples[key] = RheologySample.from_frame(load(file_path), name, file_path, kind)
+            except Exception as e:
+                samples[key] = {"Error": f"Failed to load file: {str(e)}"}
+
+        return samples
+
+    def load_shared(self, file_paths, kind="thixotropy", max_workers=None):
+        """
+        Load many files in parallel worker processes without copying the data back.
+
+        The workers place the parsed arrays in shared memory and only send a small
+        descriptor to this process, which wraps the blocks as NumPy arrays.
+
+        Parameters:
+        file_paths (list of str): Paths to the data files.
+        kind (str): "viscosity" or "thixotropy".
+        max_workers (int): Worker processes. Default: number of CPUs.
+
+        Returns:
+        dict: Sample names mapped to a shared_arrays.SharedSample (use .frame() for a
+              DataFrame and .release() once the sample is no longer needed), or to
+              {"Error": message} for files that could not be loaded.
+        """
+        with self.timer.span("load", f"{len(file_paths)} {kind} files"):
+            samples = load_shared_multiple(file_paths, kind, max_workers)
+
+        names = [os.path.splitext(os.path.basename(file_path))[0] for file_path in file_paths]
+        return dict(zip(names, samples))
+
+    def process_thixotropy_multiple(self, file_paths, keep_dataframes=True, deduplicate=False):
+        """
+        Process multiple thixotropy data files and generate a comparative plot.
+
+        Parameters:
+        file_paths (list of str): List of paths to thixotropy data files.
+        keep_dataframes (bool): If False, the files are streamed into the plot one at a
+                                time and no DataFrame is kept or returned (streaming mode).
+                                The render timing then includes loading.
+        deduplicate (bool): Skip repeated exports of the same run, see duplicate_report.
+                            In streaming mode only byte-identical copies are skipped.
+
+        Returns:
+        tuple: List of DataFrames (None in streaming mode), list of dataset names, filename of the generated plot,
+               full path of the output file.
+        """
+        file_paths, duplicates = self._unique_files(file_paths, deduplicate)
+
+        # Use filename as dataset name
+        dataset_names = [os.path.splitext(os.path.basename(file_path))[0] for file_path in file_paths]
+
+        # Load all datasets, or stream them into the plot
+        datasets = (df for _, df in self.iter_thixotropy_multiple(file_paths))
+        dataframes = list(datasets) if keep_dataframes else None
+        if keep_dataframes and duplicates is not None:
+            dataframes, dataset_names = self._drop_duplicate_frames(file_paths, dataframes, dataset_names,
+                                                                    duplicates)
 
         # Generate filename
         fig_name = "comparison"
@@ -197,12 +444,13 @@ class DataProcessor:
         print(full_output_path)
 
         # Plot data
-        plot_thixotropy_data(
-            df_list=dataframes,
-            fig_name=fig_name,
-            export_path=self.output_directory,
-            datasets=dataset_names
-        )
+        with self.timer.span("render", fig_name):
+            plot_thixotropy_data(
+                df_list=dataframes if keep_dataframes else datasets,
+                fig_name=fig_name,
+                export_path=self.output_directory,
+                datasets=dataset_names
+            )
 
         return dataframes, dataset_names, fig_name, full_output_path
 
@@ -240,13 +488,20 @@ class DataProcessor:
             structural_recovery = calculate_structural_recovery(df)
 
             # Return a dictionary of results
-            return {
+            results = {
                 "Viscosity Ratio (%)": viscosity_ratio,
                 "Thixotropic Index": thixotropic_index,
                 "80% Recovery Time (s)": recovery_time_80_percent,
                 "Structural Recovery (%)": structural_recovery
             }
 
+            # Interpolated first crossing of every recovery level (80% included, next to the
+            # closest-point "80% Recovery Time (s)" above)
+            for threshold, recovery_time in calculate_recovery_times(df, RECOVERY_THRESHOLDS).items():
+                results[recovery_time_column(threshold)] = recovery_time
+
+            return results
+
         except Exception as e:
             # Handle errors by returning a dict with error message
             return {"Error": str(e)}
@@ -261,29 +516,57 @@ class DataProcessor:
         Returns:
         tuple: (DataFrame with the data, dict with the results)
         """
+        return self._analyze_thixotropy_file(file_path)
+
+    def _analyze_thixotropy_file(self, file_path, duplicates=None):
+        """
+        analyze_thixotropy_single, checking the loaded data for duplicates first.
+
+        Returns:
+        tuple: As analyze_thixotropy_single, or (DataFrame, None) if the data duplicates
+               a file loaded before; no metrics are calculated then.
+        """
         try:
             # Load the data
-            df = load_thixotropy_data(file_path)
+            df = self._load_thixotropy(file_path)
+            if duplicates is not None and duplicates.is_duplicate(file_path, df):
+                return df, None
 
             # Calculate metrics
-            results = self.calculate_thixotropy_metrics(df)
+            with self.timer.span("analyze", file_path):
+                results = self.calculate_thixotropy_metrics(df)
 
             return df, results
 
         except Exception as e:
             return None, {"Error": f"Failed to analyze file: {str(e)}"}
 
-    def analyze_thixotropy_multiple(self, file_paths):
+    def analyze_thixotropy_multiple(self, file_paths, kinetics_model=None, max_workers=None, outliers=None,
+                                    pattern=DEFAULT_GROUP_PATTERN, deduplicate=False):
         """
         Load and analyze multiple thixotropy data files.
 
         Parameters:
         file_paths (list): List of paths to thixotropy data files.
+        kinetics_model (str): If given ("exponential", "stretched" or "two_phase"), also fit this
+                              recovery model to every RECOVERY phase and add the time constants
+                              and plateau viscosity to the results.
+        max_workers (int): Worker processes for the kinetics fits. Default: number of CPUs.
+        outliers (str): If given, screen the viscosity-time curves of every replicate group
+                        (see screen_outliers). "flag" adds "Outlier" and "Outlier Score" to the
+                        results; "exclude" replaces the results of outliers by an error so that
+                        they are left out of the kinetics fits, group statistics and export.
+        pattern (str): Regular expression giving the replicate group of a file name.
+        deduplicate (bool): Skip repeated exports of the same run before analyzing them;
+                            the skipped files are listed by duplicate_report.
 
         Returns:
         dict: Dictionary mapping sample names to their results dictionaries.
         """
         all_results = {}
+        recovery_curves = {}
+        screening_curves = {}
+        file_paths, duplicates = self._unique_files(file_paths, deduplicate)
 
         for file_path in file_paths:
             try:
@@ -291,18 +574,558 @@ class DataProcessor:
                 sample_name = os.path.splitext(os.path.basename(file_path))[0]
 
                 # Load and analyze data
-                df, results = self.analyze_thixotropy_single(file_path)
+                df, results = self._analyze_thixotropy_file(file_path, duplicates)
+                if results is None:
+                    continue
 
                 # Store results with sample name as key
                 all_results[sample_name] = results
 
+                if df is not None and "Error" not in results:
+                    if kinetics_model:
+                        _, step_time, viscosity = extract_recovery_curve(df)
+                        recovery_curves[sample_name] = (step_time, viscosity)
+                    if outliers:
+                        screening_curves[sample_name] = (df["Time"].to_numpy(), df["Viscosity"].to_numpy())
+
             except Exception as e:
                 all_results[os.path.basename(file_path)] = {"Error": f"Failed to analyze file: {str(e)}"}
 
+        # Screen all curves at once, before the fits and the export
+        if screening_curves:
+            with self.timer.span("analyze", "outlier screening"):
+                screening = screen_thixotropy(screening_curves, pattern)
+            for sample_name, row in screening.iterrows():
+                if outliers == "exclude" and row["Outlier"]:
+                    all_results[sample_name] = {
+                        "Error": f"Excluded as an outlier of group {row['Group']} (score {row['Score']:.1f})"}
+                    recovery_curves.pop(sample_name, None)
+                elif outliers == "flag":
+                    all_results[sample_name]["Outlier"] = bool(row["Outlier"])
+                    all_results[sample_name]["Outlier Score"] = row["Score"]
+
+        # Fit all recovery curves at once so that the fits run in parallel
+        if recovery_curves:
+            with self.timer.span("analyze", "recovery kinetics"):
+                fits = fit_recovery_curves(list(recovery_curves.values()), kinetics_model, max_workers)
+            for sample_name, fit in zip(recovery_curves, fits):
+                all_results[sample_name].update(kinetics_metrics(fit))
+
+        return all_results
+
+    def screen_outliers(self, file_paths, kind="thixotropy", sweep_type="FORWARD", pattern=DEFAULT_GROUP_PATTERN):
+        """
+        Find replicate curves that deviate from the other replicates of their group.
+
+        Every curve is compared with the median curve of its group on a shared
+        shear-rate or time grid, in log viscosity. Groups of fewer than three
+        files are not screened.
+
+        Parameters:
+        file_paths (list): List of paths to data files.
+        kind (str): "viscosity" or "thixotropy".
+        sweep_type (str): Sweep compared for viscosity files ("FORWARD" or "REVERSE").
+        pattern (str): Regular expression giving the replicate group of a file name.
+
+        Returns:
+        pd.DataFrame: One row per loaded sample with Group, Distance, Score and Outlier
+                      (True for outliers), plus an Error column for files that failed to load.
+        """
+        load = self._load_viscosity if kind == "viscosity" else self._load_thixotropy
+        dataframes = {}
+        errors = {}
+        for file_path in file_paths:
+            sample_name = os.path.splitext(os.path.basename(file_path))[0]
+            try:
+                dataframes[sample_name] = load(file_path)
+            except Exception as e:
+                errors[sample_name] = f"Failed to load file: {str(e)}"
+
+        with self.timer.span("analyze", "outlier screening"):
+            if kind == "viscosity":
+                screening = screen_viscosity(dataframes, sweep_type, pattern)
+            else:
+                screening = screen_thixotropy(dataframes, pattern)
+
+        if errors:
+            screening = screening.reindex(list(screening.index) + list(errors))
+            screening["Error"] = pd.Series(errors)
+
+        return screening
+
+    def fit_recovery_kinetics_multiple(self, file_paths, model="stretched", max_workers=None, deduplicate=False):
+        """
+        Fit a recovery model to the RECOVERY phase of multiple thixotropy files.
+
+        Parameters:
+        file_paths (list): List of paths to thixotropy data files.
+        model (str): "exponential", "stretched" or "two_phase".
+        max_workers (int): Worker processes for the fits. Default: number of CPUs.
+        deduplicate (bool): Skip repeated exports of the same run, see duplicate_report.
+
+        Returns:
+        dict: Dictionary mapping sample names to their fitted kinetics metrics.
+        """
+        all_results = {}
+        recovery_curves = {}
+        file_paths, duplicates = self._unique_files(file_paths, deduplicate)
+
+        for file_path in file_paths:
+            sample_name = os.path.splitext(os.path.basename(file_path))[0]
+            try:
+                df = self._load_thixotropy(file_path)
+                if duplicates is not None and duplicates.is_duplicate(file_path, df):
+                    continue
+                _, step_time, viscosity = extract_recovery_curve(df)
+                recovery_curves[sample_name] = (step_time, viscosity)
+            except Exception as e:
+                all_results[sample_name] = {"Error": f"Failed to analyze file: {str(e)}"}
+
+        with self.timer.span("analyze", "recovery kinetics"):
+            fits = fit_recovery_curves(list(recovery_curves.values()), model, max_workers)
+
+        for sample_name, fit in zip(recovery_curves, fits):
+            all_results[sample_name] = kinetics_metrics(fit)
+
+        return all_results
+
+    def analyze_recovery_times_multiple(self, file_paths, thresholds=RECOVERY_THRESHOLDS, deduplicate=False):
+        """
+        Compute the recovery times of many thixotropy files for several recovery levels.
+
+        All files are loaded first and the crossings are then found for every
+        sample and level in one vectorized pass.
+
+        Parameters:
+        file_paths (list): List of paths to thixotropy data files.
+        thresholds (iterable of float): Recovery levels in percent of the preshear viscosity.
+        deduplicate (bool): Skip repeated exports of the same run, see duplicate_report.
+
+        Returns:
+        pd.DataFrame: One row per file (indexed by sample name, in the order of the files) and one
+                      "<level>% Recovery Crossing Time (s)" column per level, NaN where a level is never
+                      reached. Files with the same name in different folders or formats keep one row
+                      each. Files that could not be loaded have their message in an "Error" column.
+        """
+        columns = [recovery_time_column(threshold) for threshold in thresholds]
+        file_paths, duplicates = self._unique_files(file_paths, deduplicate)
+
+        # Rows are kept by position, as sample names need not be unique
+        sample_names = []
+        dataframes = []
+        loaded_rows = []
+        errors = []
+        for file_path in file_paths:
+            sample_name = os.path.splitext(os.path.basename(file_path))[0]
+            try:
+                df = self._load_thixotropy(file_path)
+            except Exception as e:
+                sample_names.append(sample_name)
+                errors.append(f"Failed to analyze file: {str(e)}")
+                continue
+            if duplicates is None or not duplicates.is_duplicate(file_path, df):
+                loaded_rows.append(len(sample_names))
+                sample_names.append(sample_name)
+                dataframes.append(df)
+                errors.append(None)
+
+        times = pd.DataFrame(float("nan"), index=pd.Index(sample_names), columns=columns)
+        if dataframes:
+            with self.timer.span("analyze", "recovery times"):
+                times.iloc[loaded_rows] = calculate_recovery_times_batch(dataframes, thresholds)
+
+        if any(error is not None for error in errors):
+            times["Error"] = errors
+
+        return times
+
+    def analyze_thixotropy_cycles(self, file_path, thresholds=RECOVERY_THRESHOLDS):
+        """
+        Load a multi-cycle peak-hold file and calculate the metrics of every cycle.
+
+        Parameters:
+        file_path (str): Path to the thixotropy data file.
+        thresholds (iterable of float): Recovery levels in percent of the preshear viscosity.
+
+        Returns:
+        tuple: (DataFrame with the data, DataFrame with one row of metrics per cycle),
+               or (None, {"Error": message}) if the file cannot be analyzed.
+        """
+        return self._analyze_cycles_file(file_path, thresholds)
+
+    def _analyze_cycles_file(self, file_path, thresholds=RECOVERY_THRESHOLDS, duplicates=None):
+        """
+        analyze_thixotropy_cycles, checking the loaded data for duplicates first.
+
+        Returns:
+        tuple: As analyze_thixotropy_cycles, or (DataFrame, None) if the data duplicates
+               a file loaded before.
+        """
+        try:
+            df = self._load_peak_hold_steps(file_path)
+            if duplicates is not None and duplicates.is_duplicate(file_path, df):
+                return df, None
+
+            with self.timer.span("analyze", file_path):
+                cycles = calculate_cycle_metrics(df, thresholds)
+
+            return df, cycles
+
+        except Exception as e:
+            return None, {"Error": f"Failed to analyze file: {str(e)}"}
+
+    def analyze_thixotropy_cycles_multiple(self, file_paths, thresholds=RECOVERY_THRESHOLDS, deduplicate=False):
+        """
+        Load and analyze multiple multi-cycle peak-hold files.
+
+        The metrics of cycle k are named "Cycle k <metric>", so the results can
+        be exported with export_thixotropy_results_multiple.
+
+        Parameters:
+        file_paths (list): List of paths to thixotropy data files.
+        thresholds (iterable of float): Recovery levels in percent of the preshear viscosity.
+        deduplicate (bool): Skip repeated exports of the same run, see duplicate_report.
+
+        Returns:
+        dict: Dictionary mapping sample names to their results dictionaries.
+        """
+        all_results = {}
+        file_paths, duplicates = self._unique_files(file_paths, deduplicate)
+
+        for file_path in file_paths:
+            sample_name = os.path.splitext(os.path.basename(file_path))[0]
+            _, cycles = self._analyze_cycles_file(file_path, thresholds, duplicates)
+
+            if cycles is None:
+                continue
+            if isinstance(cycles, dict):
+                all_results[sample_name] = cycles
+                continue
+
+            all_results[sample_name] = {
+                f"Cycle {cycle} {metric}": value
+                for cycle, row in cycles.iterrows()
+                for metric, value in row.items()
+            }
+
+        return all_results
+
+    def viscosity_at_shear_rates(self, samples, shear_rates=QC_SHEAR_RATES, sweeps=("FORWARD", "REVERSE")):
+        """
+        Tabulate the viscosity of many samples at given shear rates (e.g. QC specs at 1, 10 and 100 1/s).
+
+        The flow curves are interpolated in log-log space, all samples of a sweep
+        in one vectorized pass; rates outside a sample's measured range give NaN.
+
+        Parameters:
+        samples (list or dict): Paths to viscosity data files, or sample names mapped to
+                                loaded data (DataFrames from load_viscosity_stress_data or
+                                RheologySample objects from load_samples(..., "viscosity")).
+        shear_rates (iterable of float): Shear rates to evaluate, in 1/s.
+        sweeps (iterable of str): Sweeps evaluated separately, e.g. ("FORWARD",).
+
+        Returns:
+        pd.DataFrame: One row per sample (indexed by sample name) and one
+                      "<sweep> Viscosity at <rate> 1/s (Pa.s)" column per sweep and rate.
+                      Samples that could not be loaded have their message in an "Error" column.
+        """
+        loaded = {}
+        errors = {}
+        if isinstance(samples, dict):
+            for sample_name, sample in samples.items():
+                if isinstance(sample, dict):
+                    errors[sample_name] = sample.get("Error", "No data")
+                else:
+                    loaded[sample_name] = sample
+        else:
+            for file_path in samples:
+                sample_name = os.path.splitext(os.path.basename(file_path))[0]
+                try:
+                    loaded[sample_name] = self._load_viscosity(file_path)
+                except Exception as e:
+                    errors[sample_name] = f"Failed to analyze file: {str(e)}"
+
+        with self.timer.span("analyze", "viscosity at shear rates"):
+            table = viscosity_at_shear_rates_table(loaded, shear_rates, sweeps)
+
+        if errors:
+            table = table.reindex(list(table.index) + list(errors))
+            table["Error"] = pd.Series(errors)
+
+        return table
+
+    def analyze_yield_stress_single(self, file_path, df=None, sweeps=("FORWARD", "REVERSE")):
+        """
+        Estimate the yield stress of one viscosity file (see analyze_yield_stress_multiple).
+
+        Parameters:
+        file_path (str): Path to the viscosity data file.
+        df (pd.DataFrame): The file's data if it is already loaded, e.g. by process_viscosity_single.
+        sweeps (iterable of str): Sweeps to analyze, e.g. ("FORWARD",).
+
+        Returns:
+        dict: Metrics such as "FORWARD Yield Stress HB (Pa)".
+        """
+        if df is None:
+            df = self._load_viscosity(file_path)
+
+        with self.timer.span("analyze", file_path):
+            estimates = estimate_yield_stress([flow_curve(df, sweep, "Stress") for sweep in sweeps])
+
+        results = {}
+        for i, sweep in enumerate(sweeps):
+            results.update(yield_stress_metrics(estimates, i, f"{sweep} "))
+        return results
+
+    def analyze_yield_stress_multiple(self, file_paths, sweeps=("FORWARD", "REVERSE"), deduplicate=False):
+        """
+        Estimate the yield stress of multiple viscosity files from their stress vs shear rate data.
+
+        Every sweep gets three estimates: a Herschel-Bulkley fit of the whole
+        sweep, a Bingham fit of its upper shear-rate decade extrapolated to
+        zero rate, and the low-rate stress plateau. All sweeps of all files
+        are fitted together in one vectorized pass.
+
+        Parameters:
+        file_paths (list): List of paths to viscosity data files.
+        sweeps (iterable of str): Sweeps to analyze, e.g. ("FORWARD",).
+        deduplicate (bool): Skip repeated exports of the same run, see duplicate_report.
+
+        Returns:
+        dict: Dictionary mapping sample names to their results dictionaries, with metrics
+              such as "FORWARD Yield Stress HB (Pa)"; export them with
+              export_thixotropy_results_multiple.
+        """
+        all_results = {}
+        curves = []
+        file_paths, duplicates = self._unique_files(file_paths, deduplicate)
+
+        for file_path in file_paths:
+            sample_name = os.path.splitext(os.path.basename(file_path))[0]
+            try:
+                df = self._load_viscosity(file_path)
+                if duplicates is not None and duplicates.is_duplicate(file_path, df):
+                    continue
+                for sweep in sweeps:
+                    curves.append((sample_name, sweep, flow_curve(df, sweep, "Stress")))
+                all_results[sample_name] = {}
+            except Exception as e:
+                all_results[sample_name] = {"Error": f"Failed to analyze file: {str(e)}"}
+
+        with self.timer.span("analyze", "yield stress"):
+            estimates = estimate_yield_stress([curve for _, _, curve in curves])
+
+        for i, (sample_name, sweep, _) in enumerate(curves):
+            all_results[sample_name].update(yield_stress_metrics(estimates, i, f"{sweep} "))
+
         return all_results
 
+    # ================ REPLICATE METHODS ================
+
+    def process_viscosity_replicates(self, file_paths, sweep_type="FORWARD", pattern=DEFAULT_GROUP_PATTERN,
+                                     band="CI"):
+        """
+        Group viscosity files into replicates and plot one mean curve with a band per group.
+
+        Parameters:
+        file_paths (list of str): List of paths to viscosity data files.
+        sweep_type (str): "FORWARD" or "REVERSE".
+        pattern (str): Regular expression giving the group of a file name (first capture
+                       group). Default: the text before the first '-' or '_'.
+        band (str): "CI" (95% confidence interval of the mean) or "Std".
+
+        Returns:
+        tuple: Dict of group name to statistics DataFrame (columns x, Mean, Std, N, CI low,
+               CI high), filename of the generated plot, full path of the output file.
+        """
+        dataframes = {os.path.splitext(os.path.basename(file_path))[0]: self._load_viscosity(file_path)
+                      for file_path in file_paths}
+
+        with self.timer.span("analyze", "viscosity replicates"):
+            groups = aggregate_viscosity_groups(dataframes, sweep_type, pattern)
+
+        fig_name = f"replicates-{sweep_type}.png"
+        with self.timer.span("render", fig_name):
+            plot_replicate_bands(groups, fig_name, self.output_directory, band=band)
+
+        return groups, fig_name, os.path.join(self.output_directory, fig_name)
+
+    def process_thixotropy_replicates(self, file_paths, pattern=DEFAULT_GROUP_PATTERN, band="CI"):
+        """
+        Group thixotropy files into replicates and plot one mean curve with a band per group.
+
+        Parameters:
+        file_paths (list of str): List of paths to thixotropy data files.
+        pattern (str): Regular expression giving the group of a file name, see
+                       process_viscosity_replicates.
+        band (str): "CI" (95% confidence interval of the mean) or "Std".
+
+        Returns:
+        tuple: Dict of group name to statistics DataFrame, filename of the generated plot,
+               full path of the output file.
+        """
+        dataframes = {os.path.splitext(os.path.basename(file_path))[0]: self._load_thixotropy(file_path)
+                      for file_path in file_paths}
+
+        with self.timer.span("analyze", "thixotropy replicates"):
+            groups = aggregate_thixotropy_groups(dataframes, pattern)
+
+        fig_name = "replicates-thixotropy.png"
+        with self.timer.span("render", fig_name):
+            plot_replicate_bands(groups, fig_name, self.output_directory, x_label="Time (s)", log_x=False,
+                                 band=band)
+
+        return groups, fig_name, os.path.join(self.output_directory, fig_name)
+
+    def analyze_thixotropy_groups(self, file_paths, pattern=DEFAULT_GROUP_PATTERN, confidence=0.95):
+        """
+        Analyze thixotropy files and aggregate their metrics per replicate group.
+
+        Parameters:
+        file_paths (list): List of paths to thixotropy data files.
+        pattern (str): Regular expression giving the group of a file name, see
+                       process_viscosity_replicates.
+        confidence (float): Confidence level of the interval of the mean.
+
+        Returns:
+        pd.DataFrame: One row per group and metric with Mean, Std, N, CI low and CI high.
+        """
+        all_results = self.analyze_thixotropy_multiple(file_paths)
+        with self.timer.span("analyze", "metric groups"):
+            return aggregate_metrics(all_results, pattern, confidence)
+
+    # ================ GRID METHODS ================
+
+    @staticmethod
+    def _grid_samples(file_paths, load, errors):
+        """Yields (name, DataFrame) of the files that load; the others are recorded in `errors`."""
+        for file_path in file_paths:
+            name = os.path.splitext(os.path.basename(file_path))[0]
+            try:
+                df = load(file_path)
+            except Exception as e:
+                errors[name] = {"Error": f"Failed to load file: {str(e)}"}
+                continue
+            yield name, df
+
+    def process_viscosity_grid(self, file_paths, sweep_type=None, page_format="pdf", layout=SMALL_MULTIPLES_LAYOUT,
+                               max_workers=None):
+        """
+        Plot viscosity files as small multiples: one subplot per file on paged grids with shared axes.
+
+        Suited to campaign reports of hundreds of samples, where a single comparison
+        plot is unreadable. Files are loaded one at a time and only the plotted
+        columns are kept; the pages are rendered in parallel worker processes.
+
+        Parameters:
+        file_paths (list of str): List of paths to viscosity data files.
+        sweep_type (str or list): Sweep(s) to plot. Default: all sweeps.
+        page_format (str): "pdf" (multi-page PDF) or "png" (one PNG per page).
+        layout (tuple): (rows, columns) of subplots per page.
+        max_workers (int): Worker processes rendering pages. Default: number of CPUs.
+
+        Returns:
+        tuple: (list of full paths of the written files, dict mapping the names of the
+               files that could not be loaded to {"Error": message}). The other files
+               are drawn; if none loads, the output is a single "No samples" page.
+        """
+        errors = {}
+        samples = self._grid_samples(file_paths, self._load_viscosity, errors)
+
+        with self.timer.span("render", "viscosity grid"):
+            paths = plot_small_multiples(samples, "grid-viscosity", self.output_directory, kind="viscosity",
+                                         sweep_types=sweep_type, layout=layout, page_format=page_format,
+                                         max_workers=max_workers)
+        return paths, errors
+
+    def process_thixotropy_grid(self, file_paths, page_format="pdf", layout=SMALL_MULTIPLES_LAYOUT,
+                                max_workers=None):
+        """
+        Plot thixotropy files as small multiples, see process_viscosity_grid.
+
+        Parameters:
+        file_paths (list of str): List of paths to thixotropy data files.
+        page_format (str): "pdf" (multi-page PDF) or "png" (one PNG per page).
+        layout (tuple): (rows, columns) of subplots per page.
+        max_workers (int): Worker processes rendering pages. Default: number of CPUs.
+
+        Returns:
+        tuple: (list of full paths of the written files, dict mapping the names of the
+               files that could not be loaded to {"Error": message}).
+        """
+        errors = {}
+        samples = self._grid_samples(file_paths, self._load_thixotropy, errors)
+
+        with self.timer.span("render", "thixotropy grid"):
+            paths = plot_small_multiples(samples, "grid-thixotropy", self.output_directory, kind="thixotropy",
+                                         layout=layout, page_format=page_format, max_workers=max_workers)
+        return paths, errors
+
     # ================ EXPORT METHODS ================
 
+    def export_archive(self, file_path, viscosity_files=(), thixotropy_files=()):
+        """
+        Export the processed data of many files to one columnar archive.
+
+        Every file is loaded and processed like for plotting, and its points are
+        appended to the archive with the columns Sample, Kind, Segment, Shear rate,
+        Viscosity, Stress, Step time and Time (see archive.ARCHIVE_COLUMNS).
+
+        Parameters:
+        file_path (str): Archive path. The extension chooses the format: .parquet
+                         (needs pyarrow), .h5 (needs PyTables) or .npz. An unavailable
+                         format falls back to the next one that is available.
+        viscosity_files (list): Paths to viscosity data files.
+        thixotropy_files (list): Paths to thixotropy data files.
+
+        Returns:
+        tuple: (Success flag, path written or error message)
+        """
+        def samples():
+            for file_path in viscosity_files:
+                name = os.path.splitext(os.path.basename(file_path))[0]
+                yield name, "viscosity", self._load_viscosity(file_path)
+            for file_path in thixotropy_files:
+                name = os.path.splitext(os.path.basename(file_path))[0]
+                yield name, "thixotropy", self._load_thixotropy(file_path)
+
+        with self.timer.span("export", file_path):
+            try:
+                return True, write_archive(file_path, samples())
+            except Exception as e:
+                return False, f"Export failed: {str(e)}"
+
+    def add_to_fleet_archive(self, directory, viscosity_files=(), thixotropy_files=(), **metadata):
+        """
+        Append files to a memory-mapped fleet archive (see fleet_archive.FleetArchive).
+
+        Files whose content is already archived are skipped, so a folder can be
+        added again after new exports were saved to it.
+
+        Parameters:
+        directory (str): Archive directory; created if it does not exist.
+        viscosity_files (list): Paths to viscosity data files.
+        thixotropy_files (list): Paths to thixotropy data files.
+        **metadata: Fields stored with every added sample, e.g. product="X".
+
+        Returns:
+        dict: (file path, kind) mapped to "added", "already archived" or {"Error": message}.
+        """
+        fleet = FleetArchive(directory)
+        status = {}
+        files = [(file_path, "viscosity", self._load_viscosity) for file_path in viscosity_files] + \
+                [(file_path, "thixotropy", self._load_thixotropy) for file_path in thixotropy_files]
+
+        for file_path, kind, load in files:
+            try:
+                with self.timer.span("export", file_path):
+                    entry = fleet.add_file(file_path, kind, load=load, **metadata)
+                status[file_path, kind] = "added" if entry else "already archived"
+            except Exception as e:
+                status[file_path, kind] = {"Error": f"Failed to archive file: {str(e)}"}
+
+        return status
+
     def export_thixotropy_results_single(self, results, file_path, export_format='csv'):
         """
         Export thixotropy analysis results for a single file to CSV or Excel.
@@ -315,94 +1138,75 @@ class DataProcessor:
         Returns:
         tuple: (Success flag, message or error)
         """
-        try:
-            # Create a DataFrame from the results
-            metrics_df = pd.DataFrame(list(results.items()), columns=['Metric', 'Value'])
-
-            # Export based on the requested format
-            if export_format.lower() == 'csv':
-                metrics_df.to_csv(file_path, index=False)
-                return True, file_path
-            elif export_format.lower() == 'excel':
-                try:
-                    # Try to use to_excel directly (works with openpyxl as default engine)
-                    metrics_df.to_excel(file_path, index=False, sheet_name='Thixotropy Metrics')
+        with self.timer.span("export", file_path):
+            try:
+                # Create a DataFrame from the results
+                metrics_df = pd.DataFrame(list(results.items()), columns=['Metric', 'Value'])
+
+                # Export based on the requested format
+                if export_format.lower() == 'csv':
+                    metrics_df.to_csv(file_path, index=False)
                     return True, file_path
-                except Exception as excel_error:
-                    print(f"Excel export error: {str(excel_error)}")
-                    # Fallback to CSV if Excel export fails
-                    csv_path = os.path.splitext(file_path)[0] + ".csv"
-                    metrics_df.to_csv(csv_path, index=False)
-                    return True, f"Exported as CSV to {csv_path} (Excel export failed)"
-            else:
-                return False, f"Unsupported export format: {export_format}"
+                elif export_format.lower() == 'excel':
+                    try:
+                        # Try to use to_excel directly (works with openpyxl as default engine)
+                        metrics_df.to_excel(file_path, index=False, sheet_name='Thixotropy Metrics')
+                        return True, file_path
+                    except Exception as excel_error:
+                        print(f"Excel export error: {str(excel_error)}")
+                        # Fallback to CSV if Excel export fails
+                        csv_path = os.path.splitext(file_path)[0] + ".csv"
+                        metrics_df.to_csv(csv_path, index=False)
+                        return True, f"Exported as CSV to {csv_path} (Excel export failed)"
+                else:
+                    return False, f"Unsupported export format: {export_format}"
 
-        except Exception as e:
-            return False, f"Export failed: {str(e)}"
+            except Exception as e:
+                return False, f"Export failed: {str(e)}"
 
-    def export_thixotropy_results_multiple(self, all_results, file_path, export_format='csv'):
+    def export_thixotropy_results_multiple(self, all_results, file_path, export_format='csv', raw_data=None):
         """
         Export thixotropy analysis results for multiple files to CSV or Excel.
 
+        The wide table (one row per sample) is pivoted from the long table (one row
+        per sample and metric). Excel workbooks are streamed to disk, so large
+        batches are written with constant memory.
+
         Parameters:
         all_results (dict): Dictionary mapping sample names to result dictionaries
         file_path (str): Path to save the exported file
         export_format (str): Format to export ('csv' or 'excel')
+        raw_data (iterable): Optional (sample name, DataFrame) pairs, e.g. from
+                             iter_thixotropy_multiple, written as one raw-data sheet
+                             per sample after the metrics (Excel only)
 
         Returns:
         tuple: (Success flag, message or error)
         """
-        try:
-            # First, create a unified data structure
-            # Get all possible metrics from all samples
-            all_metrics = set()
-            for sample_results in all_results.values():
-                all_metrics.update(sample_results.keys())
-
-            # Create a DataFrame with samples as rows and metrics as columns
-            data = []
-            for sample, results in all_results.items():
-                row = {'Sample': sample}
-                for metric in all_metrics:
-                    row[metric] = results.get(metric, None)
-                data.append(row)
-
-            metrics_df = pd.DataFrame(data)
-
-            # Also create long format for potential Excel export
-            long_data = []
-            for sample, results in all_results.items():
-                for metric, value in results.items():
-                    long_data.append({
-                        'Sample': sample,
-                        'Metric': metric,
-                        'Value': value
-                    })
-
-            long_df = pd.DataFrame(long_data)
-
-            # Export based on the requested format
-            if export_format.lower() == 'csv':
-                # For CSV, just export the wide format
-                metrics_df.to_csv(file_path, index=False)
-                return True, file_path
-            elif export_format.lower() == 'excel':
-                try:
-                    # Try to use ExcelWriter with xlsxwriter
-                    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                        # Wide format
-                        metrics_df.to_excel(writer, sheet_name='Metrics Summary', index=False)
-                        # Long format (for easier plotting)
-                        long_df.to_excel(writer, sheet_name='Metrics Detail', index=False)
+        with self.timer.span("export", file_path):
+            try:
+                # Long format (for easier plotting) and the wide format pivoted from it
+                long_df = results_to_long(all_results)
+                metrics_df = long_to_wide(long_df, all_results)
+
+                # Export based on the requested format
+                if export_format.lower() == 'csv':
+                    # For CSV, just export the wide format
+                    metrics_df.to_csv(file_path, index=False)
                     return True, file_path
-                except Exception as excel_error:
-                    print(f"Excel export error: {str(excel_error)}")
-                    # Fallback to CSV if Excel export fails
-                    csv_path = os.path.splitext(file_path)[0] + ".csv"
-                    metrics_df.to_csv(csv_path, index=False)
-                    return True, f"Exported as CSV to {csv_path} (Excel export failed)"
-            else:
-                return False, f"Unsupported export format: {export_format}"
+                elif export_format.lower() == 'excel':
+                    try:
+                        sheets = [('Metrics Summary', metrics_df), ('Metrics Detail', long_df)]
+                        write_excel_streaming(file_path, itertools.chain(sheets, raw_data or []))
+                        return True, file_path
+                    except Exception as excel_error:
+                        print(f"Excel export error: {str(excel_error)}")
+                        # Fallback to CSV if Excel export fails
+                        csv_path = os.path.splitext(file_path)[0] + ".csv"
+                        metrics_df.to_csv(csv_path, index=False)
+                        return True, f"Exported as CSV to {csv_path} (Excel export failed)"
+                else:
+                    return False, f"Unsupported export format: {export_format}"
 
-        except Exception as e:
-            return False, f"Export failed: {str(e)}"
\ No newline at end of file
+            except Exception as e:
+                return False, f"Export failed: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,163 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from lazy_imports import lazy_import
+from data_analysis import recovery_crossing_times
+
+np = lazy_import("numpy")
+
+# Recovery models that can be fitted to the RECOVERY phase:
+#   exponential: eta(t) = eta_inf - (eta_inf - eta_0) * exp(-t / tau)
+#   stretched:   eta(t) = eta_inf - (eta_inf - eta_0) * exp(-(t / tau) ** beta)
+#   two_phase:   eta(t) = eta_inf - a_1 * exp(-t / tau_1) - a_2 * exp(-t / tau_2)
+MODELS = ("exponential", "stretched", "two_phase")
+
+# Curves are sent to the worker processes in chunks of this many samples
+_CHUNK_SIZE = 64
+
+
+def _exponential(t, eta_0, eta_inf, tau):
+    return eta_inf - (eta_inf - eta_0) * np.exp(-t / tau)
+
+
+def _stretched(t, eta_0, eta_inf, tau, beta):
+    return eta_inf - (eta_inf - eta_0) * np.exp(-(t / tau) ** beta)
+
+
+def _two_phase(t, eta_inf, a_1, tau_1, a_2, tau_2):
+    return eta_inf - a_1 * np.exp(-t / tau_1) - a_2 * np.exp(-t / tau_2)
+
+
+def _initial_guess(model, t, viscosity):
+    """Estimates starting parameters and bounds from the curve itself."""
+    eta_0 = viscosity[0]
+    eta_inf = np.mean(viscosity[-max(len(viscosity) // 10, 1):])
+    span = t[-1] - t[0]
+
+    # Time to 63% of the rise is the time constant of a single exponential
+    tau = recovery_crossing_times(t, viscosity, [eta_0 + 0.63 * (eta_inf - eta_0)])[0]
+    if not np.isfinite(tau) or tau <= 0:
+        tau = span / 3
+
+    v_max = np.max(viscosity) * 10
+    if model == "exponential":
+        return [eta_0, eta_inf, tau], ([0, 0, 1e-6], [v_max, v_max, span * 100])
+    if model == "stretched":
+        return [eta_0, eta_inf, tau, 1.0], ([0, 0, 1e-6, 0.1], [v_max, v_max, span * 100, 3.0])
+
+    rise = max(eta_inf - eta_0, 1e-12)
+    return ([eta_inf, rise / 2, tau / 5, rise / 2, tau * 2],
+            ([0, 0, 1e-6, 0, 1e-6], [v_max, v_max, span * 100, v_max, span * 100]))
+
+
+def fit_recovery_curve(t, viscosity, model="stretched"):
+    """
+    Fits a recovery model to one RECOVERY curve.
+
+    Parameters:
+    t (array-like): Step time of the recovery points (s).
+    viscosity (array-like): Viscosity of the recovery points (Pa.s).
+    model (str): One of MODELS.
+
+    Returns:
+    dict: Fitted parameters (eta_0, eta_inf, tau, beta for the single and
+          stretched models; eta_0, eta_inf, tau_1, tau_2, a_1, a_2 for the
+          two-phase model) and r_squared, or {"Error": message} if the fit fails.
+    """
+    from scipy.optimize import curve_fit
+
+    if model not in MODELS:
+        return {"Error": f"Unknown recovery model: {model}"}
+
+    t = np.asarray(t, dtype=float)
+    viscosity = np.asarray(viscosity, dtype=float)
+    valid = np.isfinite(t) & np.isfinite(viscosity)
+    t, viscosity = t[valid], viscosity[valid]
+
+    n_params = {"exponential": 3, "stretched": 4, "two_phase": 5}[model]
+    if len(t) <= n_params:
+        return {"Error": f"Not enough recovery points to fit the {model} model"}
+
+    function = {"exponential": _exponential, "stretched": _stretched, "two_phase": _two_phase}[model]
+    p0, bounds = _initial_guess(model, t, viscosity)
+
+    try:
+        params, _ = curve_fit(function, t, viscosity, p0=p0, bounds=bounds, maxfev=10000)
+    except (RuntimeError, ValueError) as e:
+        return {"Error": f"Recovery fit failed: {str(e)}"}
+
+    residuals = viscosity - function(t, *params)
+    total = np.sum((viscosity - viscosity.mean()) ** 2)
+    r_squared = 1 - np.sum(residuals ** 2) / total if total > 0 else np.nan
+
+    if model == "two_phase":
+        eta_inf, a_1, tau_1, a_2, tau_2 = params
+        # Report the faster phase first
+        if tau_2 < tau_1:
+            a_1, tau_1, a_2, tau_2 = a_2, tau_2, a_1, tau_1
+        fit = {"eta_0": eta_inf - a_1 - a_2, "eta_inf": eta_inf, "tau_1": tau_1, "tau_2": tau_2,
+               "a_1": a_1, "a_2": a_2}
+    elif model == "stretched":
+        fit = dict(zip(["eta_0", "eta_inf", "tau", "beta"], params))
+    else:
+        fit = dict(zip(["eta_0", "eta_inf", "tau"], params))
+
+    fit = {key: float(value) for key, value in fit.items()}
+    fit["r_squared"] = float(r_squared)
+    return fit
+
+
+def _fit_one(args):
+    """Worker entry point: fits one (t, viscosity, model) tuple."""
+    return fit_recovery_curve(*args)
+
+
+def fit_recovery_curves(curves, model="stretched", max_workers=None):
+    """
+    Fits a recovery model to many curves in parallel worker processes.
+
+    Parameters:
+    curves (list of tuple): (t, viscosity) arrays of each sample.
+    model (str): One of MODELS.
+    max_workers (int): Number of worker processes. Default: number of CPUs.
+                       With 1 the curves are fitted in this process.
+
+    Returns:
+    list of dict: Result of fit_recovery_curve for each curve, in order.
+    """
+    jobs = [(t, viscosity, model) for t, viscosity in curves]
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if max_workers == 1 or len(jobs) < 2:
+        return [_fit_one(job) for job in jobs]
+
+    chunk_size = max(1, min(_CHUNK_SIZE, len(jobs) // max_workers))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_fit_one, jobs, chunksize=chunk_size))
+
+
+def kinetics_metrics(fit):
+    """
+    Converts a fit result into metric names matching calculate_thixotropy_metrics.
+
+    Parameters:
+    fit (dict): Result of fit_recovery_curve.
+
+    Returns:
+    dict: Metric name mapped to value.
+    """
+    if "Error" in fit:
+        return {"Recovery Fit Error": fit["Error"]}
+
+    names = {
+        "eta_0": "Recovery Initial Viscosity (Pa.s)",
+        "eta_inf": "Recovery Plateau Viscosity (Pa.s)",
+        "tau": "Recovery Time Constant (s)",
+        "beta": "Recovery Stretch Exponent",
+        "tau_1": "Recovery Fast Time Constant (s)",
+        "tau_2": "Recovery Slow Time Constant (s)",
+        "a_1": "Recovery Fast Amplitude (Pa.s)",
+        "a_2": "Recovery Slow Amplitude (Pa.s)",
+        "r_squared": "Recovery Fit R2",
+    }
+    return {names[key]: value for key, value in fit.items()}
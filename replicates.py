@@ -0,0 +1,203 @@
+import os
+import re
+
+from lazy_imports import lazy_import
+from data_analysis import stack_curves, interpolate_curves
+from excel_export import results_to_long
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+# Replicates share the part of the file name before the first '-' or '_',
+# e.g. "SlurryA_1.xls" and "SlurryA_2.xls" are both in group "SlurryA"
+DEFAULT_GROUP_PATTERN = r"^([^-_]+)"
+
+# Points of the common grid the replicate curves are interpolated onto
+GRID_POINTS = 100
+
+
+def group_name(file_path, pattern=DEFAULT_GROUP_PATTERN):
+    """
+    Returns the replicate group of a file.
+
+    Parameters:
+    file_path (str): File path or sample name.
+    pattern (str): Regular expression searched in the file name without extension;
+                   the group is the first capture group (or the whole match).
+
+    Returns:
+    str: The group name, or the whole name if the pattern does not match.
+    """
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    match = re.search(pattern, name)
+    if match is None:
+        return name
+    return match.group(1) if match.groups() else match.group(0)
+
+
+def group_files(file_paths, pattern=DEFAULT_GROUP_PATTERN):
+    """
+    Groups files into replicate sets.
+
+    Returns:
+    dict: Group name mapped to its file paths, in the order the groups first appear.
+    """
+    groups = {}
+    for file_path in file_paths:
+        groups.setdefault(group_name(file_path, pattern), []).append(file_path)
+    return groups
+
+
+def common_grid(x, n_points=GRID_POINTS, log=False):
+    """
+    Builds a grid over the x range shared by all curves.
+
+    Parameters:
+    x (np.ndarray): x values (curves x points, NaN-padded).
+    n_points (int): Number of grid points.
+    log (bool): Space the points logarithmically (for shear rates).
+
+    Returns:
+    np.ndarray: The grid, empty if the curves do not overlap.
+    """
+    if log:
+        x = np.where(x > 0, x, np.nan)
+    start = np.nanmax(np.nanmin(x, axis=1))
+    stop = np.nanmin(np.nanmax(x, axis=1))
+    if not stop > start:
+        return np.empty(0)
+    return np.geomspace(start, stop, n_points) if log else np.linspace(start, stop, n_points)
+
+
+def replicate_statistics(values, confidence=0.95):
+    """
+    Computes the mean curve of replicates and its spread.
+
+    Parameters:
+    values (np.ndarray): Curves on a common grid (replicates x grid), NaN where missing.
+    confidence (float): Confidence level of the interval of the mean.
+
+    Returns:
+    dict: "Mean", "Std", "N", "CI low" and "CI high" arrays over the grid. Std
+          and the interval are NaN where fewer than two replicates have a value.
+    """
+    from scipy import stats
+
+    n = np.isfinite(values).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(n > 0, np.nansum(values, axis=0) / n, np.nan)
+        std = np.where(n > 1, np.sqrt(np.nansum((values - mean) ** 2, axis=0) / (n - 1)), np.nan)
+        half_width = stats.t.ppf(0.5 + confidence / 2, np.maximum(n - 1, 1)) * std / np.sqrt(n)
+
+    return {"Mean": mean, "Std": std, "N": n, "CI low": mean - half_width, "CI high": mean + half_width}
+
+
+def aggregate_curves(x_curves, y_curves, grid=None, n_points=GRID_POINTS, log=False, confidence=0.95):
+    """
+    Interpolates replicate curves onto a common grid and computes their statistics.
+
+    With log=True (shear-rate sweeps) the grid is logarithmic and the curves
+    are interpolated in log-log space, where flow curves are close to straight.
+
+    Parameters:
+    x_curves (list of array-like): x values of every replicate.
+    y_curves (list of array-like): y values of every replicate.
+    grid (array-like): Grid to use. Default: common_grid over the shared x range.
+    n_points (int): Number of points of the default grid.
+    log (bool): Logarithmic grid and interpolation.
+    confidence (float): Confidence level of the interval of the mean.
+
+    Returns:
+    pd.DataFrame: Columns "x", "Mean", "Std", "N", "CI low" and "CI high".
+    """
+    x = stack_curves(x_curves)
+    y = stack_curves(y_curves)
+    grid = common_grid(x, n_points, log) if grid is None else np.asarray(grid, dtype=float)
+
+    if log:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.exp(interpolate_curves(np.log(np.where(x > 0, x, np.nan)),
+                                               np.log(np.where(y > 0, y, np.nan)), np.log(grid)))
+    else:
+        values = interpolate_curves(x, y, grid)
+
+    return pd.DataFrame({"x": grid, **replicate_statistics(values, confidence)})
+
+
+def aggregate_viscosity_groups(dataframes, sweep="FORWARD", pattern=DEFAULT_GROUP_PATTERN,
+                               n_points=GRID_POINTS, confidence=0.95):
+    """
+    Computes the mean flow curve and its band for every replicate group.
+
+    Parameters:
+    dataframes (dict): Sample names mapped to load_viscosity_stress_data output.
+    sweep (str): "FORWARD" or "REVERSE".
+    pattern (str): Group pattern, see group_name.
+    n_points (int): Points of the shear-rate grid.
+    confidence (float): Confidence level of the interval of the mean.
+
+    Returns:
+    dict: Group name mapped to an aggregate_curves DataFrame ("x" is the shear rate).
+    """
+    groups = group_files(list(dataframes), pattern)
+    aggregated = {}
+    for group, samples in groups.items():
+        sweeps = [dataframes[sample][dataframes[sample]["Sweep"] == sweep] for sample in samples]
+        aggregated[group] = aggregate_curves([df["Shear rate"] for df in sweeps],
+                                             [df["Viscosity"] for df in sweeps],
+                                             n_points=n_points, log=True, confidence=confidence)
+    return aggregated
+
+
+def aggregate_thixotropy_groups(dataframes, pattern=DEFAULT_GROUP_PATTERN, n_points=GRID_POINTS * 10,
+                                confidence=0.95):
+    """
+    Computes the mean viscosity-time curve and its band for every replicate group.
+
+    Parameters:
+    dataframes (dict): Sample names mapped to load_thixotropy_data output.
+    pattern (str): Group pattern, see group_name.
+    n_points (int): Points of the time grid.
+    confidence (float): Confidence level of the interval of the mean.
+
+    Returns:
+    dict: Group name mapped to an aggregate_curves DataFrame ("x" is the total time).
+    """
+    groups = group_files(list(dataframes), pattern)
+    return {
+        group: aggregate_curves([dataframes[sample]["Time"] for sample in samples],
+                                [dataframes[sample]["Viscosity"] for sample in samples],
+                                n_points=n_points, confidence=confidence)
+        for group, samples in groups.items()
+    }
+
+
+def aggregate_metrics(all_results, pattern=DEFAULT_GROUP_PATTERN, confidence=0.95):
+    """
+    Aggregates per-sample metrics over replicate groups.
+
+    Parameters:
+    all_results (dict): Sample names mapped to result dictionaries (e.g. from
+                        analyze_thixotropy_multiple). Samples with an error and
+                        non-numeric values are left out.
+    pattern (str): Group pattern, see group_name.
+    confidence (float): Confidence level of the interval of the mean.
+
+    Returns:
+    pd.DataFrame: One row per group and metric (indexed by 'Group' and 'Metric') with
+                  the columns Mean, Std, N, CI low and CI high.
+    """
+    from scipy import stats
+
+    valid = {sample: results for sample, results in all_results.items() if "Error" not in results}
+    long_df = results_to_long(valid)
+    long_df["Value"] = pd.to_numeric(long_df["Value"], errors="coerce")
+    long_df["Group"] = long_df["Sample"].map(lambda sample: group_name(sample, pattern))
+
+    summary = long_df.groupby(["Group", "Metric"], sort=False)["Value"].agg(Mean="mean", Std="std", N="count")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        half_width = stats.t.ppf(0.5 + confidence / 2, np.maximum(summary["N"] - 1, 1)) * summary["Std"] / \
+            np.sqrt(summary["N"])
+    summary["CI low"] = summary["Mean"] - half_width
+    summary["CI high"] = summary["Mean"] + half_width
+    return summary
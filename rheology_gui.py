@@ -3,18 +3,25 @@ from tkinter import ttk, filedialog, messagebox
 import subprocess
 import platform
 import os
+import queue
+import threading
 
-# Matplotlib imports
-import matplotlib.pyplot as plt
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from lazy_imports import lazy_import
+from data_import import is_supported_file
+from file_selector import ThumbnailTooltip
+from thumbnails import ThumbnailCache
 
-# Your other imports
-from plotting import *
-from processor import DataProcessor
+# Heavy modules are imported on first use so that the main window paints
+# immediately. The plot canvases (matplotlib) are built right after the first
+# paint and the DataProcessor (pandas) when the first file is processed.
+plt = lazy_import("matplotlib.pyplot")
+np = lazy_import("numpy")
 
 
 class RheologyGUI:
+    # Milliseconds between checks for files parsed in the background
+    POLL_INTERVAL = 100
+
     def __init__(self, root):
         self.root = root
         self.root.title("Rheology Data Analyzer")
@@ -22,15 +29,27 @@ class RheologyGUI:
         self.root.resizable(True, True)
 
         self.output_directory = self.get_output_directory()
-        self.processor = DataProcessor(self.output_directory)
+        self._processor = None
 
         # Initialize variables that will be used across methods
         self.selected_files = []
         self.viscosity_status_var = tk.StringVar(value="No files selected")
 
+        # Queue of the files being parsed in the background, or None
+        self._loading = None
+
         # Create the UI
         self.create_widgets()
 
+    @property
+    def processor(self):
+        """DataProcessor for the output directory, created on first use."""
+        if self._processor is None:
+            from processor import DataProcessor
+            # Files are parsed in a worker process so that a broken workbook cannot hang the window
+            self._processor = DataProcessor(self.output_directory, isolate=True)
+        return self._processor
+
     def get_output_directory(self):
         try:
             with open("config.txt", "r") as file:
@@ -67,6 +86,9 @@ class RheologyGUI:
         status_bar = ttk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         status_bar.grid(row=1, column=0, sticky="ew")
 
+        # Build the matplotlib canvases once the window is on screen
+        self.root.after_idle(lambda: self.root.after(0, self._create_plot_canvases))
+
     def _setup_viscosity_tab(self):
         """Set up the viscosity tab with file selection and plot areas."""
         # Configure the viscosity tab layout
@@ -117,7 +139,7 @@ class RheologyGUI:
         file_list_frame.columnconfigure(2, weight=1)
 
         # Available files list
-        avail_frame = ttk.LabelFrame(file_list_frame, text="Available XLS Files")
+        avail_frame = ttk.LabelFrame(file_list_frame, text="Available TRIOS Files")
         avail_frame.grid(row=0, column=0, sticky="ew")
 
         avail_scrollbar = ttk.Scrollbar(avail_frame)
@@ -129,6 +151,9 @@ class RheologyGUI:
         self.available_listbox.pack(fill=tk.BOTH, expand=True)
         avail_scrollbar.config(command=self.available_listbox.yview)
 
+        # Thumbnail of the flow curve when hovering a file, rendered in a worker process
+        self.thumbnail_tooltip = ThumbnailTooltip(self.available_listbox, self.current_dir, ThumbnailCache())
+
         # Buttons
         button_frame = ttk.Frame(file_list_frame)
         button_frame.grid(row=0, column=1, padx=5)
@@ -162,18 +187,32 @@ class RheologyGUI:
         parent.columnconfigure(1, weight=1)
         parent.rowconfigure(0, weight=1)
 
-        # Create the plot containers and matplotlib figures
+        # Create the plot containers; the figures are added by _create_plot_canvases
         self.plot_frames = []
         self.figures = []
         self.canvases = []
 
-        titles = ["Forward Sweep", "Reverse Sweep"]  # Removed "Both Sweeps"
-
         for i in range(2):  # Changed from range(3) to range(2)
             frame = ttk.Frame(parent)
             frame.grid(row=0, column=i, sticky="nsew", padx=5, pady=5)
             self.plot_frames.append(frame)
 
+    def _create_plot_canvases(self):
+        """Create the matplotlib figures of both tabs (imports matplotlib on first call)."""
+        if self.figures:
+            return
+
+        self._create_viscosity_canvases()
+        self._create_derivative_canvases()
+
+    def _create_viscosity_canvases(self):
+        """Create the figures and canvases of the viscosity tab."""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        titles = ["Forward Sweep", "Reverse Sweep"]  # Removed "Both Sweeps"
+
+        for i, frame in enumerate(self.plot_frames):
             # Create figure and canvas
             fig = Figure(figsize=(4, 4), dpi=100)
             ax = fig.add_subplot(111)
@@ -209,6 +248,11 @@ class RheologyGUI:
         ttk.Button(parent, text="Clear Selection",
                    command=self._clear_viscosity_selection).pack(side=tk.RIGHT, padx=5)
 
+        # Per-stage timing report (load, transform, analyze, render, export)
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parent, text="Record stage timings",
+                        variable=self.profile_var).pack(side=tk.RIGHT, padx=5)
+
     def _browse_directory(self):
         """Open directory browser dialog."""
         dir_path = filedialog.askdirectory(initialdir=self.current_dir.get())
@@ -220,15 +264,15 @@ class RheologyGUI:
         """Update available files listbox based on current directory."""
         self.available_listbox.delete(0, tk.END)
         try:
-            # Get all XLS files in the directory
-            xls_files = [f for f in os.listdir(self.current_dir.get())
-                         if f.lower().endswith('.xls')]
+            # Get all TRIOS export files in the directory
+            export_files = [f for f in os.listdir(self.current_dir.get())
+                            if is_supported_file(f)]
 
             # Sort them alphabetically
-            xls_files.sort()
+            export_files.sort()
 
             # Add to listbox
-            for file in xls_files:
+            for file in export_files:
                 self.available_listbox.insert(tk.END, file)
 
         except Exception as e:
@@ -288,29 +332,93 @@ class RheologyGUI:
             messagebox.showwarning("No Files", "Please select at least one file to process.")
             return
 
+        if self._loading is not None:
+            # The previous selection is still being read
+            return
+
+        # Make sure the canvases exist if processing starts before they were built
+        self._create_plot_canvases()
+
+        # Update status
+        file_paths = list(self.selected_files)
+        self.viscosity_status_var.set(f"Processing {len(file_paths)} files...")
+
+        # Switch the stage timings on or off for this run
+        self.processor.timer.enabled = self.profile_var.get()
+        self.processor.timer.reset()
+
+        # Parse on a background thread (the processor's worker process does the work),
+        # so that a slow or hanging file does not freeze the window
+        self._loading = queue.Queue()
+        threading.Thread(target=self._load_viscosity_files, args=(file_paths, self._loading),
+                         name="viscosity-loader", daemon=True).start()
+        self.root.after(self.POLL_INTERVAL, self._finish_viscosity_files, file_paths)
+
+    def _load_viscosity_files(self, file_paths, results):
+        """Background thread: loads the files and puts the samples (or the exception) on `results`."""
         try:
-            # Update status
-            self.viscosity_status_var.set(f"Processing {len(self.selected_files)} files...")
-            self.root.update()
+            # Keyed by path: files of the same name in different folders are different samples
+            results.put(self.processor.load_samples(file_paths, kind="viscosity", by_path=True))
+        except Exception as e:
+            results.put(e)
+
+    def _finish_viscosity_files(self, file_paths):
+        """Draws the plots once the background thread has loaded the files."""
+        try:
+            samples = self._loading.get_nowait()
+        except queue.Empty:
+            self.root.after(self.POLL_INTERVAL, self._finish_viscosity_files, file_paths)
+            return
+        self._loading = None
+
+        try:
+            if isinstance(samples, Exception):
+                raise samples
+
+            dataframes = {}
+            errors = []
+            for file_path in file_paths:
+                sample = samples[file_path]
+                if isinstance(sample, dict):
+                    errors.append(f"{file_path}: {sample['Error']}")
+                else:
+                    dataframes[file_path] = sample.to_frame()
+            loaded = list(dataframes)
+
+            if errors:
+                messagebox.showwarning("Files Not Loaded", "\n".join(errors))
 
             # Process files for forward and reverse plots
-            self._update_forward_plot(self.selected_files)
-            self._update_reverse_plot(self.selected_files)
+            self._update_forward_plot(loaded, dataframes)
+            self._update_reverse_plot(loaded, dataframes)
 
             # Now update the derivative plots
-            self._update_forward_derivative(self.selected_files)
-            self._update_reverse_derivative(self.selected_files)
+            self._update_forward_derivative(loaded, dataframes)
+            self._update_reverse_derivative(loaded, dataframes)
 
             # Update status
-            self.viscosity_status_var.set(f"Processed {len(self.selected_files)} files")
-            self.derivative_status_var.set(f"Processed {len(self.selected_files)} files")
+            self.viscosity_status_var.set(f"Processed {len(loaded)} files")
+            self.derivative_status_var.set(f"Processed {len(loaded)} files")
+
+            if self.processor.timer.enabled:
+                self._write_timing_report()
 
         except Exception as e:
             messagebox.showerror("Processing Error", f"Error processing files: {e}")
             self.viscosity_status_var.set("Error processing files")
             self.derivative_status_var.set("Error processing derivatives")
 
-    def _update_forward_plot(self, file_paths):
+    def _write_timing_report(self):
+        """Write the stage timings of the last run as JSON and CSV to the output directory."""
+        try:
+            json_path = os.path.join(self.output_directory, "stage_timings.json")
+            self.processor.write_timing_report(json_path)
+            self.processor.write_timing_report(os.path.splitext(json_path)[0] + ".csv")
+            self.status_var.set(f"Stage timings written to {json_path}")
+        except Exception as e:
+            messagebox.showerror("Timing Report Error", f"Error writing the timing report: {e}")
+
+    def _update_forward_plot(self, file_paths, dataframes):
         """Update the forward sweep plot."""
         if not isinstance(file_paths, list):
             file_paths = [file_paths]
@@ -330,7 +438,8 @@ class RheologyGUI:
         # Process data and plot
         try:
             if len(file_paths) == 1:
-                df, _, _ = self.processor.process_viscosity_single(file_paths[0], "FORWARD")
+                df, _, _ = self.processor.process_viscosity_single(file_paths[0], "FORWARD",
+                                                                   dataframes[file_paths[0]])
                 forward_data = df[df["Sweep"] == "FORWARD"]
 
                 # Plot the data
@@ -340,7 +449,7 @@ class RheologyGUI:
             else:
                 # Multiple files
                 for i, file_path in enumerate(file_paths):
-                    df, _, _ = self.processor.process_viscosity_single(file_path, "FORWARD")
+                    df, _, _ = self.processor.process_viscosity_single(file_path, "FORWARD", dataframes[file_path])
                     forward_data = df[df["Sweep"] == "FORWARD"]
 
                     color = plt.cm.tab10(i % 10)
@@ -355,7 +464,7 @@ class RheologyGUI:
         except Exception as e:
             print(f"Error updating forward plot: {e}")
 
-    def _update_reverse_plot(self, file_paths):
+    def _update_reverse_plot(self, file_paths, dataframes):
         """Update the reverse sweep plot."""
         if not isinstance(file_paths, list):
             file_paths = [file_paths]
@@ -375,7 +484,8 @@ class RheologyGUI:
         # Process data and plot
         try:
             if len(file_paths) == 1:
-                df, _, _ = self.processor.process_viscosity_single(file_paths[0], "REVERSE")
+                df, _, _ = self.processor.process_viscosity_single(file_paths[0], "REVERSE",
+                                                                   dataframes[file_paths[0]])
                 reverse_data = df[df["Sweep"] == "REVERSE"]
 
                 # Plot the data
@@ -385,7 +495,7 @@ class RheologyGUI:
             else:
                 # Multiple files
                 for i, file_path in enumerate(file_paths):
-                    df, _, _ = self.processor.process_viscosity_single(file_path, "REVERSE")
+                    df, _, _ = self.processor.process_viscosity_single(file_path, "REVERSE", dataframes[file_path])
                     reverse_data = df[df["Sweep"] == "REVERSE"]
 
                     color = plt.cm.tab10(i % 10)
@@ -454,18 +564,32 @@ class RheologyGUI:
         plot_frame.columnconfigure(1, weight=1)
         plot_frame.rowconfigure(0, weight=1)
 
-        # Create the plot containers and matplotlib figures
+        # Create the plot containers; the figures are added by _create_plot_canvases
         self.derivative_frames = []
         self.derivative_figures = []
         self.derivative_canvases = []
 
-        titles = ["Forward Sweep Derivative", "Reverse Sweep Derivative"]
-
         for i in range(2):
             frame = ttk.Frame(plot_frame)
             frame.grid(row=0, column=i, sticky="nsew", padx=5, pady=5)
             self.derivative_frames.append(frame)
 
+        # Create button frame with status info
+        button_frame = ttk.Frame(self.derivative_tab)
+        button_frame.grid(row=1, column=0, sticky="ew", padx=10, pady=5)
+
+        # Add status label
+        self.derivative_status_var = tk.StringVar(value="No data processed yet")
+        ttk.Label(button_frame, textvariable=self.derivative_status_var).pack(side=tk.LEFT, padx=5)
+
+    def _create_derivative_canvases(self):
+        """Create the figures and canvases of the derivative tab."""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        titles = ["Forward Sweep Derivative", "Reverse Sweep Derivative"]
+
+        for i, frame in enumerate(self.derivative_frames):
             # Create figure and canvas
             fig = Figure(figsize=(4, 4), dpi=100)
             ax = fig.add_subplot(111)
@@ -487,14 +611,6 @@ class RheologyGUI:
                                   command=lambda idx=i: self._save_derivative_plot(idx))
             save_btn.pack(side=tk.BOTTOM, pady=5)
 
-        # Create button frame with status info
-        button_frame = ttk.Frame(self.derivative_tab)
-        button_frame.grid(row=1, column=0, sticky="ew", padx=10, pady=5)
-
-        # Add status label
-        self.derivative_status_var = tk.StringVar(value="No data processed yet")
-        ttk.Label(button_frame, textvariable=self.derivative_status_var).pack(side=tk.LEFT, padx=5)
-
     def _calculate_derivative(self, x, y):
         """
         Calculate derivative d(log y)/d(log x) for given data points.
@@ -559,7 +675,7 @@ class RheologyGUI:
             # Return empty arrays if calculation fails
             return np.array([]), np.array([])
 
-    def _update_forward_derivative(self, file_paths):
+    def _update_forward_derivative(self, file_paths, dataframes):
         """Update the forward sweep derivative plot."""
         if not isinstance(file_paths, list):
             file_paths = [file_paths]
@@ -579,7 +695,7 @@ class RheologyGUI:
         # Process data and plot
         try:
             if len(file_paths) == 1:
-                df, _, _ = self.processor.process_viscosity_single(file_paths[0], "FORWARD")
+                df = dataframes[file_paths[0]]
                 forward_data = df[df["Sweep"] == "FORWARD"]
 
                 # Extract data
@@ -599,7 +715,7 @@ class RheologyGUI:
             else:
                 # Multiple files
                 for i, file_path in enumerate(file_paths):
-                    df, _, _ = self.processor.process_viscosity_single(file_path, "FORWARD")
+                    df = dataframes[file_path]
                     forward_data = df[df["Sweep"] == "FORWARD"]
 
                     # Extract data
@@ -623,7 +739,7 @@ class RheologyGUI:
             print(f"Error updating forward derivative plot: {e}")
             self.derivative_status_var.set("Error updating forward derivative")
 
-    def _update_reverse_derivative(self, file_paths):
+    def _update_reverse_derivative(self, file_paths, dataframes):
         """Update the reverse sweep derivative plot."""
         if not isinstance(file_paths, list):
             file_paths = [file_paths]
@@ -643,7 +759,7 @@ class RheologyGUI:
         # Process data and plot
         try:
             if len(file_paths) == 1:
-                df, _, _ = self.processor.process_viscosity_single(file_paths[0], "REVERSE")
+                df = dataframes[file_paths[0]]
                 reverse_data = df[df["Sweep"] == "REVERSE"]
 
                 # Extract data
@@ -663,7 +779,7 @@ class RheologyGUI:
             else:
                 # Multiple files
                 for i, file_path in enumerate(file_paths):
-                    df, _, _ = self.processor.process_viscosity_single(file_path, "REVERSE")
+                    df = dataframes[file_path]
                     reverse_data = df[df["Sweep"] == "REVERSE"]
 
                     # Extract data
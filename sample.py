@@ -0,0 +1,126 @@
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+# Units of the TRIOS columns used by the analysis
+DEFAULT_UNITS = {
+    "Stress": "Pa",
+    "Shear rate": "1/s",
+    "Viscosity": "Pa.s",
+    "Step time": "s",
+    "Time": "s",
+    "Temperature": "°C",
+    "Normal stress": "Pa",
+}
+
+# Column holding the sweep or phase label of each kind of sample
+LABEL_COLUMNS = {"viscosity": "Sweep", "thixotropy": "peak"}
+
+
+class RheologySample:
+    """
+    Compact in-memory form of one loaded file.
+
+    The numeric columns are stored as one contiguous float64 array (one row per
+    column) and the sweep or phase of every point as an int8 code, instead of a
+    DataFrame with a repeated string column. Because the loaders stack the
+    sweeps/phases one after the other, each sweep or phase is a contiguous
+    slice and segment() returns views without copying.
+
+    Build samples with from_frame() and convert back with to_frame() only when
+    a DataFrame is needed (e.g. for plotting).
+    """
+
+    __slots__ = ("name", "path", "kind", "columns", "values", "codes", "labels", "units")
+
+    def __init__(self, name, path, kind, columns, values, codes, labels, units=None):
+        """
+        Initialize the sample.
+
+        Parameters:
+        name (str): Sample name.
+        path (str): Path of the source file.
+        kind (str): "viscosity" or "thixotropy".
+        columns (list of str): Names of the numeric columns, in the order of `values`.
+        values (np.ndarray): float64 array of shape (len(columns), number of points).
+        codes (np.ndarray): int8 index into `labels` for every point.
+        labels (list of str): Sweep or phase labels, e.g. ["FORWARD", "REVERSE"].
+        units (dict): Column name mapped to its unit. Default: DEFAULT_UNITS for the columns.
+        """
+        self.name = name
+        self.path = path
+        self.kind = kind
+        self.columns = list(columns)
+        self.values = values
+        self.codes = codes
+        self.labels = list(labels)
+        self.units = units if units is not None else {c: DEFAULT_UNITS[c] for c in columns if c in DEFAULT_UNITS}
+
+    @classmethod
+    def from_frame(cls, df, name, path=None, kind="thixotropy", units=None):
+        """
+        Build a sample from the output of load_viscosity_stress_data or load_thixotropy_data.
+
+        Parameters:
+        df (pd.DataFrame): Loaded data with a 'Sweep' or 'peak' column.
+        name (str): Sample name.
+        path (str): Path of the source file.
+        kind (str): "viscosity" or "thixotropy".
+        units (dict): Column name mapped to its unit.
+
+        Returns:
+        RheologySample: The compact sample.
+        """
+        label_column = LABEL_COLUMNS[kind]
+        columns = [column for column in df.columns
+                   if column != label_column and pd.api.types.is_numeric_dtype(df[column])]
+
+        categorical = pd.Categorical(df[label_column], categories=pd.unique(df[label_column]))
+        values = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64).T)
+
+        return cls(name, path, kind, columns, values, categorical.codes.astype(np.int8),
+                   list(categorical.categories), units)
+
+    def __len__(self):
+        return self.values.shape[1]
+
+    def __getitem__(self, column):
+        """Returns one numeric column as a view."""
+        return self.values[self.columns.index(column)]
+
+    @property
+    def nbytes(self):
+        """Memory held by the arrays, in bytes."""
+        return self.values.nbytes + self.codes.nbytes
+
+    def segment(self, label):
+        """
+        Returns the points of one sweep or phase.
+
+        Parameters:
+        label (str): e.g. "FORWARD" or "RECOVERY".
+
+        Returns:
+        dict: Column name mapped to its values in this segment (views when the
+              segment is contiguous, as it is for loaded files).
+        """
+        code = self.labels.index(label)
+        rows = np.flatnonzero(self.codes == code)
+        if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+            rows = slice(rows[0], rows[-1] + 1)
+        return {column: self.values[i, rows] for i, column in enumerate(self.columns)}
+
+    def to_frame(self):
+        """
+        Convert the sample to a DataFrame like the one it was built from.
+
+        Returns:
+        pd.DataFrame: The numeric columns followed by the 'Sweep' or 'peak' label column.
+        """
+        df = pd.DataFrame(self.values.T, columns=self.columns)
+        df[LABEL_COLUMNS[self.kind]] = np.asarray(self.labels, dtype=object)[self.codes]
+        return df
+
+    def __repr__(self):
+        return f"RheologySample({self.name!r}, {self.kind}, {len(self)} points, segments={self.labels})"
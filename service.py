@@ -0,0 +1,420 @@
+"""
+Local HTTP/JSON analysis service.
+
+Lets other programs (e.g. a LIMS) submit TRIOS exports for analysis without
+the GUI. Jobs are queued and processed by a bounded pool of worker
+processes, one file at a time, so progress can be followed while a batch runs.
+
+Endpoints:
+    POST /jobs               {"files": [...], "analysis": "thixotropy" | "viscosity", "plots": true}
+                             -> 202 {"id", "status", ...}; 429 when the queue is full
+    GET  /jobs               -> list of known jobs (without results)
+    GET  /jobs/<id>          -> status, progress, metrics per sample, plot paths and errors
+    GET  /jobs/<id>/events   -> newline-delimited JSON progress events until the job ends
+    GET  /health             -> queue and worker status
+
+Usage:
+    python service.py OUTPUT_DIR [--host 127.0.0.1] [--port 8765] [--workers 2]
+                                 [--concurrent-jobs 1] [--queue-size 16]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from data_import import is_supported_file
+
+# Plots are written to files only; never open a window
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+ANALYSES = ("thixotropy", "viscosity")
+
+# Limits protecting the service from oversized requests
+MAX_BODY_BYTES = 1 << 20
+MAX_FILES_PER_JOB = 10000
+
+# Finished jobs kept for GET /jobs/<id>; the oldest are forgotten first
+MAX_FINISHED_JOBS = 1000
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+
+def _json_value(value):
+    """Makes a metric JSON-safe: NaN and infinities become null."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if hasattr(value, "item"):
+        return _json_value(value.item())
+    return value
+
+
+def analyze_file(output_directory, analysis, file_path, plots):
+    """
+    Worker entry point: analyzes one file.
+
+    Parameters:
+    output_directory (str): Directory for the plots of the job.
+    analysis (str): "thixotropy" or "viscosity".
+    file_path (str): Path to the data file.
+    plots (bool): Whether to render the plot of the file.
+
+    Returns:
+    dict: {"metrics": dict, "plots": list of paths} or {"Error": message}. The viscosity
+          metrics are the yield stress estimates and the viscosity at the QC shear rates.
+    """
+    from processor import DataProcessor
+
+    processor = DataProcessor(output_directory, profile=False)
+    try:
+        if analysis == "thixotropy":
+            # Loaded once for both the metrics and the plot
+            df, metrics = processor.analyze_thixotropy_single(file_path)
+            if "Error" in metrics:
+                return metrics
+            plot_paths = [processor.process_thixotropy_single(file_path, df)[2]] if plots else []
+        else:
+            # Loaded once for the plot and both sets of metrics
+            if plots:
+                df, _, plot_path = processor.process_viscosity_single(file_path, ["FORWARD", "REVERSE"])
+                plot_paths = [plot_path]
+            else:
+                _, df = next(processor.iter_viscosity_multiple([file_path]))
+                plot_paths = []
+            sample = os.path.splitext(os.path.basename(file_path))[0]
+            metrics = processor.analyze_yield_stress_single(file_path, df)
+            metrics.update(processor.viscosity_at_shear_rates({sample: df}).loc[sample].to_dict())
+    except Exception as e:
+        return {"Error": f"Failed to analyze file: {str(e)}"}
+
+    return {"metrics": {metric: _json_value(value) for metric, value in metrics.items()}, "plots": plot_paths}
+
+
+class Job:
+    """A submitted batch and its progress."""
+
+    def __init__(self, job_id, files, analysis, plots):
+        self.id = job_id
+        self.files = files
+        self.analysis = analysis
+        self.plots = plots
+        self.status = "queued"
+        self.done = 0
+        self.results = {}
+        self.plot_paths = []
+        self.errors = {}
+        self.submitted = time.time()
+        self.finished = None
+        self._changed = asyncio.Condition()
+
+    def summary(self, full=True):
+        """Returns the job as a JSON-serializable dict."""
+        summary = {
+            "id": self.id,
+            "status": self.status,
+            "analysis": self.analysis,
+            "progress": {"done": self.done, "total": len(self.files)},
+            "submitted": self.submitted,
+            "finished": self.finished,
+        }
+        if full:
+            summary.update(results=self.results, plots=self.plot_paths, errors=self.errors)
+        return summary
+
+    async def notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def wait_for_change(self, done):
+        """Waits until more files are done than `done`, or the job ends."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.done > done or self.status in ("finished", "failed"))
+
+
+class AnalysisService:
+    """
+    Queues analysis jobs and runs them on a process pool.
+
+    At most `concurrent_jobs` jobs run at the same time, their files share
+    `workers` processes, and at most `queue_size` jobs wait. Submissions
+    beyond that are refused (HTTP 429) instead of piling up. A job has at
+    most `workers` files in the pool at a time, so a large job does not
+    hold up the files of the jobs running next to it.
+    """
+
+    def __init__(self, output_directory, workers=2, concurrent_jobs=1, queue_size=16):
+        """
+        Initialize the service.
+
+        Parameters:
+        output_directory (str): Directory where the plots are written, in one
+                                subdirectory per job named after the job id.
+        workers (int): Worker processes analyzing files.
+        concurrent_jobs (int): Jobs processed at the same time.
+        queue_size (int): Jobs allowed to wait before submissions are refused.
+        """
+        self.output_directory = output_directory
+        os.makedirs(self.output_directory, exist_ok=True)
+        self.workers = workers
+        self.concurrent_jobs = concurrent_jobs
+        self.queue_size = queue_size
+
+        self.jobs = OrderedDict()
+        self._ids = itertools.count(self._first_free_id())
+        self._queue = None
+        self._executor = None
+        self._runners = []
+        self._server = None
+
+    # ================ JOBS ================
+
+    def _first_free_id(self):
+        """Continues after the job directories of earlier runs, so their plots are not overwritten."""
+        ids = [int(name) for name in os.listdir(self.output_directory) if name.isdigit()]
+        return max(ids, default=0) + 1
+
+    def submit(self, files, analysis="thixotropy", plots=True):
+        """
+        Queue a job.
+
+        Parameters:
+        files (list of str): Paths to the data files, readable by the service.
+        analysis (str): "thixotropy" or "viscosity".
+        plots (bool): Whether to render one plot per file.
+
+        Returns:
+        Job: The queued job.
+
+        Raises:
+        ValueError: If the request is invalid.
+        asyncio.QueueFull: If the queue is full.
+        """
+        if analysis not in ANALYSES:
+            raise ValueError(f"Error: Unknown analysis '{analysis}'. Choose one of {', '.join(ANALYSES)}.")
+        if not isinstance(files, list) or not files or not all(isinstance(f, str) for f in files):
+            raise ValueError("Error: 'files' must be a non-empty list of file paths.")
+        if len(files) > MAX_FILES_PER_JOB:
+            raise ValueError(f"Error: A job may hold at most {MAX_FILES_PER_JOB} files.")
+
+        unsupported = [f for f in files if not is_supported_file(f)]
+        if unsupported:
+            raise ValueError(f"Error: Unsupported file types: {', '.join(unsupported)}")
+
+        job = Job(str(next(self._ids)), files, analysis, bool(plots))
+        self._queue.put_nowait(job)
+        self.jobs[job.id] = job
+        self._forget_finished_jobs()
+        return job
+
+    def _forget_finished_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished is not None]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job_id]
+
+    async def _run_jobs(self):
+        """Takes jobs from the queue and processes their files on the pool."""
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            await job.notify()
+
+            # Files of this job waiting in the pool at the same time
+            in_flight = asyncio.Semaphore(self.workers)
+            # Plots of samples with the same name in different jobs must not overwrite each other
+            job_directory = os.path.join(self.output_directory, job.id)
+
+            async def analyze(file_path):
+                async with in_flight:
+                    return await loop.run_in_executor(self._executor, analyze_file, job_directory,
+                                                      job.analysis, file_path, job.plots)
+
+            futures = [asyncio.ensure_future(analyze(file_path)) for file_path in job.files]
+            try:
+                for file_path, future in zip(job.files, futures):
+                    sample = os.path.splitext(os.path.basename(file_path))[0]
+                    try:
+                        result = await future
+                    except Exception as e:
+                        result = {"Error": f"Worker failed: {str(e)}"}
+                    if "Error" in result:
+                        job.errors[sample] = result["Error"]
+                    else:
+                        job.results[sample] = result["metrics"]
+                        job.plot_paths.extend(result["plots"])
+                    job.done += 1
+                    await job.notify()
+                job.status = "finished"
+            except Exception as e:
+                job.errors["job"] = str(e)
+                job.status = "failed"
+            finally:
+                for future in futures:
+                    future.cancel()
+                job.finished = time.time()
+                self._queue.task_done()
+                await job.notify()
+
+    # ================ HTTP ================
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """
+        Start the worker pool and listen for requests.
+
+        Returns:
+        tuple: (host, port) the service listens on; pass port=0 to pick a free port.
+        """
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        # Spawned workers start from a fresh interpreter; forked ones would inherit
+        # the open client connections and keep them from closing
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self._runners = [asyncio.create_task(self._run_jobs()) for _ in range(self.concurrent_jobs)]
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        """Stop listening, cancel the running jobs and shut the worker pool down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for runner in self._runners:
+            runner.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            if len(request_line) < 2:
+                await self._respond(writer, 400, {"Error": "Malformed request"})
+                return
+            method, path = request_line[0].upper(), request_line[1].split("?")[0].rstrip("/")
+
+            try:
+                length = int(headers.get("content-length", 0) or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                await self._respond(writer, 400, {"Error": "Invalid Content-Length header"})
+                return
+            if length > MAX_BODY_BYTES:
+                await self._respond(writer, 413, {"Error": f"Request body larger than {MAX_BODY_BYTES} bytes"})
+                return
+            body = await reader.readexactly(length) if length else b""
+
+            await self._route(writer, method, path, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            await self._respond(writer, 500, {"Error": str(e)})
+        finally:
+            writer.close()
+
+    async def _route(self, writer, method, path, body):
+        parts = path.strip("/").split("/")
+
+        if path == "/health" and method == "GET":
+            await self._respond(writer, 200, {
+                "status": "ok",
+                "queued": self._queue.qsize(),
+                "queue_size": self.queue_size,
+                "workers": self.workers,
+                "running": sum(job.status == "running" for job in self.jobs.values())
+            })
+        elif path == "/jobs" and method == "POST":
+            try:
+                request = json.loads(body or b"{}")
+                job = self.submit(request.get("files"), request.get("analysis", "thixotropy"),
+                                  request.get("plots", True))
+            except (ValueError, AttributeError) as e:
+                await self._respond(writer, 400, {"Error": str(e)})
+            except asyncio.QueueFull:
+                await self._respond(writer, 429, {"Error": "Job queue is full, retry later"},
+                                    {"Retry-After": "5"})
+            else:
+                await self._respond(writer, 202, job.summary(full=False),
+                                    {"Location": f"/jobs/{job.id}"})
+        elif path == "/jobs" and method == "GET":
+            await self._respond(writer, 200, [job.summary(full=False) for job in self.jobs.values()])
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                await self._respond(writer, 404, {"Error": f"Unknown job '{parts[1]}'"})
+            elif method != "GET":
+                await self._respond(writer, 405, {"Error": f"Method {method} not allowed"})
+            elif len(parts) == 2:
+                await self._respond(writer, 200, job.summary())
+            elif parts[2] == "events":
+                await self._stream_events(writer, job)
+            else:
+                await self._respond(writer, 404, {"Error": f"Unknown path '{path}'"})
+        else:
+            await self._respond(writer, 404, {"Error": f"Unknown path '{path}'"})
+
+    async def _stream_events(self, writer, job):
+        """Sends one JSON line per progress change until the job ends."""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        while True:
+            writer.write(json.dumps(job.summary(full=False)).encode() + b"\n")
+            await writer.drain()
+            if job.status in ("finished", "failed"):
+                break
+            await job.wait_for_change(job.done)
+
+    async def _respond(self, writer, status, payload, extra_headers=None):
+        body = json.dumps(payload, default=_json_value).encode()
+        headers = {"Content-Type": "application/json", "Content-Length": str(len(body)), "Connection": "close"}
+        headers.update(extra_headers or {})
+        head = f"HTTP/1.1 {status} {_REASONS[status]}\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        writer.write(head.encode() + b"\r\n" + body)
+        await writer.drain()
+
+
+async def serve(output_directory, host="127.0.0.1", port=8765, workers=2, concurrent_jobs=1, queue_size=16):
+    """Run the service until it is interrupted."""
+    service = AnalysisService(output_directory, workers, concurrent_jobs, queue_size)
+    host, port = await service.start(host, port)
+    print(f"Analysis service listening on http://{host}:{port}", file=sys.stderr)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the local rheology analysis service.")
+    parser.add_argument("output_directory", help="Directory where plots are written")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes analyzing files")
+    parser.add_argument("--concurrent-jobs", type=int, default=1, help="Jobs processed at the same time")
+    parser.add_argument("--queue-size", type=int, default=16, help="Jobs allowed to wait in the queue")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.output_directory, args.host, args.port, args.workers,
+                          args.concurrent_jobs, args.queue_size))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
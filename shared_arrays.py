@@ -0,0 +1,248 @@
+import ctypes
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+# Released blocks that could not be closed yet because views on them were still alive
+_unclosed_blocks = []
+
+# Blocks created by this process, kept open until they are attached. On Windows a
+# named block only exists while a handle on it is open, so a worker keeps its
+# blocks until it exits, which is after the parent has attached them.
+_created_blocks = {}
+
+
+def _close_released_blocks():
+    """Closes the released blocks whose views are gone by now."""
+    for block in list(_unclosed_blocks):
+        try:
+            block.close()
+        except BufferError:
+            continue
+        _unclosed_blocks.remove(block)
+
+
+def unlink_block(name):
+    """Removes a shared block by name if it exists (e.g. one created by a worker that never reported it)."""
+    created = _created_blocks.pop(name, None)
+    if created is not None:
+        created.close()
+    try:
+        block = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    block.unlink()
+    block.close()
+
+
+def share_frame(df, name=None):
+    """
+    Copies a loaded DataFrame into one shared memory block.
+
+    The numeric columns are stored as a float64 matrix with one row per column,
+    followed by the int16 codes of the text columns (e.g. 'Sweep' or 'peak').
+    The block stays open in this process (see _created_blocks) for another
+    process to attach; ownership passes to whoever attaches it (see SharedSample).
+
+    Parameters:
+    df (pd.DataFrame): Output of a data_import loader.
+    name (str): Name of the block, chosen by the process that will own it so that
+                it can remove the block even if this process never reports back.
+                Default: a random name.
+
+    Returns:
+    dict: Descriptor with the block name, the number of rows, the numeric
+          column names and the text columns with their labels.
+    """
+    numeric = [column for column in df.columns if pd.api.types.is_numeric_dtype(df[column])]
+    text = [column for column in df.columns if column not in numeric]
+    n_rows = len(df)
+
+    values_size = len(numeric) * n_rows * 8
+    codes_size = len(text) * n_rows * 2
+    block = shared_memory.SharedMemory(name=name, create=True, size=max(values_size + codes_size, 1))
+
+    values = np.ndarray((len(numeric), n_rows), dtype=np.float64, buffer=block.buf)
+    values[:] = df[numeric].to_numpy(dtype=np.float64).T
+    codes = np.ndarray((len(text), n_rows), dtype=np.int16, buffer=block.buf, offset=values_size)
+    labels = {}
+    for i, column in enumerate(text):
+        categorical = pd.Categorical(df[column])
+        codes[i] = categorical.codes
+        labels[column] = list(categorical.categories)
+
+    descriptor = {"name": block.name, "rows": n_rows, "numeric": numeric, "text": labels,
+                  "columns": list(df.columns)}
+
+    # Only the owner unlinks the block; this handle just keeps it alive until then
+    del values, codes
+    _created_blocks[block.name] = block
+    return descriptor
+
+
+class SharedSample:
+    """
+    A loaded sample whose arrays live in a shared memory block.
+
+    The arrays are NumPy views on the block, so attaching costs no copy.
+    Call release() (or use the sample as a context manager) when the sample is
+    evicted; the block is also released when the object is garbage collected.
+    """
+
+    def __init__(self, descriptor):
+        """
+        Attach to the block described by a share_frame descriptor.
+
+        Parameters:
+        descriptor (dict): Output of share_frame.
+        """
+        _close_released_blocks()
+        self.descriptor = descriptor
+        self._block = shared_memory.SharedMemory(name=descriptor["name"])
+
+        # Created in this process (files loaded without workers): one handle is enough
+        created = _created_blocks.pop(descriptor["name"], None)
+        if created is not None:
+            created.close()
+
+        # The arrays are based on a ctypes view that holds an export of the mapping,
+        # so the mapping cannot be unmapped while any array on it (e.g. in a frame)
+        # is alive. NumPy would unwrap a memoryview and keep no such export.
+        buffer = (ctypes.c_char * self._block.size).from_buffer(self._block._mmap)
+        n_rows = descriptor["rows"]
+        n_numeric = len(descriptor["numeric"])
+        self.values = np.ndarray((n_numeric, n_rows), dtype=np.float64, buffer=buffer)
+        self.codes = np.ndarray((len(descriptor["text"]), n_rows), dtype=np.int16, buffer=buffer,
+                                offset=n_numeric * n_rows * 8)
+
+    def __getitem__(self, column):
+        """Returns one numeric column as a view on the shared block."""
+        return self.values[self.descriptor["numeric"].index(column)]
+
+    def __len__(self):
+        return self.descriptor["rows"]
+
+    def frame(self):
+        """
+        Builds a DataFrame on top of the shared arrays.
+
+        The numeric columns are views on the block, not copies; the text columns
+        are categoricals built from the stored codes.
+
+        Returns:
+        pd.DataFrame: The sample with its original columns, in order.
+        """
+        df = pd.DataFrame(self.values.T, columns=self.descriptor["numeric"], copy=False)
+        # Insert the text columns in place: selecting the columns in order would copy the block
+        for i, (column, labels) in enumerate(self.descriptor["text"].items()):
+            df.insert(self.descriptor["columns"].index(column), column,
+                      pd.Categorical.from_codes(self.codes[i], labels))
+        return df
+
+    def release(self):
+        """
+        Free the shared block.
+
+        The block's name is removed at once. Its memory is returned to the system
+        when the last view on it (including frames built by frame()) is gone.
+        """
+        if self._block is None:
+            return
+        block, self._block = self._block, None
+        self.values = self.codes = None
+        block.unlink()
+        try:
+            block.close()
+        except BufferError:
+            # Views are still alive elsewhere (e.g. in frames): close the block once they are gone
+            _unclosed_blocks.append(block)
+        _close_released_blocks()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def __del__(self):
+        if getattr(self, "_block", None) is not None:
+            self.release()
+
+
+def load_shared(kind, file_path, name=None):
+    """
+    Worker entry point: loads one file and places its arrays in shared memory.
+
+    Parameters:
+    kind (str): "viscosity" or "thixotropy".
+    file_path (str): Path to the data file.
+    name (str): Name of the shared block, see share_frame.
+
+    Returns:
+    dict: share_frame descriptor, or {"Error": message} if the file cannot be loaded.
+    """
+    from data_import import load_viscosity_stress_data, load_thixotropy_data
+
+    try:
+        loader = load_viscosity_stress_data if kind == "viscosity" else load_thixotropy_data
+        return share_frame(loader(file_path), name)
+    except Exception as e:
+        return {"Error": f"Failed to load file: {str(e)}"}
+
+
+def _load_shared_job(args):
+    return load_shared(*args)
+
+
+def load_shared_multiple(file_paths, kind="thixotropy", max_workers=None):
+    """
+    Loads many files in worker processes and attaches their arrays without copying.
+
+    Only the small descriptors are pickled back from the workers. Every block
+    is attached as soon as its descriptor arrives, while the workers still hold
+    their own handles, and the workers release theirs when the pool shuts down.
+    The block names are chosen here, so every block a worker created but did
+    not hand over (because it failed or the pool broke) is removed before returning.
+
+    Parameters:
+    file_paths (list of str): Paths to the data files.
+    kind (str): "viscosity" or "thixotropy".
+    max_workers (int): Number of worker processes. Default: number of CPUs.
+                       With 1 the files are loaded in this process.
+
+    Returns:
+    list: A SharedSample, or {"Error": message}, for each file in order.
+    """
+    # Short enough for macOS, whose POSIX names are limited to 31 characters
+    names = [f"rheology_{secrets.token_hex(6)}" for _ in file_paths]
+    jobs = [(kind, file_path, name) for file_path, name in zip(file_paths, names)]
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if os.name == "posix":
+        # Workers must register their blocks with this process's resource tracker: a
+        # tracker of their own would remove the blocks when the workers exit
+        from multiprocessing import resource_tracker
+        resource_tracker.ensure_running()
+
+    samples = []
+    try:
+        if max_workers == 1 or len(jobs) < 2:
+            for descriptor in map(_load_shared_job, jobs):
+                samples.append(descriptor if "Error" in descriptor else SharedSample(descriptor))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                # Attach as the descriptors arrive so that every block gets an owner
+                for descriptor in executor.map(_load_shared_job, jobs):
+                    samples.append(descriptor if "Error" in descriptor else SharedSample(descriptor))
+    finally:
+        attached = {sample.descriptor["name"] for sample in samples if isinstance(sample, SharedSample)}
+        for name in names:
+            if name not in attached:
+                unlink_block(name)
+    return samples
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The modules live at the top level of the repository
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+# Plots are written to files only; never open a window
+os.environ.setdefault("MPLBACKEND", "Agg")
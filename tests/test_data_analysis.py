@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import write_trios_workbook
+from data_analysis import calculate_80_percent_viscosity_recovery, calculate_cycle_metrics, \
+    calculate_recovery_times, calculate_thixotropic_index, calculate_viscosity_ratio, interpolate_curves, \
+    recovery_crossing_times, recovery_time_column
+from data_import import load_peak_hold_steps, load_thixotropy_data, peak_hold_phases
+
+
+def test_interpolate_curves_matches_np_interp():
+    rng = np.random.default_rng(0)
+    x = np.sort(rng.uniform(0, 10, (3, 25)), axis=1)
+    y = rng.normal(size=(3, 25))
+    grid = np.linspace(x[:, 0].max(), x[:, -1].min(), 40)
+
+    values = interpolate_curves(x, y, grid)
+
+    for i in range(3):
+        np.testing.assert_allclose(values[i], np.interp(grid, x[i], y[i]))
+
+
+def test_interpolate_curves_unsorted_padded_and_out_of_range():
+    # A decreasing REVERSE-like curve, and a shorter curve padded with NaN
+    x = np.array([[4.0, 3.0, 2.0, 1.0], [1.0, 2.0, 3.0, np.nan]])
+    y = np.array([[40.0, 30.0, 20.0, 10.0], [1.0, 4.0, 9.0, np.nan]])
+    grid = np.array([0.5, 1.5, 2.5, 3.5])
+
+    values = interpolate_curves(x, y, grid)
+
+    np.testing.assert_allclose(values[0], [np.nan, 15.0, 25.0, 35.0])
+    np.testing.assert_allclose(values[1], [np.nan, 2.5, 6.5, np.nan])
+
+
+def test_interpolate_curves_single_curve_is_1d():
+    values = interpolate_curves([0.0, 1.0, 2.0], [0.0, 10.0, 20.0], [0.25, 1.5])
+    np.testing.assert_allclose(values, [2.5, 15.0])
+
+
+def test_recovery_crossing_times_interpolates_the_first_crossing():
+    time = np.array([0.0, 1.0, 2.0, 3.0, 4.0])
+    viscosity = np.array([10.0, 20.0, 40.0, 30.0, 80.0])
+
+    times = recovery_crossing_times(time, viscosity, [15.0, 40.0, 60.0, 100.0])
+
+    # 60 is first reached between t=3 (30) and t=4 (80); 100 is never reached
+    np.testing.assert_allclose(times, [0.5, 2.0, 3.6, np.nan])
+
+
+def test_recovery_crossing_times_batch_matches_single_curves():
+    time = np.array([[0.0, 1.0, 2.0, 3.0], [0.0, 2.0, 4.0, np.nan]])
+    viscosity = np.array([[0.0, 10.0, 20.0, 30.0], [5.0, 15.0, 25.0, np.nan]])
+    targets = np.array([[5.0, 25.0], [10.0, 30.0]])
+
+    times = recovery_crossing_times(time, viscosity, targets)
+
+    assert times.shape == (2, 2)
+    for i in range(2):
+        valid = np.isfinite(time[i])
+        np.testing.assert_allclose(times[i], recovery_crossing_times(time[i][valid], viscosity[i][valid],
+                                                                     targets[i]))
+    np.testing.assert_allclose(times, [[0.5, 2.5], [1.0, np.nan]])
+
+
+def test_recovery_crossing_times_target_reached_at_first_point():
+    assert recovery_crossing_times([0.0, 1.0], [50.0, 60.0], [40.0]) == pytest.approx([0.0])
+
+
+def thixotropy_frame(recovery):
+    return pd.DataFrame({"Step time": [1.0, 2.0, 1.0] + [float(t) for t in range(1, len(recovery) + 1)],
+                         "Viscosity": [90.0, 100.0, 5.0] + list(recovery),
+                         "peak": ["PRESHEAR", "PRESHEAR", "HIGHSHEAR"] + ["RECOVERY"] * len(recovery)})
+
+
+def test_80_percent_recovery_time_is_the_closest_point():
+    df = thixotropy_frame([10.0, 50.0, 79.0, 85.0, 90.0])
+
+    assert calculate_80_percent_viscosity_recovery(df) == 3.0
+    assert calculate_recovery_times(df, [80])[80.0] == pytest.approx(3 + 1 / 6)
+
+
+def test_80_percent_recovery_time_when_80_percent_is_never_reached():
+    df = thixotropy_frame([10.0, 20.0, np.nan, 30.0])
+
+    assert calculate_80_percent_viscosity_recovery(df) == 4.0
+    assert np.isnan(calculate_recovery_times(df, [80])[80.0])
+
+
+def cycle_frame(steps):
+    """Stacks (step time, viscosity) curves of consecutive peak-hold steps like load_peak_hold_steps."""
+    phases, cycles = peak_hold_phases(len(steps))
+    frames = [pd.DataFrame({"Step time": time, "Viscosity": viscosity, "peak": phase, "Step": number,
+                            "Cycle": cycle})
+              for number, ((time, viscosity), phase, cycle) in enumerate(zip(steps, phases, cycles), start=1)]
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_peak_hold_phases():
+    assert peak_hold_phases(5) == (["PRESHEAR", "HIGHSHEAR", "RECOVERY", "HIGHSHEAR", "RECOVERY"], [0, 1, 1, 2, 2])
+
+
+def test_cycle_metrics_of_two_cycles():
+    df = cycle_frame([
+        ([1, 2], [120.0, 100.0]),
+        ([1, 2], [20.0, 10.0]),
+        ([1, 2, 3, 4], [10.0, 40.0, 70.0, 90.0]),
+        ([1, 2], [30.0, 20.0]),
+        ([1, 2, 3], [20.0, 40.0, 60.0]),
+    ])
+
+    metrics = calculate_cycle_metrics(df, thresholds=(50, 80))
+
+    assert list(metrics.index) == [1, 2]
+    np.testing.assert_allclose(metrics["Viscosity Ratio (%)"], [90, 60])
+    np.testing.assert_allclose(metrics["Thixotropic Index"], [10, 5])
+    np.testing.assert_allclose(metrics["Structural Recovery (%)"], [80 / 90 * 100, 40 / 80 * 100])
+    np.testing.assert_allclose(metrics[recovery_time_column(50)], [2 + 1 / 3, 2.5])
+    np.testing.assert_allclose(metrics[recovery_time_column(80)], [3.5, np.nan])
+
+
+def test_cycle_metrics_skip_an_incomplete_last_cycle():
+    df = cycle_frame([([1], [100.0]), ([1], [10.0]), ([1, 2], [10.0, 90.0]), ([1], [20.0])])
+
+    assert list(calculate_cycle_metrics(df).index) == [1]
+
+
+def test_cycle_metrics_without_a_complete_cycle():
+    with pytest.raises(ValueError, match="no complete cycle"):
+        calculate_cycle_metrics(cycle_frame([([1], [100.0]), ([1], [10.0])]))
+
+
+def test_cycle_metrics_of_a_three_step_export_match_the_single_metrics(tmp_path):
+    path = write_trios_workbook(str(tmp_path / "run.txt"), seed=3)
+
+    metrics = calculate_cycle_metrics(load_peak_hold_steps(path)).loc[1]
+    df = load_thixotropy_data(path)
+
+    assert metrics["Viscosity Ratio (%)"] == pytest.approx(calculate_viscosity_ratio(df))
+    assert metrics["Thixotropic Index"] == pytest.approx(calculate_thixotropic_index(df))
@@ -0,0 +1,80 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import write_trios_workbook
+from data_import import detect_file_format, load_viscosity_stress_data, read_trios_sheets
+
+TEXT_EXPORT = (
+    "Filename\trun.txt\n"
+    "\n"
+    "[step]\n"
+    "Flow sweep - 1\n"
+    "Stress\tShear rate\tViscosity\n"
+    "Pa\t1/s\tPa.s\n"
+    "10\t1\t10\n"
+    "20\t10\t2\n"
+    "[step]\n"
+    "Flow sweep - 2\n"
+    "Stress\tShear rate\tViscosity\n"
+    "Pa\t1/s\tPa.s\n"
+    "18\t10\t1.8\n"
+    "9\t1\t9\n"
+    "\n"
+    "[step]\n"
+    "Peak hold - 1\n"
+    "Step time\tViscosity\n"
+    "s\tPa.s\n"
+    "0.1\t5\n"
+)
+
+
+@pytest.mark.parametrize("source, copy, expected", [
+    ("run.xlsx", "run.xls", "xlsx"),
+    ("run.xls", "run.txt", "xls"),
+    ("run.xlsx", "run.csv", "xlsx"),
+    ("run.txt", "run.xlsx", "xlsx"),
+    ("run.csv", "run.dat", "text"),
+])
+def test_signature_takes_precedence_over_the_extension(tmp_path, source, copy, expected):
+    write_trios_workbook(str(tmp_path / source), seed=1)
+    shutil.copy(tmp_path / source, tmp_path / copy)
+
+    # Text exports have no signature: only then does the extension decide
+    assert detect_file_format(str(tmp_path / copy)) == expected
+
+
+def test_workbook_with_the_wrong_extension_loads(tmp_path):
+    write_trios_workbook(str(tmp_path / "run.xlsx"), seed=1)
+    shutil.copy(tmp_path / "run.xlsx", tmp_path / "renamed.xls")
+
+    pd.testing.assert_frame_equal(load_viscosity_stress_data(str(tmp_path / "renamed.xls")),
+                                  load_viscosity_stress_data(str(tmp_path / "run.xlsx")))
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "utf-16"])
+def test_text_export_steps(tmp_path, encoding):
+    path = tmp_path / "run.txt"
+    path.write_text(TEXT_EXPORT, encoding=encoding)
+
+    sheets = read_trios_sheets(str(path), ["Flow sweep - 1", "Flow sweep - 2", "Peak hold - 1"])
+
+    # The units row is dropped and a section ends at the next [step] marker or a blank line
+    assert list(sheets["Flow sweep - 1"].columns) == ["Stress", "Shear rate", "Viscosity"]
+    np.testing.assert_array_equal(sheets["Flow sweep - 1"]["Viscosity"], [10, 2])
+    np.testing.assert_array_equal(sheets["Flow sweep - 2"]["Shear rate"], [10, 1])
+    assert sheets["Peak hold - 1"].shape == (1, 2)
+
+    merged = load_viscosity_stress_data(str(path))
+    assert list(merged["Sweep"]) == ["FORWARD", "FORWARD", "REVERSE", "REVERSE"]
+
+
+def test_text_export_with_a_missing_step(tmp_path):
+    path = tmp_path / "run.csv"
+    path.write_text(TEXT_EXPORT.replace("\t", ","), encoding="utf-8")
+
+    assert list(read_trios_sheets(str(path), ["Flow sweep - 2"])["Flow sweep - 2"]["Stress"]) == [18, 9]
+    with pytest.raises(ValueError, match="missing required sheets"):
+        read_trios_sheets(str(path), ["Peak hold - 2"])
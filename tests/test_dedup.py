@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import write_trios_workbook
+from data_import import load_thixotropy_data, load_viscosity_stress_data
+from dedup import DuplicateFilter, payload_digest
+
+
+def frame(**columns):
+    return pd.DataFrame({"Shear rate": [0.1, 1.0, 10.0], "Viscosity": [5.0, np.nan, 0.5],
+                         "Sweep": ["FORWARD", "FORWARD", "REVERSE"], **columns})
+
+
+def test_integer_and_float_columns_give_the_same_digest():
+    assert payload_digest(frame(Step=[1, 2, 3])) == payload_digest(frame(Step=[1.0, 2.0, 3.0]))
+
+
+def test_nan_and_negative_zero_are_normalised():
+    a = frame(Temperature=[0.0, float("nan"), 25.0])
+    b = frame(Temperature=[-0.0, -np.nan, 25.0])
+    assert payload_digest(a) == payload_digest(b)
+
+
+def test_different_values_labels_or_columns_change_the_digest():
+    base = payload_digest(frame())
+    changed_value = frame()
+    changed_value.loc[0, "Viscosity"] = 5.0001
+    changed_label = frame()
+    changed_label.loc[2, "Sweep"] = "FORWARD"
+
+    assert payload_digest(changed_value) != base
+    assert payload_digest(changed_label) != base
+    assert payload_digest(frame().rename(columns={"Viscosity": "Stress"})) != base
+
+
+def test_digest_ignores_the_index():
+    assert payload_digest(frame()) == payload_digest(frame().set_index(pd.Index([10, 20, 30])))
+
+
+def test_same_run_exported_as_xls_and_xlsx_is_a_duplicate(tmp_path):
+    xls = write_trios_workbook(str(tmp_path / "run.xls"), "small", seed=3)
+    xlsx = write_trios_workbook(str(tmp_path / "run.xlsx"), "small", seed=3)
+    other = write_trios_workbook(str(tmp_path / "other.xlsx"), "small", seed=4)
+
+    for load in (load_viscosity_stress_data, load_thixotropy_data):
+        assert payload_digest(load(xls)) == payload_digest(load(xlsx))
+
+        duplicates = DuplicateFilter()
+        assert [duplicates.is_duplicate(path, load(path)) for path in (xls, xlsx, other)] == [False, True, False]
+        assert duplicates.report()[["File", "Duplicate of", "Match"]].values.tolist() == [[xlsx, xls, "payload"]]
+
+
+def test_value_rounded_across_a_digest_step_is_still_a_duplicate():
+    # Exactly halfway between two steps of the digest: the next float rounds the other way
+    value = np.ldexp(2.0 ** 31 + 0.5, -32)
+    a = frame(Stress=[value, 2.0, 3.0])
+    b = frame(Stress=[np.nextafter(value, np.inf), 2.0, 3.0])
+    assert payload_digest(a) != payload_digest(b)
+
+    duplicates = DuplicateFilter()
+    assert not duplicates.is_duplicate("a.xls", a)
+    assert duplicates.is_duplicate("b.xlsx", b)
+    assert not duplicates.is_duplicate("c.xlsx", frame(Stress=[value * (1 + 1e-6), 2.0, 3.0]))
+
+
+def test_different_layout_is_not_a_duplicate():
+    duplicates = DuplicateFilter()
+    assert not duplicates.is_duplicate("a.xlsx", frame())
+    changed_label = frame()
+    changed_label.loc[2, "Sweep"] = "FORWARD"
+    assert not duplicates.is_duplicate("b.xlsx", changed_label)
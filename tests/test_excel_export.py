@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from excel_export import long_to_wide, results_to_long, write_excel_streaming
+from processor import DataProcessor
+
+RESULTS = {
+    "B": {"Thixotropic Index": 2.0, "Viscosity Ratio (%)": 80.0},
+    "Empty": {},
+    "A": {"Viscosity Ratio (%)": 60.0, "Outlier": True},
+}
+
+
+def test_long_to_wide_keeps_the_order_and_samples_without_metrics():
+    long_df = results_to_long(RESULTS)
+    assert len(long_df) == 4
+
+    wide = long_to_wide(long_df, RESULTS)
+    assert list(wide.columns) == ["Sample", "Thixotropic Index", "Viscosity Ratio (%)", "Outlier"]
+    assert list(wide["Sample"]) == ["B", "Empty", "A"]
+    assert wide.loc[1, ["Thixotropic Index", "Viscosity Ratio (%)", "Outlier"]].isna().all()
+    assert np.isnan(wide.loc[2, "Thixotropic Index"])
+
+    # Without the sample list only the samples with metrics are kept
+    assert list(long_to_wide(long_df)["Sample"]) == ["B", "A"]
+
+
+def test_write_excel_streaming_sheet_names_and_missing_values(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    df = pd.DataFrame({"x": [np.nan, 2.0], "label": ["a", None]})
+    sheets = (name for name in ["Sample: 1/2", "Sample? 1*2", "A" * 40, "a" * 40])
+
+    write_excel_streaming(path, ((name, df) for name in sheets))
+
+    workbook = load_workbook(path, read_only=True)
+    assert workbook.sheetnames == ["Sample_ 1_2", "Sample_ 1_2 (2)", "A" * 31, "a" * 27 + " (2)"]
+    # Missing values are written as empty cells
+    written = pd.read_excel(path, sheet_name="Sample_ 1_2")
+    pd.testing.assert_frame_equal(written.isna(), df.isna())
+    assert (written.loc[1, "x"], written.loc[0, "label"]) == (2, "a")
+
+
+def test_write_excel_streaming_without_sheets(tmp_path):
+    path = write_excel_streaming(str(tmp_path / "out.xlsx"), iter([]))
+    assert load_workbook(path, read_only=True).sheetnames == ["Sheet"]
+
+
+def test_excel_export_of_samples_without_metrics(tmp_path):
+    processor = DataProcessor(str(tmp_path / "out"), profile=False)
+    path = str(tmp_path / "results.xlsx")
+
+    assert processor.export_thixotropy_results_multiple({"A": {}, "B": {}}, path, "excel") == (True, path)
+
+    summary = pd.read_excel(path, sheet_name="Metrics Summary")
+    assert list(summary["Sample"]) == ["A", "B"]
+    assert pd.read_excel(path, sheet_name="Metrics Detail").empty
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fleet_archive import FleetArchive
+
+
+def thixotropy_frame(scale):
+    peaks = ["PRESHEAR"] * 3 + ["HIGHSHEAR"] * 2 + ["RECOVERY"] * 4
+    return pd.DataFrame({"Step time": np.arange(9, dtype=float), "Time": np.arange(9, dtype=float) + 100,
+                         "Viscosity": scale * np.arange(1, 10, dtype=float), "peak": peaks})
+
+
+def viscosity_frame():
+    return pd.DataFrame({"Shear rate": [0.1, 1.0, 1.0, 0.1], "Viscosity": [50.0, 5.0, 6.0, 40.0],
+                         "Stress": [5.0, 5.0, 6.0, 4.0], "Sweep": ["FORWARD", "FORWARD", "REVERSE", "REVERSE"]})
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = FleetArchive(str(tmp_path / "fleet"))
+    archive.append("X_1", "thixotropy", thixotropy_frame(1.0), date="2024-03-01", product="X")
+    archive.append("Y_1", "thixotropy", thixotropy_frame(2.0), date="2024-04-15", product="Y")
+    archive.append("X_2", "viscosity", viscosity_frame(), date="2024-03-20", product="X")
+    return archive
+
+
+def test_find(archive):
+    assert [s["name"] for s in archive.find(product="X")] == ["X_1", "X_2"]
+    assert [s["name"] for s in archive.find(kind="thixotropy", since="2024-04-01")] == ["Y_1"]
+    assert [s["name"] for s in archive.find(until="2024-03")] == ["X_1", "X_2"]
+    assert [s["name"] for s in archive.find(pattern="^Y")] == ["Y_1"]
+
+
+def test_curves_return_the_appended_values(archive):
+    curves = archive.curves("RECOVERY", product="Y")
+
+    assert len(curves) == 1
+    sample, columns = curves[0]
+    assert sample["name"] == "Y_1"
+    np.testing.assert_array_equal(columns["Step time"], [5.0, 6.0, 7.0, 8.0])
+    np.testing.assert_array_equal(columns["Viscosity"], [12.0, 14.0, 16.0, 18.0])
+
+
+def test_frame_keeps_segments_and_missing_columns(archive):
+    df = archive.frame(name="X_2")
+
+    assert df["Segment"].tolist() == ["FORWARD", "FORWARD", "REVERSE", "REVERSE"]
+    np.testing.assert_array_equal(df["Viscosity"], [50.0, 5.0, 6.0, 40.0])
+    # A flow sweep has no 'Time'
+    assert df["Time"].isna().all()
+
+
+def test_reopened_archive_reads_the_same_data(archive):
+    reopened = FleetArchive(archive.directory)
+
+    assert len(reopened) == 3
+    pd.testing.assert_frame_equal(reopened.frame(), archive.frame())
+
+
+def test_index_line_cut_short_is_dropped(archive):
+    with open(archive.index_path, "a") as f:
+        f.write('{"id": 3, "name": "cut')
+
+    reopened = FleetArchive(archive.directory)
+
+    assert [s["name"] for s in reopened.samples] == ["X_1", "Y_1", "X_2"]
+    entry = reopened.append("Z_1", "thixotropy", thixotropy_frame(3.0), date="2024-05-01")
+    assert entry["start"] == 9 + 9 + 4
+    np.testing.assert_array_equal(reopened.curves("PRESHEAR", name="Z_1")[0][1]["Viscosity"], [3.0, 6.0, 9.0])
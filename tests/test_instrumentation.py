@@ -0,0 +1,53 @@
+import tracemalloc
+
+import pytest
+
+from instrumentation import StageTimer
+
+MB = 2 ** 20
+
+
+@pytest.fixture
+def tracing():
+    tracemalloc.start()
+    yield
+    tracemalloc.stop()
+
+
+def traced_peak_mb(timer):
+    return timer.records[-1][3]["traced_peak_mb"]
+
+
+def test_span_peak_without_caller_tracing():
+    timer = StageTimer(memory=True)
+    with timer.span("load", "a.txt"):
+        data = bytearray(8 * MB)
+        del data
+
+    assert traced_peak_mb(timer) == pytest.approx(8, abs=0.5)
+    assert not tracemalloc.is_tracing()
+
+
+def test_span_keeps_the_caller_peak(tracing):
+    data = bytearray(32 * MB)
+    del data
+    _, caller_peak = tracemalloc.get_traced_memory()
+
+    timer = StageTimer(memory=True)
+    with timer.span("load", "a.txt"):
+        kept = bytearray(4 * MB)
+
+    # The caller's peak is not reset, and the span records the memory it still holds
+    assert tracemalloc.get_traced_memory()[1] >= caller_peak
+    assert traced_peak_mb(timer) == pytest.approx(4, abs=0.5)
+    assert tracemalloc.is_tracing()
+    del kept
+
+
+def test_span_above_the_caller_peak(tracing):
+    timer = StageTimer(memory=True)
+    with timer.span("load", "a.txt"):
+        data = bytearray(16 * MB)
+        del data
+
+    assert traced_peak_mb(timer) == pytest.approx(16, abs=0.5)
@@ -0,0 +1,86 @@
+import os
+import time
+
+import pytest
+
+from isolation import IsolatedWorker
+
+
+def worker_pid(file_path):
+    return os.getpid()
+
+
+def sleep(file_path, seconds):
+    time.sleep(seconds)
+
+
+def exit_process(file_path, code):
+    os._exit(code)
+
+
+def raise_error(file_path, error):
+    raise error
+
+
+def allocate(file_path, size):
+    return len(bytearray(size))
+
+
+@pytest.fixture
+def worker():
+    worker = IsolatedWorker(timeout=60, memory_limit=None)
+    yield worker
+    worker.stop()
+
+
+def test_worker_is_kept_between_files(worker):
+    pid = worker.read(worker_pid, "a.txt")
+    assert pid != os.getpid()
+
+    with pytest.raises(ValueError, match="unreadable"):
+        worker.read(raise_error, "a.txt", ValueError("unreadable"))
+    assert worker.read(worker_pid, "b.txt") == pid
+
+
+def test_timeout_stops_the_worker(worker):
+    pid = worker.read(worker_pid, "a.txt")
+    worker.timeout = 1
+
+    start = time.time()
+    with pytest.raises(ValueError, match="took longer than 1 s"):
+        worker.read(sleep, "slow.txt", 60)
+    assert time.time() - start < 30
+    assert worker.read(worker_pid, "b.txt") != pid
+
+
+def test_crashed_worker_is_replaced(worker):
+    with pytest.raises(ValueError, match=r"crashed \(exit code 3\)"):
+        worker.read(exit_process, "crash.txt", 3)
+    assert worker.read(worker_pid, "b.txt") != os.getpid()
+
+
+def test_worker_killed_between_files_is_replaced(worker):
+    pid = worker.read(worker_pid, "a.txt")
+    worker._process.kill()
+    worker._process.join()
+
+    assert worker.read(worker_pid, "b.txt") != pid
+
+
+def test_memory_error_replaces_the_worker(worker):
+    pid = worker.read(worker_pid, "a.txt")
+
+    with pytest.raises(ValueError, match="Out of memory"):
+        worker.read(raise_error, "huge.txt", MemoryError())
+    assert worker.read(worker_pid, "b.txt") != pid
+
+
+@pytest.mark.skipif(os.name == "nt", reason="The memory ceiling is not enforced on Windows")
+def test_memory_ceiling():
+    worker = IsolatedWorker(timeout=60, memory_limit=1024 ** 3)
+    try:
+        with pytest.raises(ValueError, match=r"Out of memory \(limit 1024 MB\)"):
+            worker.read(allocate, "huge.txt", 4 * 1024 ** 3)
+        assert worker.read(allocate, "small.txt", 1024) == 1024
+    finally:
+        worker.stop()
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from outliers import screen_curves, screen_viscosity
+
+RATE = np.geomspace(0.1, 100, 30)
+
+
+def test_obvious_outlier_is_flagged():
+    names = ["A_1", "A_2", "A_3", "A_4", "A_5"]
+    factors = [1.0, 1.03, 0.97, 1.01, 5.0]
+    curves = [f * 10.0 * RATE ** -0.5 for f in factors]
+
+    report = screen_curves(names, [RATE] * 5, curves, log_x=True)
+
+    assert report["Outlier"].tolist() == [False, False, False, False, True]
+    assert report.loc["A_5", "Score"] > report.drop("A_5")["Score"].max()
+    assert (report["Group"] == "A").all()
+
+
+def test_consistent_group_and_small_group_have_no_outliers():
+    names = ["A_1", "A_2", "A_3", "B_1", "B_2"]
+    curves = [10.0 * RATE ** -0.5 * f for f in (1.0, 1.02, 0.98, 1.0, 5.0)]
+
+    report = screen_curves(names, [RATE] * 5, curves, log_x=True)
+
+    assert not report["Outlier"].any()
+    # Groups of fewer than three curves are not screened
+    assert report.loc[["B_1", "B_2"], "Score"].isna().all()
+
+
+def test_screen_viscosity_uses_the_requested_sweep():
+    def frame(forward_factor):
+        return pd.DataFrame({"Shear rate": np.concatenate([RATE, RATE[::-1]]),
+                             "Viscosity": np.concatenate([forward_factor * RATE ** -0.5, RATE[::-1] ** -0.5]),
+                             "Sweep": ["FORWARD"] * len(RATE) + ["REVERSE"] * len(RATE)})
+
+    dataframes = {"A_1": frame(1.0), "A_2": frame(1.02), "A_3": frame(0.99), "A_4": frame(8.0)}
+
+    assert screen_viscosity(dataframes, "FORWARD")["Outlier"].tolist() == [False, False, False, True]
+    assert not screen_viscosity(dataframes, "REVERSE")["Outlier"].any()
+
+
+def test_no_curves():
+    assert screen_curves([], [], []).empty
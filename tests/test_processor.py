@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+
+from benchmarks.synthetic import generate_dataset
+from processor import DataProcessor
+
+
+def test_recovery_times_of_files_with_the_same_name(tmp_path):
+    first = generate_dataset(str(tmp_path / "a"), 2, "small", "txt", seed=0)
+    second = generate_dataset(str(tmp_path / "b"), 1, "small", "txt", seed=10)
+    missing = str(tmp_path / "c" / os.path.basename(first[0]))
+    file_paths = [first[0], first[1], second[0], missing]
+
+    processor = DataProcessor(str(tmp_path / "out"), profile=False)
+    times = processor.analyze_recovery_times_multiple(file_paths, thresholds=(50, 80))
+
+    # One row per file, even though first[0], second[0] and missing share a name
+    assert list(times.index) == ["Sample0001_1", "Sample0001_2", "Sample0001_1", "Sample0001_1"]
+    single = [processor.analyze_recovery_times_multiple([path], thresholds=(50, 80)) for path in file_paths[:3]]
+    for row, expected in enumerate(single):
+        np.testing.assert_allclose(times.iloc[row, :2].to_numpy(dtype=float), expected.iloc[0].to_numpy(dtype=float))
+    assert times["Error"].iloc[3].startswith("Failed to analyze file")
+    assert times["Error"].iloc[:3].isna().all()
+
+
+def test_deduplicate_drops_the_same_run_in_another_format(tmp_path):
+    xls = generate_dataset(str(tmp_path / "a"), 2, "small", "xls")
+    xlsx = generate_dataset(str(tmp_path / "b"), 1, "small", "xlsx")
+
+    processor = DataProcessor(str(tmp_path / "out"), profile=False)
+    times = processor.analyze_recovery_times_multiple(xls + xlsx, deduplicate=True)
+
+    assert list(times.index) == ["Sample0001_1", "Sample0001_2"]
+    report = processor.duplicate_report()
+    assert report[["File", "Duplicate of", "Match"]].values.tolist() == [[xlsx[0], xls[0], "payload"]]
+
+
+def test_grid_without_loadable_samples(tmp_path):
+    missing = str(tmp_path / "Missing_1.txt")
+    processor = DataProcessor(str(tmp_path / "out"), profile=False)
+
+    paths, errors = processor.process_viscosity_grid([missing], max_workers=1)
+    assert paths == [str(tmp_path / "out" / "grid-viscosity.pdf")]
+    assert os.path.getsize(paths[0]) > 0
+    assert list(errors) == ["Missing_1"]
+
+    paths, errors = processor.process_thixotropy_grid([], page_format="png", max_workers=1)
+    assert paths == [str(tmp_path / "out" / "grid-thixotropy-page001.png")]
+    assert os.path.exists(paths[0])
+    assert errors == {}
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import write_trios_workbook
+from data_import import load_thixotropy_data, load_viscosity_stress_data
+from processor import DataProcessor
+from sample import RheologySample
+
+
+@pytest.fixture
+def viscosity_frame(tmp_path):
+    return load_viscosity_stress_data(write_trios_workbook(str(tmp_path / "run.txt"), seed=2))
+
+
+def test_round_trip(viscosity_frame):
+    sample = RheologySample.from_frame(viscosity_frame, "run", kind="viscosity")
+
+    assert len(sample) == len(viscosity_frame)
+    assert sample.labels == ["FORWARD", "REVERSE"]
+    assert sample.codes.dtype == np.int8
+    assert sample.units["Shear rate"] == "1/s"
+    pd.testing.assert_frame_equal(sample.to_frame(), viscosity_frame, check_dtype=False)
+
+
+def test_segments_are_views(viscosity_frame):
+    sample = RheologySample.from_frame(viscosity_frame, "run", kind="viscosity")
+    reverse = viscosity_frame[viscosity_frame["Sweep"] == "REVERSE"]
+
+    segment = sample.segment("REVERSE")
+    np.testing.assert_array_equal(segment["Viscosity"], reverse["Viscosity"])
+    assert np.shares_memory(segment["Viscosity"], sample.values)
+    assert np.shares_memory(sample["Stress"], sample.values)
+
+
+def test_interleaved_segment_is_a_copy():
+    df = pd.DataFrame({"Viscosity": [1.0, 2.0, 3.0, 4.0], "peak": ["PRESHEAR", "RECOVERY", "PRESHEAR", "RECOVERY"]})
+    sample = RheologySample.from_frame(df, "run")
+
+    np.testing.assert_array_equal(sample.segment("RECOVERY")["Viscosity"], [2.0, 4.0])
+    assert sample.nbytes == 4 * 8 + 4
+
+
+def test_load_samples(tmp_path):
+    path = write_trios_workbook(str(tmp_path / "run.txt"), seed=2)
+    processor = DataProcessor(str(tmp_path / "out"), profile=False)
+
+    samples = processor.load_samples([path, str(tmp_path / "missing.txt")])
+
+    assert "Error" in samples["missing"]
+    assert samples["run"].path == path
+    # The label column comes last
+    frame = samples["run"].to_frame()
+    pd.testing.assert_frame_equal(frame, load_thixotropy_data(path)[frame.columns], check_dtype=False)
+
+
+def test_load_samples_by_path_keeps_files_with_the_same_name(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    first = write_trios_workbook(str(tmp_path / "a" / "run.txt"), seed=2)
+    second = write_trios_workbook(str(tmp_path / "b" / "run.txt"), seed=3)
+    processor = DataProcessor(str(tmp_path / "out"), profile=False)
+
+    samples = processor.load_samples([first, second], kind="viscosity", by_path=True)
+
+    assert list(samples) == [first, second]
+    assert samples[first].name == samples[second].name == "run"
+    assert not np.array_equal(samples[first].values, samples[second].values)
@@ -0,0 +1,117 @@
+import asyncio
+import http.client
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from benchmarks.synthetic import generate_dataset
+from service import AnalysisService
+
+
+@pytest.fixture
+def service(tmp_path):
+    """A service listening on a free localhost port, run on its own event loop thread."""
+    loop = asyncio.new_event_loop()
+    service = AnalysisService(str(tmp_path / "out"), workers=1, concurrent_jobs=2, queue_size=4)
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    host, port = asyncio.run_coroutine_threadsafe(service.start("127.0.0.1", 0), loop).result(30)
+    yield host, port
+    asyncio.run_coroutine_threadsafe(service.stop(), loop).result(60)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(10)
+
+
+def request(address, method, path, payload=None):
+    connection = http.client.HTTPConnection(*address, timeout=60)
+    body = json.dumps(payload).encode() if payload is not None else None
+    connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def wait_for_job(address, job_id, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status, job = request(address, "GET", f"/jobs/{job_id}")
+        assert status == 200
+        if job["status"] in ("finished", "failed"):
+            return job
+        time.sleep(0.2)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_health(service):
+    status, health = request(service, "GET", "/health")
+    assert status == 200
+    assert health["status"] == "ok"
+
+
+def test_thixotropy_job(service, tmp_path):
+    files = generate_dataset(str(tmp_path / "data"), 2, "small", "txt")
+    missing = str(tmp_path / "data" / "Missing_1.txt")
+
+    status, job = request(service, "POST", "/jobs", {"files": files + [missing], "analysis": "thixotropy"})
+    assert status == 202
+
+    job = wait_for_job(service, job["id"])
+    assert job["status"] == "finished"
+    assert job["progress"] == {"done": 3, "total": 3}
+    assert sorted(job["results"]) == ["Sample0001_1", "Sample0001_2"]
+    assert job["results"]["Sample0001_1"]["Thixotropic Index"] > 1
+    assert len(job["plots"]) == 2
+    assert list(job["errors"]) == ["Missing_1"]
+
+
+def test_viscosity_job(service, tmp_path):
+    files = generate_dataset(str(tmp_path / "data"), 1, "small", "txt")
+
+    _, first = request(service, "POST", "/jobs", {"files": files, "analysis": "viscosity"})
+    _, second = request(service, "POST", "/jobs", {"files": files, "analysis": "viscosity"})
+    first = wait_for_job(service, first["id"])
+    second = wait_for_job(service, second["id"])
+
+    assert first["status"] == second["status"] == "finished"
+    metrics = first["results"]["Sample0001_1"]
+    assert metrics["FORWARD Yield Stress HB (Pa)"] > 0
+    assert metrics["REVERSE Viscosity at 10 1/s (Pa.s)"] > 0
+    # The same sample in two jobs is plotted into each job's own directory
+    out = tmp_path / "out"
+    assert first["plots"] == [str(out / first["id"] / "Sample0001_1-BOTH.png")]
+    assert second["plots"] == [str(out / second["id"] / "Sample0001_1-BOTH.png")]
+
+
+def test_job_ids_continue_after_earlier_runs(tmp_path):
+    (tmp_path / "out" / "7").mkdir(parents=True)
+    service = AnalysisService(str(tmp_path / "out"))
+    assert next(service._ids) == 8
+
+
+def test_invalid_requests(service):
+    assert request(service, "POST", "/jobs", {"files": [], "analysis": "thixotropy"})[0] == 400
+    assert request(service, "POST", "/jobs", {"files": ["a.txt"], "analysis": "other"})[0] == 400
+    assert request(service, "GET", "/jobs/unknown")[0] == 404
+    assert request(service, "GET", "/nothing")[0] == 404
+
+
+def test_invalid_content_length(service):
+    with socket.create_connection(service, timeout=30) as connection:
+        connection.sendall(b"POST /jobs HTTP/1.1\r\nHost: localhost\r\nContent-Length: abc\r\n\r\n")
+        response = connection.recv(4096).decode()
+    assert response.startswith("HTTP/1.1 400")
+
+
+def test_large_job_does_not_starve_concurrent_job(service, tmp_path):
+    files = generate_dataset(str(tmp_path / "data"), 8, "small", "txt")
+
+    _, large = request(service, "POST", "/jobs", {"files": files[:7], "analysis": "thixotropy", "plots": False})
+    _, small = request(service, "POST", "/jobs", {"files": files[7:], "analysis": "thixotropy", "plots": False})
+
+    small = wait_for_job(service, small["id"])
+    large = wait_for_job(service, large["id"])
+    assert small["status"] == large["status"] == "finished"
+    # The small job's file is queued after at most a few files of the large job
+    assert small["finished"] < large["finished"]
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_dataset
+from data_import import load_thixotropy_data
+import shared_arrays
+from shared_arrays import SharedSample, load_shared_multiple
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="needs POSIX shared memory in /dev/shm")
+
+
+def blocks():
+    return {name for name in os.listdir("/dev/shm") if name.startswith("rheology_")}
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_samples_match_the_loaded_files_and_are_freed(tmp_path, max_workers):
+    files = generate_dataset(str(tmp_path), 3, "small", "txt")
+    before = blocks()
+
+    samples = load_shared_multiple(files + [str(tmp_path / "missing.txt")], "thixotropy", max_workers)
+
+    assert samples[3]["Error"].startswith("Failed to load file")
+    for file_path, sample in zip(files, samples):
+        expected = load_thixotropy_data(file_path)
+        frame = sample.frame()
+        assert list(frame.columns) == list(expected.columns)
+        np.testing.assert_array_equal(frame["Viscosity"], expected["Viscosity"])
+        assert frame["peak"].astype(str).tolist() == expected["peak"].tolist()
+        assert len(sample.descriptor["name"]) <= 30
+    # The blocks of this process are attached, not held twice
+    assert not shared_arrays._created_blocks
+
+    for sample in samples[:3]:
+        sample.release()
+    assert blocks() == before
+
+
+def test_share_frame_keeps_the_block_until_it_is_attached():
+    df = pd.DataFrame({"Step time": [1.0, 2.0], "peak": ["PRESHEAR", "RECOVERY"]})
+    descriptor = shared_arrays.share_frame(df)
+    assert descriptor["name"] in shared_arrays._created_blocks
+
+    with SharedSample(descriptor) as sample:
+        assert descriptor["name"] not in shared_arrays._created_blocks
+        np.testing.assert_array_equal(sample["Step time"], [1.0, 2.0])
+
+
+def test_no_blocks_leak_when_the_process_exits(tmp_path):
+    files = generate_dataset(str(tmp_path), 2, "small", "txt")
+    script = ("import sys; from shared_arrays import load_shared_multiple; "
+              f"samples = load_shared_multiple({files!r}, 'thixotropy', 2); "
+              "print([s.descriptor['name'] for s in samples])")
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=120,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    assert result.returncode == 0, result.stderr
+    assert "resource_tracker" not in result.stderr
+    for name in eval(result.stdout):
+        assert not os.path.exists(os.path.join("/dev/shm", name))
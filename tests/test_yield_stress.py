@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from yield_stress import METRIC_NAMES, estimate_yield_stress, yield_stress_metrics
+
+RATE = np.geomspace(0.01, 100, 40)
+
+
+def test_herschel_bulkley_recovers_known_parameters():
+    stress = 12.0 + 3.0 * RATE ** 0.5
+
+    estimates = estimate_yield_stress([(RATE, stress)])
+
+    assert estimates["hb_yield_stress"][0] == pytest.approx(12.0, rel=0.02)
+    assert estimates["hb_consistency"][0] == pytest.approx(3.0, rel=0.05)
+    assert estimates["hb_flow_index"][0] == pytest.approx(0.5, abs=0.02)
+    assert estimates["hb_r_squared"][0] == pytest.approx(1.0, abs=1e-3)
+
+
+def test_bingham_fit_of_a_bingham_fluid():
+    stress = 5.0 + 0.2 * RATE
+
+    estimates = estimate_yield_stress([(RATE, stress)])
+
+    assert estimates["bingham_yield_stress"][0] == pytest.approx(5.0, rel=1e-6)
+    assert estimates["bingham_viscosity"][0] == pytest.approx(0.2, rel=1e-6)
+
+
+def test_plateau_yield_stress():
+    # Flat at 20 Pa below 1 1/s, then rising steeply
+    stress = np.where(RATE < 1, 20.0, 20.0 * RATE)
+
+    estimates = estimate_yield_stress([(RATE, stress)])
+
+    assert estimates["plateau_yield_stress"][0] == pytest.approx(20.0)
+
+
+def test_curves_are_fitted_independently_and_short_curves_give_nan():
+    curves = [(RATE, 12.0 + 3.0 * RATE ** 0.5), (RATE[:3], 1.0 + RATE[:3]), (RATE[::-1], (8.0 + 2.0 * RATE)[::-1])]
+
+    estimates = estimate_yield_stress(curves)
+
+    assert estimates["hb_yield_stress"][0] == pytest.approx(12.0, rel=0.02)
+    assert np.isnan(estimates["hb_yield_stress"][1])
+    # Unsorted points are sorted by shear rate first
+    assert estimates["bingham_yield_stress"][2] == pytest.approx(8.0, rel=1e-6)
+
+
+def test_yield_stress_metrics_names():
+    estimates = estimate_yield_stress([(RATE, 5.0 + 0.2 * RATE)])
+
+    metrics = yield_stress_metrics(estimates, 0, "FORWARD ")
+
+    assert set(metrics) == {"FORWARD " + name for name in METRIC_NAMES.values()}
+    assert metrics["FORWARD Yield Stress Bingham (Pa)"] == pytest.approx(5.0)
@@ -0,0 +1,185 @@
+"""
+Small previews of TRIOS exports, cached on disk by file content.
+
+A thumbnail is a sparkline of the file's flow curve (viscosity vs shear rate,
+both sweeps, log-log), or of its viscosity vs time for thixotropy files
+without flow sweeps. Thumbnails are rendered in an isolated worker process
+(see isolation.py), so parsing and drawing never load pandas or matplotlib
+into the GUI and a pathological file cannot hang or crash it. They are saved
+as PNG under the file's SHA-1 digest, so a renamed or moved file reuses its
+preview and an edited file gets a new one.
+"""
+import os
+import queue
+import threading
+
+from lazy_imports import lazy_import
+from data_import import file_digest, load_viscosity_stress_data, load_thixotropy_data
+from isolation import IsolatedWorker
+
+np = lazy_import("numpy")
+
+# Where previews are kept unless a cache directory is given
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "rheology", "thumbnails")
+
+# Size of a thumbnail in pixels (width, height)
+THUMBNAIL_SIZE = (160, 100)
+
+# Seconds a thumbnail may take to render before its worker is killed
+THUMBNAIL_TIMEOUT = 30
+
+# Sweep colors of the flow curve sparkline
+_SWEEP_COLORS = {"FORWARD": "tab:blue", "REVERSE": "tab:orange"}
+
+
+def _preview_series(file_path):
+    """
+    Loads the curves of a thumbnail.
+
+    Returns:
+    tuple: (list of (x, y, color), log_x) for the flow sweeps, or for the peak holds
+           if the file has no flow sweeps.
+    """
+    try:
+        df = load_viscosity_stress_data(file_path)
+    except ValueError:
+        df = load_thixotropy_data(file_path)
+        return [(df["Time"].to_numpy(dtype=float), df["Viscosity"].to_numpy(dtype=float), "tab:blue")], False
+
+    series = []
+    for sweep, color in _SWEEP_COLORS.items():
+        selected = df[df["Sweep"] == sweep]
+        series.append((selected["Shear rate"].to_numpy(dtype=float),
+                       selected["Viscosity"].to_numpy(dtype=float), color))
+    return series, True
+
+
+def render_thumbnail(file_path, output_path, size=THUMBNAIL_SIZE):
+    """
+    Draws the sparkline of a file and saves it as PNG.
+
+    Uses matplotlib's object API without pyplot, so it does not depend on
+    a GUI backend.
+
+    Parameters:
+    file_path (str): Path to the TRIOS export.
+    output_path (str): Path of the PNG to write.
+    size (tuple): (width, height) in pixels.
+
+    Returns:
+    str: output_path.
+
+    Raises:
+    ValueError: If the file holds neither flow sweeps nor peak holds.
+    """
+    from matplotlib.figure import Figure
+
+    series, log_x = _preview_series(file_path)
+
+    dpi = 100
+    fig = Figure(figsize=(size[0] / dpi, size[1] / dpi), dpi=dpi)
+    ax = fig.add_axes((0.02, 0.02, 0.96, 0.96))
+    for x, y, color in series:
+        valid = np.isfinite(x) & np.isfinite(y) & (y > 0) & ((x > 0) if log_x else True)
+        ax.plot(x[valid], y[valid], color=color, linewidth=1)
+    if log_x:
+        ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_xticks([])
+    ax.set_yticks([])
+    ax.minorticks_off()
+
+    # Written under a temporary name so that a half-written file is never cached
+    temporary_path = output_path + ".tmp"
+    fig.savefig(temporary_path, dpi=dpi, format="png")
+    os.replace(temporary_path, output_path)
+    return output_path
+
+
+class ThumbnailCache:
+    """
+    Thumbnails of export files, rendered on demand in a worker process and cached on disk.
+
+    request() never blocks on hashing or rendering: it returns the cached
+    thumbnail if it is known, and otherwise queues the file. A background
+    thread hashes queued files and has an IsolatedWorker render the missing
+    thumbnails, most recent request first (so the file under the mouse goes
+    before the ones hovered on the way), and puts (file path, thumbnail path
+    or None) on `results` when done. GUIs poll `results` from their event loop.
+    """
+
+    def __init__(self, cache_directory=DEFAULT_CACHE_DIRECTORY, size=THUMBNAIL_SIZE, timeout=THUMBNAIL_TIMEOUT):
+        """
+        Initialize the cache.
+
+        Parameters:
+        cache_directory (str): Directory holding the PNG thumbnails.
+        size (tuple): (width, height) of the thumbnails in pixels.
+        timeout (float): Seconds a thumbnail may take to render.
+        """
+        self.cache_directory = cache_directory
+        self.size = size
+        self.results = queue.Queue()
+        self._requests = queue.LifoQueue()
+        self._thumbnails = {}  # (path, size, mtime) -> thumbnail path, or None if the file has no preview
+        self._thread = None
+        # Started with the first render
+        self._worker = IsolatedWorker(timeout=timeout)
+
+    def _key(self, file_path):
+        """Identifies a version of a file without reading it."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return os.path.abspath(file_path), stat.st_size, stat.st_mtime
+
+    def thumbnail_path(self, digest):
+        """Path of the thumbnail of the file content with this digest."""
+        return os.path.join(self.cache_directory, f"{digest}-{self.size[0]}x{self.size[1]}.png")
+
+    def request(self, file_path):
+        """
+        Returns the thumbnail of a file if it is ready, otherwise queues it.
+
+        Parameters:
+        file_path (str): Path to the export.
+
+        Returns:
+        str: Path of the thumbnail PNG, or None if it is not ready yet or the
+             file has no preview (see `results`).
+        """
+        key = self._key(file_path)
+        if key is None:
+            return None
+        if key in self._thumbnails:
+            return self._thumbnails[key]
+
+        if self._thread is None:
+            os.makedirs(self.cache_directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="thumbnails", daemon=True)
+            self._thread.start()
+        self._requests.put((file_path, key))
+        return None
+
+    def _thumbnail(self, file_path):
+        """Returns the cached thumbnail of a file, rendering it in the worker first if needed."""
+        output_path = self.thumbnail_path(file_digest(file_path))
+        if not os.path.exists(output_path):
+            self._worker.read(render_thumbnail, file_path, output_path, self.size)
+        return output_path
+
+    def _run(self):
+        """Background thread: renders requested thumbnails one at a time."""
+        while True:
+            file_path, key = self._requests.get()
+            # The same file may be queued several times (hovered again before it was drawn)
+            if key in self._thumbnails:
+                continue
+            try:
+                thumbnail = self._thumbnail(file_path)
+            except Exception:
+                # Not a flow curve or thixotropy export, or it timed out or crashed the worker: no preview
+                thumbnail = None
+            self._thumbnails[key] = thumbnail
+            self.results.put((file_path, thumbnail))
@@ -0,0 +1,253 @@
+from lazy_imports import lazy_import
+from data_analysis import stack_curves
+
+np = lazy_import("numpy")
+
+# Yield stress estimates of every flow sweep:
+#   Herschel-Bulkley: stress = tau_y + K * rate ** n, fitted to the whole sweep
+#   Bingham:          stress = tau_y + eta_p * rate, fitted to the upper shear-rate decade
+#                     and extrapolated to zero shear rate
+#   Plateau:          mean stress of the low-rate points where the stress no longer
+#                     depends on the shear rate
+METHODS = ("herschel_bulkley", "bingham", "plateau")
+
+# Flow indices tried by the Herschel-Bulkley fit: a coarse grid over this range,
+# then a fine grid around the best coarse value
+FLOW_INDEX_RANGE = (0.05, 2.0)
+FLOW_INDEX_STEPS = 40
+
+# Decades of shear rate, counted down from the highest rate of a sweep, used by the Bingham fit
+BINGHAM_DECADES = 1.0
+
+# Low-rate points belong to the plateau while the log-log slope of stress vs
+# shear rate stays below this (0 is a perfect plateau, 1 a Newtonian liquid)
+PLATEAU_SLOPE = 0.1
+
+# A plateau needs at least this many points
+MIN_PLATEAU_POINTS = 3
+
+# Curves are fitted this many at a time, bounding the memory of the flow index grid
+_CHUNK_SIZE = 256
+
+# Metric names of yield_stress_metrics, per estimate
+METRIC_NAMES = {
+    "hb_yield_stress": "Yield Stress HB (Pa)",
+    "hb_consistency": "HB Consistency (Pa.s^n)",
+    "hb_flow_index": "HB Flow Index",
+    "hb_r_squared": "HB Fit R2",
+    "bingham_yield_stress": "Yield Stress Bingham (Pa)",
+    "bingham_viscosity": "Bingham Plastic Viscosity (Pa.s)",
+    "plateau_yield_stress": "Yield Stress Plateau (Pa)",
+}
+
+
+def _sorted_curves(curves):
+    """
+    Stacks (shear rate, stress) curves, sorted by shear rate.
+
+    Returns:
+    tuple: (rate, stress) arrays (curves x points), NaN where a point is missing
+           or not positive; the missing points are at the end of every row.
+    """
+    rate = stack_curves([curve[0] for curve in curves])
+    stress = stack_curves([curve[1] for curve in curves])
+    valid = (rate > 0) & (stress > 0)
+    rate = np.where(valid, rate, np.nan)
+    stress = np.where(valid, stress, np.nan)
+
+    order = np.argsort(rate, axis=1)
+    return np.take_along_axis(rate, order, axis=1), np.take_along_axis(stress, order, axis=1)
+
+
+def _fit_lines(x, y, weights):
+    """
+    Weighted least-squares fit of y = a + b * x with a, b >= 0, for many curves at once.
+
+    Parameters:
+    x, y, weights (np.ndarray): Arrays of the same shape (..., points); points with zero
+                                weight are ignored (x and y may be anything there).
+
+    Returns:
+    tuple: (a, b, residual sum of squares, total sum of squares) arrays of shape (...).
+    """
+    x = np.where(weights > 0, x, 0.0)
+    y = np.where(weights > 0, y, 0.0)
+    s = weights.sum(axis=-1)
+    sx = (weights * x).sum(axis=-1)
+    sy = (weights * y).sum(axis=-1)
+    sxx = (weights * x * x).sum(axis=-1)
+    sxy = (weights * x * y).sum(axis=-1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        b = (s * sxy - sx * sy) / (s * sxx - sx * sx)
+        a = (sy - b * sx) / s
+
+        # A negative intercept means no yield stress: refit through the origin
+        through_origin = a < 0
+        a = np.where(through_origin, 0.0, a)
+        b = np.where(through_origin, sxy / sxx, b)
+
+        # A negative slope leaves only the intercept (a flat curve)
+        flat = b < 0
+        a = np.where(flat, sy / s, a)
+        b = np.where(flat, 0.0, b)
+
+        residuals = y - a[..., None] - b[..., None] * x
+        sse = (weights * residuals ** 2).sum(axis=-1)
+        sst = (weights * (y - (sy / s)[..., None]) ** 2).sum(axis=-1)
+
+    return a, b, sse, sst
+
+
+def _fit_flow_indices(rate, stress, weights, flow_indices):
+    """Fits tau_y and K for every curve and each of its flow indices (curves x flow indices)."""
+    x = rate[:, None, :] ** flow_indices[:, :, None]
+    y = np.broadcast_to(stress[:, None, :], x.shape)
+    w = np.broadcast_to(weights[:, None, :], x.shape)
+    return _fit_lines(x, y, w)
+
+
+def fit_herschel_bulkley(rate, stress):
+    """
+    Fits the Herschel-Bulkley model to many flow curves at once.
+
+    For a given flow index n the model is linear in tau_y and K, so these are
+    solved in closed form for every curve and every n of a grid, and the best
+    n is refined on a finer grid around it. The fit minimises the relative
+    stress residuals, so the low-rate points that decide the yield stress
+    weigh as much as the high-rate ones.
+
+    Parameters:
+    rate (np.ndarray): Shear rates (curves x points), sorted, NaN-padded (see _sorted_curves).
+    stress (np.ndarray): Stresses, same shape.
+
+    Returns:
+    dict: "hb_yield_stress", "hb_consistency", "hb_flow_index" and "hb_r_squared"
+          arrays with one value per curve, NaN for curves with fewer than four points.
+    """
+    valid = np.isfinite(rate) & np.isfinite(stress)
+    weights = np.where(valid, 1.0 / np.where(valid, stress, 1.0) ** 2, 0.0)
+    rate = np.where(valid, rate, 1.0)
+
+    # Coarse grid over the whole range
+    coarse = np.linspace(*FLOW_INDEX_RANGE, FLOW_INDEX_STEPS)
+    _, _, sse, _ = _fit_flow_indices(rate, stress, weights, np.broadcast_to(coarse, (len(rate), len(coarse))))
+    best = coarse[np.argmin(np.where(np.isfinite(sse), sse, np.inf), axis=1)]
+
+    # Fine grid of the same size around the best coarse value of every curve
+    step = coarse[1] - coarse[0]
+    offsets = np.linspace(-step, step, FLOW_INDEX_STEPS)
+    fine = np.clip(best[:, None] + offsets[None, :], FLOW_INDEX_RANGE[0], FLOW_INDEX_RANGE[1])
+    tau_y, k, sse, sst = _fit_flow_indices(rate, stress, weights, fine)
+    choice = np.argmin(np.where(np.isfinite(sse), sse, np.inf), axis=1)[:, None]
+
+    def pick(values):
+        return np.take_along_axis(values, choice, axis=1)[:, 0]
+
+    enough = valid.sum(axis=1) >= 4
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r_squared = 1 - pick(sse) / pick(sst)
+    return {
+        "hb_yield_stress": np.where(enough, pick(tau_y), np.nan),
+        "hb_consistency": np.where(enough, pick(k), np.nan),
+        "hb_flow_index": np.where(enough, pick(fine), np.nan),
+        "hb_r_squared": np.where(enough, r_squared, np.nan),
+    }
+
+
+def fit_bingham(rate, stress, decades=BINGHAM_DECADES):
+    """
+    Fits the Bingham model to the upper shear-rate range of many flow curves at once.
+
+    Parameters:
+    rate (np.ndarray): Shear rates (curves x points), NaN-padded.
+    stress (np.ndarray): Stresses, same shape.
+    decades (float): Width of the fitted range, in decades below the highest shear rate.
+
+    Returns:
+    dict: "bingham_yield_stress" (the stress extrapolated to zero shear rate) and
+          "bingham_viscosity" arrays, NaN for curves with fewer than two points in range.
+    """
+    valid = np.isfinite(rate) & np.isfinite(stress)
+    with np.errstate(invalid="ignore"):
+        upper = valid & (rate >= np.nanmax(np.where(valid, rate, np.nan), axis=1, initial=0)[:, None]
+                         / 10 ** decades)
+    tau_y, eta_p, _, _ = _fit_lines(rate, stress, upper.astype(float))
+
+    enough = upper.sum(axis=1) >= 2
+    return {
+        "bingham_yield_stress": np.where(enough, tau_y, np.nan),
+        "bingham_viscosity": np.where(enough, eta_p, np.nan),
+    }
+
+
+def plateau_yield_stress(rate, stress, max_slope=PLATEAU_SLOPE, min_points=MIN_PLATEAU_POINTS):
+    """
+    Estimates the yield stress of many flow curves from their low-rate stress plateau.
+
+    The plateau runs from the lowest shear rate as long as the local slope of
+    log stress vs log shear rate stays below max_slope.
+
+    Parameters:
+    rate (np.ndarray): Shear rates (curves x points), sorted, NaN-padded (see _sorted_curves).
+    stress (np.ndarray): Stresses, same shape.
+    max_slope (float): Largest log-log slope within the plateau.
+    min_points (int): Fewest points of a plateau.
+
+    Returns:
+    np.ndarray: Mean plateau stress of every curve, NaN where there is no plateau.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slopes = np.diff(np.log(stress), axis=1) / np.diff(np.log(rate), axis=1)
+    flat = np.abs(slopes) < max_slope
+
+    # Points of the leading run of flat segments (NaN slopes end the run)
+    n_points = np.cumprod(flat, axis=1).sum(axis=1) + 1
+    in_plateau = np.arange(stress.shape[1])[None, :] < n_points[:, None]
+
+    with np.errstate(invalid="ignore"):
+        plateau = np.where(in_plateau, stress, 0.0).sum(axis=1) / n_points
+    return np.where(n_points >= min_points, plateau, np.nan)
+
+
+def estimate_yield_stress(curves):
+    """
+    Estimates the yield stress of many flow curves with every method of METHODS.
+
+    All curves are fitted together in vectorized passes (in chunks of
+    _CHUNK_SIZE curves), so thousands of sweeps take one call.
+
+    Parameters:
+    curves (list of tuple): (shear rate, stress) arrays of every sweep.
+
+    Returns:
+    dict: Estimate name (see METRIC_NAMES) mapped to an array with one value per curve.
+    """
+    estimates = {key: np.full(len(curves), np.nan) for key in METRIC_NAMES}
+
+    for start in range(0, len(curves), _CHUNK_SIZE):
+        chunk = curves[start:start + _CHUNK_SIZE]
+        rate, stress = _sorted_curves(chunk)
+        if rate.shape[1] == 0:
+            continue
+        fits = {**fit_herschel_bulkley(rate, stress), **fit_bingham(rate, stress),
+                "plateau_yield_stress": plateau_yield_stress(rate, stress)}
+        for key, values in fits.items():
+            estimates[key][start:start + len(chunk)] = values
+
+    return estimates
+
+
+def yield_stress_metrics(estimates, index, prefix=""):
+    """
+    Returns the estimates of one curve as metrics for the results export.
+
+    Parameters:
+    estimates (dict): Output of estimate_yield_stress.
+    index (int): Position of the curve.
+    prefix (str): Prepended to the metric names, e.g. "FORWARD ".
+
+    Returns:
+    dict: Metric name mapped to value.
+    """
+    return {prefix + METRIC_NAMES[key]: float(values[index]) for key, values in estimates.items()}